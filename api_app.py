@@ -3,48 +3,171 @@ import sys
 import platform
 import json
 import logging
-from flask import Flask, jsonify, request, send_from_directory, render_template
+from flask import Flask, Response, jsonify, request, send_from_directory, render_template, stream_with_context, url_for
 from apscheduler.schedulers.background import BackgroundScheduler
 import datetime
 import atexit
+import hmac
+import signal
+import threading
+import socket
+from concurrent.futures import Future
 
 from core.logging_db import DatabaseManager
 from core.analyzer import Analyzer
+from core.sampler import MetricsSampler
+from core.write_queue import WriteBehindQueue, WriteQueueFull
+from core.metrics_ring import MetricsRing, RingDrainer
+from core.timeseries import TimeSeriesStore
+from core.forecast import ExhaustionForecaster
+from core.disks import VolumeWatcher, ReclaimIndex
+from core.retention import RetentionEngine
+from core.history import HistoryService, parse_time, DEFAULT_MAX_POINTS
+from core import export as exporter, queries
+from core.event_bus import EventBus, row_payload
+from core.http_cache import HttpCache
+from core.incidents import IncidentTracker
+from core.remediation import RemediationDispatcher
+from core.health_loop import AdaptiveHealthLoop, URGENT, NORMAL, IDLE
+from core.fleet import FleetService, IngestError, decode_batch, MAX_BATCH_BYTES
 from core.models import Event, Action, AuditEntry
 from core.executor_base import get_executor
+from core.leader import LeaderLock
+from core.error_handling import logger
 import config
 
 # Platform Monitor Factory
 def get_monitor():
     system = platform.system()
+    volumes = VolumeWatcher(
+        mounts=getattr(config, 'DISK_MOUNTS', None),
+        interval=getattr(config, 'DISK_REFRESH_SECONDS', 30),
+        timeout=getattr(config, 'DISK_TIMEOUT_SECONDS', 5)
+    )
     if system == 'Darwin' or system == 'Linux':
         from platforms.mac.monitor_mac import MacMonitor
-        return MacMonitor()
+        return MacMonitor(volumes=volumes)
     elif system == 'Windows':
         from platforms.windows.monitor_windows import WindowsMonitor
-        return WindowsMonitor()
+        return WindowsMonitor(updates_ttl=getattr(config, 'WINDOWS_UPDATE_CHECK_HOURS', 6) * 3600, volumes=volumes)
     else:
         print(f"Unsupported platform: {system}")
         sys.exit(1)
 
-def get_configured_executor():
+def get_configured_executor(reclaim=None):
     # If Dev, force Mac execution (dry run)
     env = getattr(config, 'ENVIRONMENT', 'dev')
     if env == 'dev':
         from platforms.mac.executor_mac import MacExecutor
-        return MacExecutor()
+        return MacExecutor(reclaim=reclaim)
     else:
         # Prod - use OS specific
-        return get_executor()
+        return get_executor(reclaim=reclaim)
 
 # Initialize
 app = Flask(__name__, static_folder='templates/static', template_folder='templates')
-monitor = get_monitor()
-executor = get_configured_executor()
+# Micro-caches, ETags / 304s, gzip or brotli and hashed static URLs for every response
+http_cache = HttpCache(
+    app,
+    enabled=getattr(config, 'HTTP_CACHE_ENABLED', True),
+    min_size=getattr(config, 'HTTP_COMPRESS_MIN_BYTES', 1024)
+)
+# Created by start_background() in the leader only: the monitor starts the
+# volume watcher (and WMI collector) threads, the ring is a shared file
+monitor = None
+metrics_ring = None
+ring_drainer = None
+retention = None
+sampler = MetricsSampler(None, interval=getattr(config, 'SAMPLE_INTERVAL_SECONDS', 5))
+# Temp / cache / rotated-log files disk cleanup may delete, refreshed incrementally by a scheduler job
+reclaim_index = ReclaimIndex(
+    getattr(config, 'RECLAIM_PATHS', None),
+    min_age_hours=getattr(config, 'RECLAIM_MIN_AGE_HOURS', 24)
+)
+executor = get_configured_executor(reclaim_index)
+remediation = RemediationDispatcher(
+    executor,
+    max_workers=getattr(config, 'REMEDIATION_WORKERS', 4),
+    default_deadline=getattr(config, 'REMEDIATION_DEADLINE_SECONDS', 60)
+)
 db_manager = DatabaseManager()
-analyzer = Analyzer(db_manager)
+write_queue = WriteBehindQueue(db_manager)
+# Recent history in memory (columnar), loaded from the metrics ring by the
+# leader; other processes keep it empty and read history from SQLite
+timeseries = TimeSeriesStore(capacity=getattr(config, 'METRICS_RING_CAPACITY', 17280))
+analyzer = Analyzer(db_manager, sampler=sampler, rules_file=getattr(config, 'ANALYZER_RULES_FILE', None),
+                    store=timeseries)
+history = HistoryService(db_manager, raw_retention_hours=getattr(config, 'METRICS_RAW_RETENTION_HOURS', 24),
+                         store=timeseries)
+# Disk / memory exhaustion forecasts, updated per sample; seeded from the ring's samples (leader)
+forecaster = ExhaustionForecaster(
+    horizon_hours=getattr(config, 'FORECAST_HORIZON_HOURS', 48),
+    min_span_seconds=getattr(config, 'FORECAST_MIN_SPAN_SECONDS', 1800),
+    rewarn_hours=getattr(config, 'FORECAST_REWARN_HOURS', 12)
+)
+incidents = IncidentTracker(
+    write_queue,
+    cooldown_seconds=getattr(config, 'INCIDENT_COOLDOWN_SECONDS', 600),
+    recovery_samples=getattr(config, 'INCIDENT_RECOVERY_SAMPLES', 2)
+)
+fleet = FleetService(
+    db_manager,
+    write_queue,
+    offline_after=getattr(config, 'FLEET_OFFLINE_AFTER_SECONDS', 180),
+    retention_days=getattr(config, 'FLEET_RETENTION_DAYS', 7)
+)
+event_bus = EventBus()
+sampler.add_listener(lambda snapshot: event_bus.publish('metrics', snapshot.to_dict()))
+
+# Agent mode: also ship committed rows to a central collector
+shipper = None
+if getattr(config, 'AGENT_MODE', False):
+    from core.agent import AgentShipper
+    shipper = AgentShipper(
+        config.COLLECTOR_URL,
+        host=getattr(config, 'AGENT_HOST_ID', None) or socket.gethostname(),
+        token=getattr(config, 'INGEST_TOKEN', None),
+        batch_size=getattr(config, 'AGENT_BATCH_SIZE', 500),
+        flush_interval=getattr(config, 'AGENT_FLUSH_SECONDS', 10),
+        spool_dir=getattr(config, 'AGENT_SPOOL_DIR', 'agent_spool')
+    )
+
+# Stream kinds that agents ship, and their kind on the collector
+SHIPPED_KINDS = {'history': 'metrics', 'event': 'event', 'action': 'action'}
+
+def publish_when_written(kind, future, build_payload):
+    """Push a row to dashboard streams (and the collector, in agent mode) once the write queue has committed it."""
+    def _publish(row_id):
+        payload = build_payload(row_id)
+        event_bus.publish(kind, payload)
+        if shipper is not None and kind in SHIPPED_KINDS:
+            shipper.submit(SHIPPED_KINDS[kind], payload)
+    if not isinstance(future, Future):
+        _publish(future)  # already a row id
+        return
+    def _done(f):
+        if f.exception() is None:
+            _publish(f.result())
+    future.add_done_callback(_done)
+
+def record_sample(snapshot):
+    """Sampler listener: append to the metrics ring (O(1), no SQLite) and the time-series store, then push the chart point."""
+    metrics = snapshot.metrics
+    epoch = datetime.datetime.fromisoformat(snapshot.timestamp).timestamp()
+    cpu, mem, disk = metrics.get('cpu_percent'), metrics.get('memory_percent'), metrics.get('disk_percent')
+    # The ring sequence becomes the row's metrics_history id once drained
+    seq = metrics_ring.append(epoch, cpu, mem, disk)
+    timeseries.add_snapshot(epoch, metrics, seq)
+    forecaster.observe(epoch, metrics)
+    publish_when_written('history', seq, lambda row_id: {
+        'id': row_id, 'timestamp': snapshot.timestamp, 'ts': int(epoch),
+        'cpu_percent': cpu, 'memory_percent': mem, 'disk_percent': disk
+    })
+
+sampler.add_listener(record_sample)
 
 @app.route('/api/settings/whitelist', methods=['GET', 'POST'])
+@http_cache.cached(lambda: db_manager.config().version)
 def handle_whitelist():
     if request.method == 'POST':
         data = request.json
@@ -63,35 +186,92 @@ def delete_whitelist(name):
 
 @app.route('/api/recommendations', methods=['GET'])
 def get_recommendations():
-    # Simple insights logic
-    events = db_manager.get_recent_events(limit=50)
+    # Simple insights logic: incidents active over the last 30 minutes. A
+    # sustained condition is one incident (and one event row), so look at how
+    # many health cycles it was seen in, how long it has been open and how
+    # often it recurred.
+    since = datetime.datetime.now().timestamp() - 30 * 60
+    activity = incidents.activity(db_manager, since)
     insights = []
-    
-    # Count event types
-    counts = {}
-    for e in events:
-        counts[e['type']] = counts.get(e['type'], 0) + 1
-        
-    if counts.get('cpu_high', 0) > 5:
+
+    def frequent(event_type):
+        stats = activity.get(event_type)
+        return stats is not None and (stats['occurrences'] > 5 or stats['open_seconds'] > 10 * 60
+                                      or stats['incidents'] >= 3)
+
+    if frequent('cpu_high'):
         insights.append({
             "type": "performance", 
             "message": "High CPU detected frequency. Recommend reviewing startup apps or background services.",
             "severity": "warning"
         })
     
-    if counts.get('memory_high', 0) > 5:
+    if frequent('memory_high'):
         insights.append({
             "type": "resource",
             "message": "Memory pressure is consistent. Consider closing browser tabs or upgrading RAM.",
             "severity": "info"
         })
 
+    # Trends over the same window from the in-memory time-series store
+    config_snapshot = db_manager.config()
+    cpu = timeseries.summary('cpu_percent', since, hows=('mean',))
+    if cpu['mean'] is not None and cpu['mean'] > 0.9 * config_snapshot.get('cpu_threshold', 80.0):
+        insights.append({
+            "type": "trend",
+            "message": f"CPU averaged {cpu['mean']:.0f}% over the last 30 minutes.",
+            "severity": "warning"
+        })
+
+    memory_threshold = config_snapshot.get('memory_threshold', 85.0)
+    memory = timeseries.summary('memory_percent', since, hows=('p95',))
+    if memory['p95'] is not None and memory['p95'] > memory_threshold:
+        insights.append({
+            "type": "trend",
+            "message": f"Memory was above {memory_threshold:.0f}% for over 5% of the last 30 minutes (p95 {memory['p95']:.0f}%).",
+            "severity": "info"
+        })
+
+    disk = timeseries.summary('disk_percent', since, hows=('rate',))
+    if disk['rate'] is not None and disk['rate'] > 1.0:
+        insights.append({
+            "type": "trend",
+            "message": f"Disk usage is growing {disk['rate']:.1f}% per hour.",
+            "severity": "warning"
+        })
+
+    for forecast in forecaster.forecast(config_snapshot):
+        eta = forecast['eta_seconds']
+        if forecast['confident'] and eta and eta <= forecaster.horizon:
+            insights.append({
+                "type": "forecast",
+                "message": f"{forecast['series'].split('_')[0].capitalize()} is projected to reach "
+                           f"{forecast['threshold']:.0f}% around {forecast['eta']}.",
+                "severity": "warning" if eta < 24 * 3600 else "info"
+            })
+
     return jsonify(insights)
 
 @app.route('/api/history')
 def get_history():
-    # Return last 60 points for charts
-    return jsonify(db_manager.get_metrics_history(limit=60))
+    """
+    Chart series. Query params (all optional):
+      from, to     epoch seconds or ISO-8601; picks raw or rollup data by span
+      max_points   server-side LTTB downsampling target (default 300)
+      since_id     only raw rows newer than this id (incremental updates)
+    Without params returns the latest `max_points` raw samples.
+    """
+    try:
+        since_id = request.args.get('since_id', type=int)
+        result = history.query(
+            since=parse_time(request.args.get('from')),
+            until=parse_time(request.args.get('to')),
+            max_points=request.args.get('max_points', DEFAULT_MAX_POINTS, type=int),
+            since_id=since_id
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
 
 @app.route('/api/processes')
 def get_processes():
@@ -111,20 +291,94 @@ def get_processes():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/processes/<name>/history')
+def get_process_history(name):
+    """Recent CPU / RSS series of a process seen in the top lists (in memory only)."""
+    try:
+        since = parse_time(request.args.get('from'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    points = timeseries.process_range(name, since=since if since is not None else datetime.datetime.now().timestamp() - 3600)
+    if points is None:
+        return jsonify({'error': 'No history for this process'}), 404
+    return jsonify({'name': name, 'points': points})
+
+def record_remediation(task, result):
+    """Write the action, audit row and any recommendation once a remediation finishes."""
+    event, event_id = task.context
+    extra = result.extra
+    started = datetime.datetime.fromtimestamp(result.started_at) if result.started_at else datetime.datetime.now()
+
+    action = Action(
+        timestamp=started.isoformat(),
+        type=task.action_type,
+        status=result.status,
+        output=result.output,
+        duration_ms=result.duration_ms,
+        event_id=event_id
+    )
+    
+    # Pass extra metadata
+    action_id = write_queue.submit_action(action, extra=extra)
+    publish_when_written('action', action_id, lambda row_id: row_payload(
+        action, id=row_id,
+        target_process=extra.get('target_process'),
+        target_service=extra.get('target_service'),
+        files_deleted=extra.get('files_deleted')
+    ))
+    
+    # Create recommendation if action suggests one
+    recommendation_type = extra.get('recommendation')
+    if recommendation_type:
+        rec_text = ""
+        if recommendation_type == 'close_app':
+            process = extra.get('target_process', 'unknown')
+            rec_text = f"Close {process} to free memory"
+        elif recommendation_type == 'restart_service':
+            service = extra.get('target_service', 'unknown')
+            rec_text = f"Restart service: {service}"
+        elif recommendation_type == 'install_updates':
+            rec_text = "Install pending Windows updates"
+        
+        if rec_text:
+            rec_id = write_queue.submit_recommendation(
+                event_id=event_id,
+                category=event.type,
+                recommendation_text=rec_text,
+                action_type=recommendation_type,
+                priority='high' if event.severity == 'critical' else 'medium'
+            )
+            publish_when_written('recommendation', rec_id, lambda row_id: {
+                'id': row_id, 'status': 'pending', 'recommendation_text': rec_text
+            })
+    
+    # Log Audit
+    write_queue.submit_audit(
+        AuditEntry(
+            timestamp=action.timestamp,
+            action_id=action_id,
+            affected_resources=event.type,
+            status=action.status
+        )
+    )
+
 # Scheduler Job
 def run_health_check_job():
     try:
-        # 1. Monitor
-        metrics = monitor.get_system_metrics()
-        
-        # 0. Log History
-        db_manager.log_metrics(metrics['cpu_percent'], metrics['memory_percent'], metrics['disk_percent'])
+        # 1. Monitor (read the sampler's latest snapshot, never collect here)
+        snapshot = sampler.latest(timeout=10)
+        if snapshot is None:
+            print("Error in schedule job: no metrics snapshot available yet")
+            return
+        metrics = snapshot.metrics
+        # History is recorded per sample by record_sample (metrics ring), not here
 
         # 2. Analyze
         events = analyzer.analyze(metrics)
         
         # 3. Handle Events
-        settings = db_manager.get_settings()
+        # Same immutable snapshot the analyzer used; no SQLite reads
+        config_snapshot = db_manager.config()
         
         # Determine Execution Mode
         # If Config says Dev or Auto Off, we might restrict actions
@@ -136,8 +390,7 @@ def run_health_check_job():
         global_auto = getattr(config, 'AUTO_REMEDIATE_ENABLED', False)
         
         # User settings from DB
-        db_auto_val = str(settings.get('auto_remediate', 'false')).lower()
-        db_auto_enabled = db_auto_val in ['1', 'true', 'on', 'yes']
+        db_auto_enabled = config_snapshot.get('auto_remediate', False)
         
         # Combine Configuration
         # Logic: If global config forces OFF, it's OFF. 
@@ -172,20 +425,32 @@ def run_health_check_job():
             'cpu_high': 'action_kill_high_cpu_process', # Now supports throttling!
             'memory_high': 'action_clear_memory_hog',
             'disk_low': 'action_free_disk_space',
+            'volume_low': 'action_free_disk_space',
             'service_crashed': 'action_restart_service',
             'updates_pending': 'action_handle_updates_pending'
         }
 
         # Fetch whitelist once per cycle
-        current_whitelist = db_manager.get_whitelist()
+        current_whitelist = config_snapshot.whitelist
+
+        # Repeated events of a sustained condition update one open incident;
+        # only an incident's first event is logged
+        decisions, closed = incidents.observe(events)
+        for incident in closed:
+            publish_when_written('incident', incident.id, lambda row_id, i=incident: row_payload(i, id=row_id))
 
-        for event in events:
-            # Log Event
-            event_id = db_manager.log_event(event) # Returns ID
-            event.id = event_id
+        for decision in decisions:
+            event = decision.event
+            # event_id is a Future for the row id; the write queue resolves it
+            # when inserting the rows that reference it.
+            event_id = decision.event_id
+            if decision.is_new:
+                publish_when_written('event', event_id, lambda row_id, e=event: row_payload(e, id=row_id))
+                publish_when_written('incident', decision.incident.id,
+                                     lambda row_id, i=decision.incident: row_payload(i, id=row_id))
             
-            # Auto-Remediate?
-            if auto_remediate:
+            # Auto-Remediate? Once when the incident opens, then after each cooldown
+            if auto_remediate and decision.remediate:
                 action_type = ACTION_MAP.get(event.type)
                 if action_type:
                     # Execute Fix via new Executor Interface
@@ -195,71 +460,212 @@ def run_health_check_job():
                         'metric_value': event.metric_value,
                         'threshold': event.threshold,
                         'severity': event.severity,
-                        'whitelist': current_whitelist # Pass dynamic whitelist
+                        'target': event.target, # e.g. the mount point of a full volume
+                        'whitelist': current_whitelist, # Pass dynamic whitelist
+                        'top_processes': list(metrics.get('top_processes') or []) # PIDs for in-process remediation
                     }
                     
-                    success, output, extra = executor.execute_action(action_type, issue_dict)
-                    
-                    # Create Action Object
-                    duration_ms = 0 
-                    
-                    action = Action(
-                        timestamp=datetime.datetime.now().isoformat(),
-                        type=action_type,
-                        status='success' if success else 'failed',
-                        output=output,
-                        duration_ms=duration_ms,
-                        event_id=event_id
-                    )
-                    
-                    # Pass extra metadata
-                    action_id = db_manager.log_action(action, extra=extra)
-                    
-                    # Create recommendation if action suggests one
-                    recommendation_type = extra.get('recommendation')
-                    if recommendation_type:
-                        rec_text = ""
-                        if recommendation_type == 'close_app':
-                            process = extra.get('target_process', 'unknown')
-                            rec_text = f"Close {process} to free memory"
-                        elif recommendation_type == 'restart_service':
-                            service = extra.get('target_service', 'unknown')
-                            rec_text = f"Restart service: {service}"
-                        elif recommendation_type == 'install_updates':
-                            rec_text = "Install pending Windows updates"
-                        
-                        if rec_text:
-                            db_manager.create_recommendation(
-                                event_id=event_id,
-                                category=event.type,
-                                recommendation_text=rec_text,
-                                action_type=recommendation_type,
-                                priority='high' if event.severity == 'critical' else 'medium'
-                            )
-                    
-                    # Log Audit
-                    db_manager.log_audit(
-                        AuditEntry(
-                            timestamp=action.timestamp,
-                            action_id=action_id,
-                            affected_resources=event.type,
-                            status=action.status
-                        )
-                    )
+                    # Runs on the remediation pool; results are recorded by record_remediation
+                    remediation.submit(action_type, issue_dict, on_done=record_remediation, context=(event, event_id))
+                    incidents.mark_remediated(decision.incident)
     except Exception as e:
         print(f"Error in schedule job: {e}")
 
-# scheduler = BackgroundScheduler()
-# scheduler.add_job(func=run_health_check_job, trigger="interval", seconds=30)
-# scheduler.start()
+def assess_health():
+    """Host state for the adaptive health loop: open incidents or a metric near a threshold is urgent."""
+    if incidents.open_incidents():
+        return URGENT
+    snapshot = sampler.latest()
+    if snapshot is None:
+        return NORMAL
+    headroom = analyzer.engine.headroom(snapshot.metrics, db_manager.config())
+    if headroom <= getattr(config, 'HEALTH_NEAR_THRESHOLD', 0.1):
+        return URGENT
+    if headroom >= getattr(config, 'HEALTH_IDLE_HEADROOM', 0.5):
+        return IDLE
+    return NORMAL
+
+health_loop = AdaptiveHealthLoop(
+    run_health_check_job,
+    assess_health,
+    fast=getattr(config, 'HEALTH_INTERVAL_FAST_SECONDS', 5),
+    normal=getattr(config, 'HEALTH_INTERVAL_SECONDS', 30),
+    slow=getattr(config, 'HEALTH_INTERVAL_IDLE_SECONDS', 60)
+)
+
+def run_forecast_job():
+    """Write a recommendation for each exhaustion predicted within the horizon (deduplicated by the forecaster)."""
+    try:
+        for forecast in forecaster.due(db_manager.config()):
+            rec_id = write_queue.submit_recommendation(
+                event_id=None,
+                category=forecast['category'],
+                recommendation_text=forecast['text'],
+                action_type=forecast['action_type'],
+                priority=forecast['priority']
+            )
+            publish_when_written('recommendation', rec_id, lambda row_id, text=forecast['text']: {
+                'id': row_id, 'status': 'pending', 'recommendation_text': text
+            })
+    except Exception as e:
+        print(f"Error in forecast job: {e}")
+
+@app.route('/api/forecast')
+def get_forecast():
+    """Per-series trend (% per hour) and projected time to the configured threshold."""
+    return jsonify({
+        'horizon_hours': forecaster.horizon / 3600,
+        'series': forecaster.forecast(db_manager.config())
+    })
+
+@app.route('/api/disks')
+def get_disks():
+    """Every watched volume, plus what cleanup could reclaim (per category, from the index)."""
+    result = []
+    if monitor is None:
+        return jsonify({'error': 'Volumes are watched by the background process'}), 503
+    for volume in monitor.volumes.volumes():
+        device = reclaim_index.device_of(volume['name'])
+        result.append(dict(volume, reclaimable=reclaim_index.summary(device=device) if device is not None else {}))
+    return jsonify({'volumes': result, 'index': reclaim_index.stats()})
 
-# We start scheduler only if not running reloader (to avoid double jobs in dev)
-# But for simplicity in this script:
-if not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(func=run_health_check_job, trigger="interval", seconds=30)
+@app.route('/api/scheduler')
+def get_scheduler_stats():
+    """Health loop mode, interval, cycle latency and skipped/missed run counters."""
+    return jsonify(dict(health_loop.stats(), metrics_ring=ring_drainer.stats() if ring_drainer else None,
+                        timeseries=timeseries.stats(),
+                        http_cache=http_cache.stats(),
+                        server={'role': _role, 'leader': leader.held, 'background': _background_started, 'pid': os.getpid()}))
+
+# --- Process lifecycle ---
+# Importing this module only builds inert services; create_app() starts them.
+# Per process: the write-behind queue (HTTP handlers write through it).
+# Leader only: monitor, metrics ring, sampler, scheduled jobs and the agent
+# shipper, elected through a file lock next to the database.
+ROLES = ('all', 'web', 'worker')
+scheduler = BackgroundScheduler()
+leader = LeaderLock(getattr(config, 'LEADER_LOCK_PATH', None) or f"{db_manager.db_path}.leader")
+stopping = threading.Event()
+_lifecycle_lock = threading.Lock()
+_role = None
+_background_started = False
+_shutdown_done = False
+
+def start_background():
+    """
+    Monitor, metrics ring, sampler, scheduled jobs and agent shipper (leader
+    only, once). The ring is opened here, after the election, so its header
+    is current when a standby process takes over.
+    """
+    global _background_started
+    with _lifecycle_lock:
+        # Held throughout, so a concurrent shutdown_background() sees all or nothing
+        if _background_started or _shutdown_done:
+            return
+        _start_background()
+        _background_started = True
+
+def _start_background():
+    global monitor, metrics_ring, ring_drainer, retention
+    # Every sample lands in the memory-mapped ring first; the drainer copies it into SQLite
+    metrics_ring = MetricsRing(
+        getattr(config, 'METRICS_RING_PATH', 'metrics_ring.bin'),
+        capacity=getattr(config, 'METRICS_RING_CAPACITY', 17280)
+    )
+    timeseries.load(metrics_ring.latest(metrics_ring.capacity))
+    forecaster.warm_start(timeseries.range())
+    ring_drainer = RingDrainer(metrics_ring, db_manager, interval=getattr(config, 'METRICS_DRAIN_SECONDS', 2),
+                               on_renumber=timeseries.shift_ids)
+    retention = RetentionEngine(
+        db_manager,
+        raw_retention_hours=getattr(config, 'METRICS_RAW_RETENTION_HOURS', 24),
+        rollup_retention_days=getattr(config, 'METRICS_ROLLUP_RETENTION_DAYS', None),
+        watermark=ring_drainer.watermark
+    )
+    monitor = get_monitor()
+    sampler.monitor = monitor
+    ring_drainer.start()
+    sampler.start()
+    health_loop.attach(scheduler)
+    scheduler.add_job(func=retention.run, trigger="interval",
+                      minutes=getattr(config, 'RETENTION_INTERVAL_MINUTES', 5), max_instances=1)
+    scheduler.add_job(func=fleet.prune, trigger="interval", hours=1, max_instances=1)
+    scheduler.add_job(func=run_forecast_job, trigger="interval",
+                      minutes=getattr(config, 'FORECAST_CHECK_MINUTES', 5), max_instances=1)
+    scheduler.add_job(func=reclaim_index.refresh, trigger="interval",
+                      minutes=getattr(config, 'RECLAIM_SCAN_MINUTES', 10), max_instances=1,
+                      next_run_time=datetime.datetime.now())
+    if shipper is not None:
+        shipper.start()
     scheduler.start()
-    atexit.register(lambda: scheduler.shutdown())
+    logger.info(f"Background services started in pid {os.getpid()}")
+
+def create_app(role=None):
+    """
+    App factory / WSGI entry point (e.g. `waitress-serve --call api_app:create_app`).
+
+    role 'all' (default, config.SERVER_ROLE): serve HTTP and run the
+    background services if this process wins the leader election; otherwise
+    serve HTTP and take over when the leader exits. 'web': HTTP only.
+    'worker': background only (see run_worker). Live views (/api/health,
+    /api/stream, /api/disks) come from the leader's monitor, so run a single 'all'
+    process unless a proxy routes those to it.
+    """
+    global _role
+    role = role or getattr(config, 'SERVER_ROLE', 'all')
+    if role not in ROLES:
+        raise ValueError(f"Unknown server role '{role}'")
+    with _lifecycle_lock:
+        if _role is not None:
+            return app
+        _role = role
+    db_manager.init_db()
+    incidents.load(db_manager)
+    forecaster.load(db_manager)
+    write_queue.start()
+    atexit.register(shutdown_background)
+    if role != 'web':
+        if leader.acquire():
+            start_background()
+        else:
+            logger.info(f"Another process holds {leader.path}; serving without background services until it exits")
+            leader.wait(start_background, interval=getattr(config, 'LEADER_RETRY_SECONDS', 5), stop=stopping)
+    return app
+
+def shutdown_background():
+    """
+    Graceful stop: end SSE streams and scheduled jobs, let running
+    remediations finish (queued ones are cancelled), flush queued rows, then
+    hand the leader lock to the next process.
+    """
+    global _shutdown_done
+    with _lifecycle_lock:
+        if _shutdown_done:
+            return
+        _shutdown_done = True
+    stopping.set()
+    event_bus.close()
+    if scheduler.running:
+        scheduler.shutdown()
+    if _background_started:
+        sampler.stop()
+        # Last copy of ring samples into SQLite (they stay in the ring file if it fails)
+        ring_drainer.stop()
+        metrics_ring.close()
+        # Stop the volume watcher / WMI collector threads
+        if hasattr(monitor, 'close'):
+            monitor.close()
+    remediation.shutdown(wait=True, cancel_pending=True)
+    # Flush queued events/actions/audit rows before the process exits
+    incidents.flush()
+    write_queue.close()
+    # Last delivery attempt for rows committed above; the rest stays spooled
+    if shipper is not None:
+        shipper.stop()
+    # Stop the persistent PowerShell host (WindowsExecutor)
+    if hasattr(executor, 'close'):
+        executor.close()
+    leader.release()
 
 @app.route('/')
 def index():
@@ -271,21 +677,216 @@ def dashboard():
 
 @app.route('/api/health')
 def api_health():
-    metrics = monitor.get_system_metrics()
-    metrics['timestamp'] = datetime.datetime.now().isoformat()
-    return jsonify(metrics)
+    # Served from the background sampler; viewers never trigger collection
+    snapshot = sampler.latest(timeout=3)
+    if snapshot is None:
+        return jsonify({'error': 'Metrics not collected yet'}), 503
+    return jsonify(snapshot.to_dict())
+
+@app.route('/api/stream')
+def api_stream():
+    """
+    Server-Sent Events push channel: 'metrics', 'history', 'event', 'action',
+    'recommendation' and 'reset' messages. Reconnecting clients resume from
+    the Last-Event-ID header (or ?last_id=).
+    """
+    last_id = request.headers.get('Last-Event-ID', request.args.get('last_id'))
+    try:
+        last_id = int(last_id) if last_id not in (None, '') else None
+    except ValueError:
+        last_id = None
+    return Response(
+        stream_with_context(event_bus.stream(last_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _list_arg(name):
+    """Comma separated and/or repeated query parameter."""
+    return [v for arg in request.args.getlist(name) for v in arg.split(',') if v]
+
+def _query_page(dataset, default_limit):
+    """
+    Shared by /api/events and /api/actions. Query params (all optional):
+      before_id, after_id   cursors: rows older than / newer than an id
+      limit                 page size (max core.queries.MAX_LIMIT)
+      from, to              epoch seconds or ISO-8601, `to` exclusive
+      fields                comma separated columns (id is always included)
+      type, severity, status, target_process   filters, comma separated
+    Returns the rows newest first, as before; a Link header points to the
+    next older page (rel="next") and to newer rows (rel="prev"). ETags and
+    304s come from http_cache.
+    """
+    filters = {name: _list_arg(name) for name in queries.DATASETS[dataset].filters if _list_arg(name)}
+    try:
+        result = db_manager.query(
+            dataset,
+            fields=_list_arg('fields') or None,
+            filters=filters,
+            since=parse_time(request.args.get('from')),
+            until=parse_time(request.args.get('to')),
+            before_id=request.args.get('before_id', type=int),
+            after_id=request.args.get('after_id', type=int),
+            limit=request.args.get('limit', default_limit, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    items = result['items']
+    links = []
+    if items:
+        args = request.args.to_dict(flat=False)
+        args.pop('before_id', None)
+        args.pop('after_id', None)
+        older = request.args.get('after_id') is not None or result['has_more']
+        if older:
+            links.append(f'<{url_for(request.endpoint, before_id=items[-1]["id"], **args)}>; rel="next"')
+        links.append(f'<{url_for(request.endpoint, after_id=items[0]["id"], **args)}>; rel="prev"')
+    response = jsonify(items)
+    if links:
+        response.headers['Link'] = ', '.join(links)
+    return response
 
 @app.route('/api/events')
+@http_cache.cached(lambda: db_manager.pool.versions('events'))
 def api_events():
-    events = db_manager.get_recent_events(limit=100)
-    return jsonify(events)
+    return _query_page('events', 100)
+
+@app.route('/api/events/<int:event_id>')
+def api_event(event_id):
+    try:
+        event = db_manager.get_event(event_id, fields=_list_arg('fields') or None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if event is None:
+        return jsonify({'error': 'Event not found'}), 404
+    return jsonify(event)
+
+@app.route('/api/export/<dataset>')
+def api_export(dataset):
+    """
+    Streaming export of 'events', 'actions' or 'audit' (audit_log joined to
+    its action and event). Query params (all optional):
+      format       ndjson (default) or csv
+      gzip         1 to download a .gz file
+      from, to     epoch seconds or ISO-8601, `to` exclusive
+      type, severity, status, ...   filters (see core.queries.DATASETS), comma separated
+    """
+    if dataset not in queries.DATASETS:
+        return jsonify({'error': f"Unknown dataset '{dataset}'"}), 404
+    fmt = request.args.get('format', 'ndjson')
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    filters = {name: _list_arg(name) for name in queries.DATASETS[dataset].filters if _list_arg(name)}
+    try:
+        chunks = exporter.export(
+            db_manager.pool.reader(), dataset, fmt, compress,
+            since=parse_time(request.args.get('from')),
+            until=parse_time(request.args.get('to')),
+            filters=filters,
+            page_size=request.args.get('page_size', exporter.DEFAULT_PAGE_SIZE, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return Response(
+        stream_with_context(chunks),
+        mimetype='application/gzip' if compress else exporter.FORMATS[fmt],
+        headers={
+            'Content-Disposition': f'attachment; filename="{exporter.filename(dataset, fmt, compress)}"',
+            'Cache-Control': 'no-store',
+            'X-Accel-Buffering': 'no',
+        }
+    )
+
+@app.route('/api/incidents')
+@http_cache.cached(lambda: db_manager.pool.versions('incidents'))
+def api_incidents():
+    status = request.args.get('status')
+    return jsonify(db_manager.get_incidents(status=status, limit=request.args.get('limit', 50, type=int)))
 
 @app.route('/api/actions')
+@http_cache.cached(lambda: db_manager.pool.versions('actions'))
 def api_actions():
-    actions = db_manager.get_recent_actions(limit=50)
+    return _query_page('actions', 50)
+
+@app.route('/api/actions/<int:action_id>')
+def api_action(action_id):
+    try:
+        action = db_manager.get_action(action_id, fields=_list_arg('fields') or None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if action is None:
+        return jsonify({'error': 'Action not found'}), 404
+    return jsonify(action)
+
+@app.route('/api/ingest', methods=['POST'])
+def api_ingest():
+    """
+    Bulk ingest for agents: one gzip'd JSON batch per request (see
+    core.fleet.decode_batch). Accepted batches are queued for the write-behind
+    writer and acknowledged with 202; 503 + Retry-After tells the agent to
+    spool and retry later. 400 lists invalid items by index, so the agent can
+    resend the rest.
+    """
+    token = getattr(config, 'INGEST_TOKEN', None)
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return jsonify({'error': 'Invalid ingest token'}), 401
+    if request.content_length is not None and request.content_length > MAX_BATCH_BYTES:
+        return jsonify({'error': 'Batch too large'}), 413
+    try:
+        batch = decode_batch(request.get_data(cache=False), request.headers.get('Content-Encoding'))
+        fleet.ingest(batch)
+    except IngestError as e:
+        return jsonify({'error': str(e), 'invalid': e.invalid}), 400
+    except (WriteQueueFull, RuntimeError):
+        return jsonify({'error': 'Collector busy'}), 503, {'Retry-After': '5'}
+    return jsonify({'status': 'accepted', 'items': len(batch['items'])}), 202
+
+@app.route('/api/fleet/hosts')
+def api_fleet_hosts():
+    return jsonify(fleet.hosts())
+
+@app.route('/api/fleet/hosts/<name>/metrics')
+def api_fleet_host_metrics(name):
+    """Same range parameters as /api/history: from, to, max_points."""
+    try:
+        result = fleet.host_metrics(
+            name,
+            since=parse_time(request.args.get('from')),
+            until=parse_time(request.args.get('to')),
+            max_points=request.args.get('max_points', DEFAULT_MAX_POINTS, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if result is None:
+        return jsonify({'error': 'Unknown host'}), 404
+    return jsonify(result)
+
+@app.route('/api/fleet/hosts/<name>/events')
+def api_fleet_host_events(name):
+    events = fleet.host_events(name, limit=request.args.get('limit', 100, type=int))
+    if events is None:
+        return jsonify({'error': 'Unknown host'}), 404
+    return jsonify(events)
+
+@app.route('/api/fleet/hosts/<name>/actions')
+def api_fleet_host_actions(name):
+    actions = fleet.host_actions(name, limit=request.args.get('limit', 50, type=int))
+    if actions is None:
+        return jsonify({'error': 'Unknown host'}), 404
     return jsonify(actions)
 
+@app.route('/api/agent')
+def api_agent():
+    """Shipping state in agent mode (queue, spool, failures)."""
+    if shipper is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(shipper.stats(), enabled=True))
+
+@app.route('/fleet')
+def fleet_dashboard():
+    return render_template('fleet.html')
+
 @app.route('/api/settings', methods=['GET'])
+@http_cache.cached(lambda: db_manager.config().version)
 def get_settings():
     return jsonify(db_manager.get_settings())
 
@@ -299,11 +900,10 @@ def update_setting(key):
         return jsonify({'status': 'success', 'key': key, 'value': val})
     return jsonify({'status': 'error', 'message': 'No value provided'}), 400
 
-@app.route('/api/actions/<action_id>/rollback', methods=['POST'])
+@app.route('/api/actions/<int:action_id>/rollback', methods=['POST'])
 def rollback_action(action_id):
     # Fetch original action details to know what to rollback
-    actions = db_manager.get_recent_actions(limit=100) # Naive bad implementation but sufficient for MVP memory-db
-    action = next((a for a in actions if str(a['id']) == str(action_id)), None)
+    action = db_manager.get_action(action_id)
     
     if not action:
         return jsonify({'status': 'failed', 'message': 'Action ID not found'}), 404
@@ -314,6 +914,7 @@ def rollback_action(action_id):
 
 
 @app.route('/api/recommendations/pending')
+@http_cache.cached(lambda: db_manager.pool.versions('recommendations'))
 def get_pending_recommendations():
     """Get only pending recommendations."""
     recommendations = db_manager.get_pending_recommendations(limit=20)
@@ -323,17 +924,80 @@ def get_pending_recommendations():
 def apply_recommendation(rec_id):
     """Mark a recommendation as applied."""
     db_manager.update_recommendation_status(rec_id, 'applied')
+    event_bus.publish('recommendation', {'id': rec_id, 'status': 'applied'})
     return jsonify({'status': 'success', 'recommendation_id': rec_id})
 
 @app.route('/api/recommendations/<int:rec_id>/dismiss', methods=['POST'])
 def dismiss_recommendation(rec_id):
     """Dismiss a recommendation."""
     db_manager.update_recommendation_status(rec_id, 'dismissed')
+    event_bus.publish('recommendation', {'id': rec_id, 'status': 'dismissed'})
     return jsonify({'status': 'success', 'recommendation_id': rec_id})
 
+def _on_sigterm(signum, frame):
+    # Unblock the server loop in the main thread; SSE streams end right away
+    stopping.set()
+    event_bus.close()
+    raise KeyboardInterrupt
+
+def serve(host, port, threads):
+    """
+    Production server: waitress, multi-threaded. SIGTERM / Ctrl+C stop
+    accepting connections, give in-flight requests a few seconds, then run
+    shutdown_background().
+    """
+    signal.signal(signal.SIGTERM, _on_sigterm)
+    try:
+        from waitress import create_server
+    except ImportError:
+        create_server = None
+    try:
+        if create_server is not None:
+            server = create_server(app, host=host, port=port, threads=threads,
+                                   connection_limit=getattr(config, 'SERVER_CONNECTION_LIMIT', 200))
+            print(f"Serving on http://{host}:{port} ({threads} threads)")
+            server.run()
+        else:
+            logger.warning("waitress is not installed; serving with the Werkzeug threaded server")
+            from werkzeug.serving import make_server
+            make_server(host, port, app, threaded=True).serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_background()
+
+def run_worker():
+    """Background services only (role 'worker'), until SIGTERM / Ctrl+C."""
+    signal.signal(signal.SIGTERM, _on_sigterm)
+    try:
+        while not stopping.wait(1):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_background()
+
 if __name__ == '__main__':
-    # Initialize DB (creates file if missing)
-    db_manager.init_db()
+    import argparse
+    parser = argparse.ArgumentParser(description='Self-healing system monitor')
+    parser.add_argument('--host', default=getattr(config, 'SERVER_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=getattr(config, 'SERVER_PORT', 5000))
+    parser.add_argument('--threads', type=int, default=getattr(config, 'SERVER_THREADS', 32))
+    parser.add_argument('--role', choices=ROLES, default=getattr(config, 'SERVER_ROLE', 'all'))
+    parser.add_argument('--dev', action='store_true',
+                        help='Flask development server with debugger and reloader (default when ENVIRONMENT is "dev")')
+    args = parser.parse_args()
+
     print("Self-Healing IT System Started")
     print(f"Platform: {platform.system()}")
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    if args.dev or getattr(config, 'ENVIRONMENT', 'dev') == 'dev':
+        # The reloader re-runs this script in a child process; only the child serves
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            create_app(args.role)
+        app.run(host=args.host, port=args.port, debug=True)
+    else:
+        create_app(args.role)
+        if args.role == 'worker':
+            run_worker()
+        else:
+            serve(args.host, args.port, args.threads)
@@ -0,0 +1,119 @@
+"""
+Micro-benchmark: connection-per-call SQLite access (the original
+DatabaseManager behaviour) vs. the pooled ConnectionManager.
+
+Also checks that readers opened by short-lived threads (one thread per
+request, as the Flask dev server runs) are closed after their threads exit.
+
+Usage (from the repository root):
+    python benchmarks/bench_db.py [--inserts 2000] [--reads 2000] [--threads 200]
+Exits non-zero if reader connections accumulate.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # init_db reads schema.sql relative to cwd
+
+from core.logging_db import DatabaseManager
+from core.models import Event
+
+
+def make_event(i):
+    return Event(
+        timestamp=datetime.now().isoformat(),
+        type='cpu_high',
+        severity='warning',
+        description=f"CPU usage is at {80 + i % 20}% (Top: bench)",
+        metric_value=80 + i % 20,
+        threshold=80.0,
+    )
+
+
+def legacy_insert(db_path, event):
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+    cur.execute(
+        '''INSERT INTO events (timestamp, type, severity, description, metric_value, threshold)
+           VALUES (?, ?, ?, ?, ?, ?)''',
+        (event.timestamp, event.type, event.severity, event.description, event.metric_value, event.threshold)
+    )
+    conn.commit()
+    conn.close()
+
+
+def legacy_read(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute("SELECT key, value FROM settings").fetchall()
+    conn.close()
+    return {row['key']: row['value'] for row in rows}
+
+
+def timed(fn, n):
+    started = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return time.perf_counter() - started
+
+
+def open_fds():
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:  # not Linux
+        return None
+
+
+def thread_per_request(db, threads):
+    """Readers opened by `threads` sequential short-lived threads -> (readers left, fds before, fds after)."""
+    fds = open_fds()
+    for _ in range(threads):
+        t = threading.Thread(target=db.get_recent_events, args=(10,))
+        t.start()
+        t.join()
+    return db.pool.reader_count(), fds, open_fds()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--inserts', type=int, default=2000)
+    parser.add_argument('--reads', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, 'legacy.db')
+        pooled_path = os.path.join(tmp, 'pooled.db')
+        DatabaseManager(legacy_path).init_db()
+        db = DatabaseManager(pooled_path)
+        db.init_db()
+
+        results = [
+            ('insert (connect/commit/close)', args.inserts, timed(lambda i: legacy_insert(legacy_path, make_event(i)), args.inserts)),
+            ('insert (pooled writer)', args.inserts, timed(lambda i: db.log_event(make_event(i)), args.inserts)),
+            ('read settings (connect/close)', args.reads, timed(lambda i: legacy_read(legacy_path), args.reads)),
+            ('read settings (pooled reader)', args.reads, timed(lambda i: db.get_settings(), args.reads)),
+        ]
+        readers, fds_before, fds_after = thread_per_request(db, args.threads)
+        db.close()
+
+    print(f"{'case':<34}{'ops':>8}{'ops/s':>12}{'us/op':>10}")
+    for name, n, elapsed in results:
+        print(f"{name:<34}{n:>8}{n / elapsed:>12.0f}{elapsed / n * 1e6:>10.1f}")
+    # Main thread's reader plus at most the last (exited, not yet pruned) thread's
+    ok = readers <= 2
+    fd_note = f", open fds {fds_before} -> {fds_after}" if fds_before is not None else ''
+    print(f"{args.threads} short-lived reader threads: {readers} reader connections left{fd_note} "
+          f"{'ok' if ok else 'LEAK'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
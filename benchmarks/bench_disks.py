@@ -0,0 +1,165 @@
+"""
+Disk subsystem check on a tmpfs: reclaimable-space index (full vs incremental
+refresh vs a brute-force walk, totals checked against the walk), cleanup
+(bytes reported vs the filesystem's own free-space change), per-volume
+usage with a hung mount, and per-volume events.
+
+Usage (from the repository root):
+    python benchmarks/bench_disks.py [--mount /dev/shm] [--files 20000]
+`--mount` must be a tmpfs (freed space shows up immediately); a private one:
+    mount -t tmpfs -o size=256m tmpfs /mnt/bench
+Exits non-zero on any mismatch.
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import psutil
+
+from core.disks import ReclaimIndex, VolumeWatcher
+from core.rules import RuleEngine
+
+DAY = 86400
+PAGE = 4096
+
+
+def brute_force(paths, cutoff):
+    """What the index should contain: walk + lstat every file."""
+    total = reclaimable = files = 0
+    for path in paths:
+        for dirpath, _, names in os.walk(path):
+            for name in names:
+                st = os.lstat(os.path.join(dirpath, name))
+                files += 1
+                total += st.st_size
+                if st.st_mtime < cutoff:
+                    reclaimable += st.st_size
+    return files, total, reclaimable
+
+
+def make_tree(base, files, dirs, rng, now):
+    paths = []
+    for d in range(dirs):
+        path = os.path.join(base, f"d{d // 20}", f"d{d}")
+        os.makedirs(path, exist_ok=True)
+        paths.append(path)
+    for i in range(files):
+        name = os.path.join(paths[i % dirs], f"f{i}.tmp")
+        with open(name, 'wb') as f:
+            f.write(b'x' * rng.choice((100, 1000, 5000, 20000)))
+        age = rng.choice((0.1, 2, 10)) * DAY
+        os.utime(name, (now - age, now - age))
+    return paths
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mount', default='/dev/shm', help='a tmpfs mount point')
+    parser.add_argument('--files', type=int, default=20000)
+    parser.add_argument('--dirs', type=int, default=400)
+    args = parser.parse_args()
+
+    fstypes = {p.mountpoint: p.fstype for p in psutil.disk_partitions(all=True)}
+    if fstypes.get(args.mount) != 'tmpfs':
+        print(f"{args.mount} is not a tmpfs mount")
+        sys.exit(2)
+    base = tempfile.mkdtemp(prefix='bench_disks_', dir=args.mount)
+    rng = random.Random(5)
+    now = time.time()
+    ok = True
+    try:
+        temp = os.path.join(base, 'temp')
+        make_tree(temp, args.files, args.dirs, rng, now)
+        index = ReclaimIndex({'temp': [temp]}, min_age_hours=24)
+
+        full_ms, _ = timed(lambda: index.refresh(full=True))
+        incr_ms, scan = timed(index.refresh)
+        walk_ms, (files, total, reclaimable) = timed(lambda: brute_force([temp], now - DAY))
+        print(f"index {files} files / {args.dirs} dirs: full {full_ms:.0f} ms, unchanged incremental {incr_ms:.0f} ms "
+              f"({scan['dirs_listed']} listed, {scan['dirs_skipped']} skipped), walk+stat {walk_ms:.0f} ms")
+
+        # Touch a few directories: only those are listed again
+        changed = rng.sample(range(args.dirs), 5)
+        for d in changed:
+            path = os.path.join(temp, f"d{d // 20}", f"d{d}")
+            with open(os.path.join(path, 'new.tmp'), 'wb') as f:
+                f.write(b'y' * 3000)
+            old = os.path.join(path, 'old.tmp')
+            with open(old, 'wb') as f:
+                f.write(b'z' * 7000)
+            os.utime(old, (now - 5 * DAY, now - 5 * DAY))
+        os.remove(os.path.join(temp, 'd0', 'd0', 'f0.tmp'))
+        incr_ms, scan = timed(index.refresh)
+        summary = index.summary(now=now)['temp']
+        files, total, reclaimable = brute_force([temp], now - DAY)
+        match = (summary['files'], summary['bytes'], summary['reclaimable_bytes']) == (files, total, reclaimable)
+        ok &= match and scan['dirs_listed'] <= len(changed) + 1
+        print(f"after changing {len(changed) + 1} dirs: incremental {incr_ms:.0f} ms, {scan['dirs_listed']} listed; "
+              f"index totals {'match' if match else 'DIFFER from'} the walk "
+              f"({summary['files']} files, {summary['reclaimable_bytes'] / 1e6:.1f} MB reclaimable)")
+
+        # Cleanup: freed bytes vs the tmpfs's own accounting (pages)
+        device = index.device_of(args.mount)
+        dry = index.reclaim(device=device, dry_run=True, now=now)
+        pages = sum(-(-size // PAGE) * PAGE for _, size in index.candidates(device=device, now=now))
+        free_before = psutil.disk_usage(args.mount).free
+        reclaim_ms, result = timed(lambda: index.reclaim(device=device, now=now))
+        free_after = psutil.disk_usage(args.mount).free
+        delta = free_after - free_before
+        left = brute_force([temp], now - DAY)
+        match = (result['freed_bytes'] == reclaimable == dry['freed_bytes'] and left[2] == 0
+                 and left[0] == files - result['files_deleted'] and abs(delta - pages) <= 0.01 * pages)
+        ok &= match
+        print(f"reclaim: {result['files_deleted']} files, {result['freed_bytes'] / 1e6:.1f} MB reported "
+              f"(dry run {dry['freed_bytes'] / 1e6:.1f} MB), tmpfs free grew {delta / 1e6:.1f} MB "
+              f"({pages / 1e6:.1f} MB in pages) in {reclaim_ms:.0f} ms, no walk: {'ok' if match else 'MISMATCH'}")
+        summary = index.summary(now=now)['temp']
+        ok &= summary['reclaimable_bytes'] == 0 and summary['files'] == left[0]
+
+        # Volumes: the tmpfs plus a mount whose statvfs hangs
+        def usage(path):
+            if path == '/hung':
+                time.sleep(3)
+            return psutil.disk_usage(path if path != '/hung' else args.mount)
+
+        watcher = VolumeWatcher(mounts=[args.mount, '/hung'], timeout=0.5, usage=usage)
+        refresh_ms, volumes = timed(watcher.refresh)
+        by_name = {v['name']: v for v in volumes}
+        tmpfs = by_name.get(args.mount, {})
+        match = (tmpfs.get('responsive') and tmpfs.get('fstype') == 'tmpfs'
+                 and by_name.get('/hung', {}).get('responsive') is False and refresh_ms < 1500)
+        ok &= match
+        print(f"volumes: {args.mount} {tmpfs.get('percent')}% used, /hung "
+              f"{'unresponsive' if not by_name.get('/hung', {}).get('responsive') else 'answered'}; "
+              f"refresh {refresh_ms:.0f} ms with a 3 s hang: {'ok' if match else 'FAIL'}")
+        watcher.stop()
+
+        # Per-volume event (non-system volume over the disk threshold)
+        engine = RuleEngine()
+        firings = engine.evaluate({'cpu_percent': 1, 'memory_percent': 1, 'disk_percent': 1,
+                                   'volumes': [dict(tmpfs, system=False, percent=97.5)]})
+        names = [(f.rule.event_type, f.item_name) for f in firings]
+        match = names == [('volume_low', args.mount)]
+        ok &= match
+        print(f"events: {names} {'ok' if match else 'FAIL'}")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
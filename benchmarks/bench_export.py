@@ -0,0 +1,193 @@
+"""
+Streaming export check on a scratch database: row counts and content vs
+direct queries (full and filtered, NDJSON and gzip'd CSV), peak Python memory
+for a small vs a 4x larger export, dashboard read / writer latency while an
+export runs, and WAL growth under concurrent writes compared with holding
+one cursor open for the whole export.
+
+Usage (from the repository root):
+    python benchmarks/bench_export.py [--rows 200000]
+Exits non-zero on a count/content mismatch, if memory grows with the export
+size, or if the WAL grows past twice the auto-checkpoint size.
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from core import export
+from core.logging_db import DatabaseManager
+from core.models import Event
+
+START = 1_750_000_000
+TYPES = ('cpu_high', 'memory_high', 'disk_low', 'service_down')
+WAL_AUTOCHECKPOINT_BYTES = 1000 * 4096
+
+
+def populate(db, rows):
+    description = 'x' * 120
+    output = 'Terminated process; ' + 'y' * 200
+    with db.pool.writer() as conn:
+        for base in range(0, rows, 10000):
+            ids = range(base + 1, min(rows, base + 10000) + 1)
+            stamps = [(i, START + i * 10, datetime.fromtimestamp(START + i * 10).isoformat()) for i in ids]
+            conn.executemany(
+                "INSERT INTO events (id, timestamp, ts, type, severity, description, metric_value, threshold) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(i, iso, ts, TYPES[i % 4], 'critical' if i % 3 == 0 else 'warning', description, 91.5, 80.0)
+                 for i, ts, iso in stamps])
+            conn.executemany(
+                "INSERT INTO actions (id, event_id, timestamp, ts, type, status, output, duration_ms, target_process) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(i, i, iso, ts, 'action_' + TYPES[i % 4], 'success' if i % 5 else 'failed', output, 120, f"proc{i % 50}")
+                 for i, ts, iso in stamps])
+            conn.executemany(
+                "INSERT INTO audit_log (id, timestamp, ts, action_id, affected_resources, status) VALUES (?, ?, ?, ?, ?, ?)",
+                [(i, iso, ts, i, TYPES[i % 4], 'success' if i % 5 else 'failed') for i, ts, iso in stamps])
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] * 1000
+
+
+def drain(chunks):
+    total = 0
+    for chunk in chunks:
+        total += len(chunk)
+    return total
+
+
+def check_content(db, rows, ok):
+    conn = db.pool.reader()
+    # Full NDJSON export of the audit join
+    body = b''.join(export.export(conn, 'audit'))
+    lines = body.splitlines()
+    first, last = json.loads(lines[0]), json.loads(lines[-1])
+    match = (len(lines) == rows and first['id'] == 1 and last['id'] == rows
+             and last['event_type'] == TYPES[rows % 4] and last['action_type'] == 'action_' + TYPES[rows % 4]
+             and last['target_process'] == f"proc{rows % 50}")
+    print(f"audit ndjson: {len(lines)} rows, {len(body) / 1e6:.1f} MB, joined fields {'ok' if match else 'MISMATCH'}")
+    ok &= match
+
+    # Filtered, time-bounded, gzip'd CSV
+    since, until = START + rows * 10 // 4, START + rows * 10 * 3 // 4
+    filters = {'type': ['action_cpu_high', 'action_disk_low'], 'status': ['failed']}
+    body = gzip.decompress(b''.join(export.export(conn, 'audit', 'csv', True, since, until, filters, page_size=500)))
+    records = list(csv.reader(io.StringIO(body.decode('utf-8'))))
+    expected = conn.execute(
+        "SELECT COUNT(*) FROM audit_log t JOIN actions a ON a.id = t.action_id WHERE t.ts >= ? AND t.ts < ? "
+        "AND a.type IN ('action_cpu_high', 'action_disk_low') AND t.status = 'failed'", (since, until)).fetchone()[0]
+    ids = [int(r[0]) for r in records[1:]]
+    match = (records[0][0] == 'id' and len(ids) == expected and ids == sorted(ids)
+             and all(since <= START + i * 10 < until for i in ids))
+    print(f"audit csv.gz, type+status+time filter: {len(ids)} rows (expected {expected}) {'ok' if match else 'MISMATCH'}")
+    return ok and match
+
+
+def check_memory(db, rows, ok):
+    peaks = []
+    for limit in (rows // 4, rows):
+        tracemalloc.start()
+        conn = db.pool.reader()
+        size = drain(export.export(conn, 'audit', 'csv', True, until=START + limit * 10 + 1))
+        peaks.append((limit, size, tracemalloc.get_traced_memory()[1]))
+        tracemalloc.stop()
+    (small, small_size, small_peak), (large, large_size, large_peak) = peaks
+    match = large_peak < small_peak * 1.5
+    print(f"peak memory: {small} rows {small_peak / 1e6:.2f} MB, {large} rows {large_peak / 1e6:.2f} MB "
+          f"({large_size / 1e6:.1f} MB gzip'd) {'constant' if match else 'GROWS'}")
+    return ok and match
+
+
+def concurrent(db_path, rows, mode):
+    """Export in a thread while a 'dashboard' reads and a writer inserts; latencies + max WAL size."""
+    db = DatabaseManager(db_path)
+    done = threading.Event()
+    wal = db_path + '-wal'
+    exported = {}
+
+    def run_export():
+        conn = db.pool.reader()
+        started = time.perf_counter()
+        if mode == 'keyset':
+            size = drain(export.export(conn, 'audit', 'csv', True))
+        elif mode == 'cursor':
+            # One statement held open for the whole export
+            encoder = io.StringIO()
+            writer = csv.writer(encoder)
+            size = 0
+            for row in conn.execute("SELECT t.*, a.*, e.* FROM audit_log t LEFT JOIN actions a ON a.id = t.action_id "
+                                    "LEFT JOIN events e ON e.id = a.event_id ORDER BY t.id"):
+                writer.writerow(tuple(row))
+                if encoder.tell() > 65536:
+                    size += len(gzip.compress(encoder.getvalue().encode()))
+                    encoder.seek(0)
+                    encoder.truncate()
+        else:
+            time.sleep(2)
+            size = 0
+        exported.update(seconds=time.perf_counter() - started, size=size)
+        done.set()
+
+    reads, writes, wal_max = [], [], 0
+    thread = threading.Thread(target=run_export)
+    thread.start()
+    description = 'w' * 1000
+    while not done.is_set():
+        started = time.perf_counter()
+        db.get_recent_events(limit=100)
+        db.get_recent_actions(limit=50)
+        reads.append(time.perf_counter() - started)
+        for _ in range(20):
+            started = time.perf_counter()
+            db.log_event(Event(timestamp=datetime.now().isoformat(), type='cpu_high', severity='warning',
+                               description=description, metric_value=1.0, threshold=1.0))
+            writes.append(time.perf_counter() - started)
+        wal_max = max(wal_max, os.path.getsize(wal) if os.path.exists(wal) else 0)
+        time.sleep(0.005)
+    thread.join()
+    db.close()
+    return exported, reads, writes, wal_max
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200000, help='rows per table')
+    args = parser.parse_args()
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'export.db')
+        db = DatabaseManager(path)
+        db.init_db()
+        started = time.perf_counter()
+        populate(db, args.rows)
+        print(f"populated {args.rows} events/actions/audit rows in {time.perf_counter() - started:.1f}s")
+        ok = check_content(db, args.rows, ok)
+        ok = check_memory(db, args.rows, ok)
+        db.close()
+
+        for mode in ('idle', 'keyset', 'cursor'):
+            exported, reads, writes, wal_max = concurrent(path, args.rows, mode)
+            rate = f"{args.rows / exported['seconds']:,.0f} rows/s, " if exported['size'] else ''
+            print(f"{mode:<7} {rate}dashboard reads p50 {percentile(reads, 50):.1f} ms p99 {percentile(reads, 99):.1f} ms, "
+                  f"writes p99 {percentile(writes, 99):.1f} ms ({len(writes)}), max WAL {wal_max / 1e6:.1f} MB")
+            if mode == 'keyset':
+                ok &= wal_max <= 2 * WAL_AUTOCHECKPOINT_BYTES
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
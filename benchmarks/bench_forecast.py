@@ -0,0 +1,116 @@
+"""
+Exhaustion forecast check: ETA accuracy on synthetic disk / memory growth,
+false positives on flat noisy series, and per-sample update cost vs refitting
+a least-squares line over the full window on every request.
+
+Usage (from the repository root):
+    python benchmarks/bench_forecast.py [--samples 17280]
+Exits non-zero if an ETA is off by more than 15%, or a flat series or a
+recent one-off step (e.g. a large download) is flagged.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from core.forecast import ExhaustionForecaster
+from core.timeseries import TimeSeriesStore
+
+CONFIG = {'disk_threshold': 90.0, 'memory_threshold': 85.0}
+START = 1_700_000_000.0
+
+
+def run(samples, disk, memory):
+    forecaster = ExhaustionForecaster()
+    for i in range(samples):
+        ts = START + i * 5
+        forecaster.observe(ts, {'disk_percent': disk(i * 5), 'memory_percent': memory(i * 5)})
+    end = START + (samples - 1) * 5
+    return {r['series']: r for r in forecaster.forecast(CONFIG, end)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--samples', type=int, default=17280, help='24h at 5s by default')
+    args = parser.parse_args()
+    random.seed(11)
+    ok = True
+
+    # (label, series, rate %/h, noise, start value)
+    cases = [
+        ('disk 0.5%/h', 'disk_percent', 0.5, 0.05, 60.0),
+        ('disk 2%/h after flat', 'disk_percent', 2.0, 0.05, 60.0),
+        ('memory 1%/h', 'memory_percent', 1.0, 3.0, 50.0),
+        ('memory 5%/h (leak)', 'memory_percent', 5.0, 3.0, 20.0),
+    ]
+    for label, series, rate, noise, base in cases:
+        if label.endswith('after flat'):
+            # Flat for 20h, then growing: the half-life has to forget the flat part
+            knee = 20 * 3600
+            value = lambda t: base + max(0.0, t - knee) / 3600 * rate + random.gauss(0, noise)
+            samples = 24 * 720
+        else:
+            value = lambda t: base + t / 3600 * rate + random.gauss(0, noise)
+            samples = 4 * 720
+        flat = lambda t: 30.0 + random.gauss(0, 0.5)
+        result = run(samples, value if series == 'disk_percent' else flat,
+                     value if series == 'memory_percent' else flat)[series]
+        elapsed = (samples - 1) * 5
+        true_level = base + (max(0.0, elapsed - 20 * 3600) if label.endswith('after flat') else elapsed) / 3600 * rate
+        true_eta = (CONFIG[series.replace('_percent', '_threshold')] - true_level) / rate * 3600
+        eta = result['eta_seconds']
+        error = abs(eta - true_eta) / true_eta if eta else float('inf')
+        passed = result['confident'] and error <= 0.15
+        ok &= passed
+        print(f"{label:<22} rate {result['rate_per_hour']:6.2f}%/h  eta {eta / 3600 if eta else 0:6.1f}h "
+              f"(true {true_eta / 3600:5.1f}h, {error:5.1%})  {'ok' if passed else 'FAIL'}")
+
+    flagged = 0
+    runs = 40
+    for _ in range(runs):
+        results = run(720 * 2, lambda t: 70.0 + random.gauss(0, 0.1), lambda t: 60.0 + random.gauss(0, 4.0))
+        flagged += sum(1 for r in results.values() if r['confident'] and r['eta_seconds'])
+    ok &= flagged == 0
+    print(f"flat series flagged: {flagged}/{runs * 2}  {'ok' if flagged == 0 else 'FAIL'}")
+
+    # Disk jumps 3% and stays there; readings rounded to 0.1 like psutil's
+    end = 12 * 3600
+    for ago in (60, 600, 1800, 3600):
+        result = run(720 * 12, lambda t: round(70.0 + random.gauss(0, 0.02) + (3 if t > end - ago else 0), 1),
+                     lambda t: 50.0)['disk_percent']
+        flagged = result['confident'] and result['eta_seconds']
+        ok &= not flagged
+        print(f"3% step {ago:>4}s ago: {'FAIL (eta %.1fh)' % (flagged / 3600) if flagged else 'ok'}")
+
+    # Per-sample update vs refitting over the window (TimeSeriesStore 'rate') on each request
+    forecaster = ExhaustionForecaster()
+    store = TimeSeriesStore(capacity=args.samples)
+    rows = [{'disk_percent': 50 + i * 0.001, 'memory_percent': 40.0} for i in range(args.samples)]
+    started = time.perf_counter()
+    for i, row in enumerate(rows):
+        forecaster.observe(START + i * 5, row)
+    per_sample = (time.perf_counter() - started) / args.samples
+    for i, row in enumerate(rows):
+        store.append(START + i * 5, row, i + 1)
+    started = time.perf_counter()
+    for _ in range(20):
+        forecaster.forecast(CONFIG, START + args.samples * 5)
+    forecast_cost = (time.perf_counter() - started) / 20
+    started = time.perf_counter()
+    for _ in range(20):
+        store.aggregate('disk_percent', 'rate', START)
+        store.aggregate('memory_percent', 'rate', START)
+    refit_cost = (time.perf_counter() - started) / 20
+    print(f"update {per_sample * 1e6:.1f} us/sample, forecast {forecast_cost * 1e6:.1f} us, "
+          f"refit over {args.samples} samples {refit_cost * 1e3:.2f} ms")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Metrics ring benchmark: append cost vs a committed SQLite insert, short-range
+history reads from the ring-loaded store vs SQLite, and a locked-database run in which
+another connection holds an exclusive lock while samples keep arriving.
+
+Usage (from the repository root):
+    python benchmarks/bench_ring.py [--samples 17280]
+Exits non-zero if the locked-database run loses samples.
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from core.history import HistoryService
+from core.logging_db import DatabaseManager
+from core.metrics_ring import MetricsRing, RingDrainer
+from core.timeseries import TimeSeriesStore
+
+
+def timed(fn, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--samples', type=int, default=17280, help='samples to append (24h at 5s by default)')
+    parser.add_argument('--lock-seconds', type=float, default=7.0, help='longer than busy_timeout (5s)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_ring_')
+    db = DatabaseManager(os.path.join(workdir, 'bench.db'))
+    db.init_db()
+    ring = MetricsRing(os.path.join(workdir, 'ring.bin'), capacity=args.samples)
+    drainer = RingDrainer(ring, db, interval=0.2)
+
+    now = time.time()
+    start = now - args.samples * 5
+    elapsed, _ = timed(lambda: [ring.append(start + i * 5, i % 100, 50.0, 70.0) for i in range(args.samples)])
+    print(f"ring append:        {elapsed / args.samples * 1e6:8.2f} us/sample")
+
+    n = 500
+    elapsed, _ = timed(lambda: [db.log_metrics(1.0, 2.0, 3.0) for _ in range(n)])
+    print(f"sqlite log_metrics: {elapsed / n * 1e6:8.2f} us/sample (one transaction each)")
+    with db.pool.writer() as conn:
+        conn.execute("DELETE FROM metrics_history")
+
+    elapsed, copied = timed(drainer.drain)
+    print(f"drain {copied} rows:  {elapsed * 1000:8.1f} ms")
+
+    history_db = HistoryService(db)
+    store = TimeSeriesStore(capacity=args.samples)
+    store.load(ring.latest(args.samples))  # as api_app does at startup
+    history_ring = HistoryService(db, store=store)
+    for label, span in (('1h', 3600), ('6h', 6 * 3600)):
+        db_time, db_result = timed(lambda: history_db.query(since=now - span, until=now), repeat=20)
+        ring_time, ring_result = timed(lambda: history_ring.query(since=now - span, until=now), repeat=20)
+        # LTTB may pick different points: the store keeps sub-second timestamps
+        db_points, ring_points = db_result['points'], ring_result['points']
+        same = (len(db_points) == len(ring_points) and db_points[0] == ring_points[0]
+                and db_points[-1] == ring_points[-1])
+        print(f"history {label}:  sqlite {db_time * 1000:6.2f} ms  store {ring_time * 1000:6.2f} ms  "
+              f"same span/points={same}")
+    db_time, _ = timed(lambda: history_db.query(since_id=args.samples - 10), repeat=200)
+    ring_time, _ = timed(lambda: history_ring.query(since_id=args.samples - 10), repeat=200)
+    print(f"history since_id: sqlite {db_time * 1e6:6.1f} us  store {ring_time * 1e6:6.1f} us")
+
+    # Locked database: samples keep arriving, the drainer defers and catches up
+    drainer.start()
+    blocker = sqlite3.connect(db.db_path, timeout=0, isolation_level=None)
+    blocker.execute("PRAGMA busy_timeout=0")
+    blocker.execute("BEGIN EXCLUSIVE")
+    locked_from = time.time()
+    appended = 0
+    while time.time() - locked_from < args.lock_seconds:
+        ring.append(time.time(), 42.0, 50.0, 70.0)
+        appended += 1
+        time.sleep(0.01)
+    blocker.execute("COMMIT")
+    blocker.close()
+    time.sleep(1.0)
+    drainer.stop()
+
+    total = db.pool.reader().execute("SELECT COUNT(*) FROM metrics_history").fetchone()[0]
+    ok = total == args.samples + appended and drainer.overwritten == 0
+    print(f"locked {args.lock_seconds:g}s: {appended} samples appended meanwhile, "
+          f"{drainer.failures} deferred drains, {total} rows in SQLite "
+          f"({'ok' if ok else 'MISSING'})")
+
+    ring.close()
+    db.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
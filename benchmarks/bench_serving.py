@@ -0,0 +1,186 @@
+"""
+Serving check: `python api_app.py` (waitress) vs `python api_app.py --dev`
+(Flask debug server with reloader), each started as a real process against a
+scratch database. Dashboard clients (benchmarks/load_dashboard.py tabs) load
+the page and its JSON while further clients hold the /api/stream event stream
+open, as open dashboards do; reports requests/s and p50/p99 latency.
+
+Then the lifecycle of the production server: a second instance on the same
+database must come up without background services (leader False), take them
+over once the first gets SIGTERM, and each SIGTERM must end the process
+cleanly (exit code 0) within a few seconds even with streams open.
+
+Usage (from the repository root):
+    python benchmarks/bench_serving.py [--clients 16] [--streams 8] [--seconds 10]
+Exits non-zero if any request fails, the dev server scheduled its jobs twice,
+leader election / takeover doesn't happen, or a shutdown isn't clean.
+"""
+import argparse
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+os.chdir(ROOT)
+
+import requests
+
+from load_dashboard import Tab, free_port, populate
+
+SHUTDOWN_SECONDS = 15
+
+
+def start(workdir, *args):
+    """api_app.py in its own process group (the dev reloader forks a child)."""
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, os.path.join(workdir, 'api_app.py'), '--host', '127.0.0.1',
+                             '--port', str(port), *args],
+                            cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        try:
+            requests.get(base + '/api/scheduler', timeout=1).raise_for_status()
+            return proc, base
+        except requests.RequestException:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.1)
+    os.killpg(proc.pid, signal.SIGKILL)
+    raise RuntimeError(f"server {' '.join(args)} did not start")
+
+
+def stop(proc):
+    """SIGTERM the process group; (exit code, seconds until exit)."""
+    started = time.perf_counter()
+    os.killpg(proc.pid, signal.SIGTERM)
+    try:
+        code = proc.wait(timeout=SHUTDOWN_SECONDS)
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+        code = proc.wait()
+    return code, time.perf_counter() - started
+
+
+def hold_streams(base, count, stop_event):
+    """Open SSE clients reading until stop_event (or the server closes them)."""
+    def read():
+        try:
+            with requests.get(base + '/api/stream', stream=True, timeout=(2, 30)) as r:
+                for _ in r.iter_content(None):
+                    if stop_event.is_set():
+                        return
+        except requests.RequestException:
+            pass
+
+    threads = [threading.Thread(target=read, daemon=True) for _ in range(count)]
+    for t in threads:
+        t.start()
+    return threads
+
+
+def load(base, clients, seconds):
+    tabs = [Tab(base, revisit=True) for _ in range(clients)]
+    latencies = [[] for _ in range(clients)]
+    errors = [0] * clients
+    deadline = time.time() + seconds
+
+    def loop(i):
+        while time.time() < deadline:
+            started = time.perf_counter()
+            try:
+                tabs[i].open()
+            except requests.RequestException:
+                errors[i] += 1
+            latencies[i].append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=loop, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    ordered = sorted(x for per in latencies for x in per)
+    return {
+        'rps': sum(t.requests for t in tabs) / elapsed,
+        'p50': ordered[len(ordered) // 2] * 1000 if ordered else 0,
+        'p99': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000 if ordered else 0,
+        'failures': sum(t.failures for t in tabs) + sum(errors),
+    }
+
+
+def jobs(base):
+    return requests.get(base + '/api/scheduler', timeout=5).json()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--streams', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--events', type=int, default=2000)
+    args = parser.parse_args()
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = os.path.join(tmp, 'app')
+        shutil.copytree(ROOT, workdir, ignore=shutil.ignore_patterns('*.db*', '*.log', '.git', '__pycache__'))
+        populate(os.path.join(workdir, 'system_monitor.db'), args.events)
+
+        for name, extra in (('waitress', ()), ('dev server', ('--dev',))):
+            proc, base = start(workdir, *extra)
+            done = threading.Event()
+            try:
+                hold_streams(base, args.streams, done)
+                load(base, args.clients, 1)  # warm-up
+                result = load(base, args.clients, args.seconds)
+                info = jobs(base)['server']
+            finally:
+                done.set()
+                code, seconds = stop(proc)
+            print(f"{name:<10}: {result['rps']:6.0f} req/s, page load p50 {result['p50']:6.1f} ms "
+                  f"p99 {result['p99']:7.1f} ms, {result['failures']} failures "
+                  f"({args.clients} clients, {args.streams} open streams); stopped in {seconds:.1f}s, exit {code}")
+            ok &= result['failures'] == 0 and info['leader'] and info['background']
+
+        # Leader election and takeover between two production instances
+        first, first_base = start(workdir)
+        second, second_base = start(workdir)
+        done = threading.Event()
+        try:
+            hold_streams(first_base, args.streams, done)
+            a, b = jobs(first_base)['server'], jobs(second_base)['server']
+            elected = a['leader'] and a['background'] and not b['leader'] and not b['background']
+            print(f"two instances: first leader={a['leader']}, second leader={b['leader']} "
+                  f"{'ok' if elected else 'BOTH OR NEITHER RUN THE JOBS'}")
+            time.sleep(1)
+            code, seconds = stop(first)
+            clean = code == 0 and seconds < SHUTDOWN_SECONDS
+            print(f"SIGTERM with {args.streams} open streams: exit {code} in {seconds:.1f}s {'ok' if clean else 'NOT CLEAN'}")
+            took_over = False
+            deadline = time.time() + 15
+            while time.time() < deadline and not took_over:
+                b = jobs(second_base)['server']
+                took_over = b['leader'] and b['background']
+                time.sleep(0.5)
+            print(f"second instance took over the background services: {'ok' if took_over else 'NO'}")
+        finally:
+            done.set()
+            if first.poll() is None:
+                stop(first)
+            code, seconds = stop(second)
+        clean &= code == 0
+        print(f"second instance stopped: exit {code} in {seconds:.1f}s")
+        ok &= elected and clean and took_over
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
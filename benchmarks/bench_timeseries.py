@@ -0,0 +1,103 @@
+"""
+Time-series store benchmark: chart queries and aggregates from the in-memory
+columns vs the SQLite path (rows -> dicts -> LTTB / Python aggregation).
+
+Usage (from the repository root):
+    python benchmarks/bench_timeseries.py [--samples 17280]
+NumPy is used for aggregates when installed; the pure-Python path otherwise.
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from core import timeseries
+from core.history import HistoryService
+from core.logging_db import DatabaseManager
+from core.retention import percentile
+from core.timeseries import TimeSeriesStore
+
+
+def timed(fn, repeat=20):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--samples', type=int, default=17280, help='24h at 5s by default')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_ts_')
+    db = DatabaseManager(os.path.join(workdir, 'bench.db'))
+    db.init_db()
+    store = TimeSeriesStore(capacity=args.samples)
+
+    random.seed(7)
+    now = time.time()
+    start = now - args.samples * 5
+    rows = []
+    for i in range(args.samples):
+        ts = start + i * 5
+        values = {'cpu_percent': random.uniform(5, 95), 'memory_percent': 60 + random.uniform(-5, 5),
+                  'disk_percent': 70 + i * 0.0001}
+        store.append(ts, values, i + 1)
+        rows.append(dict(values, id=i + 1, timestamp=datetime.fromtimestamp(ts).isoformat(), ts=int(ts)))
+    with db.pool.writer() as conn:
+        db._insert_metrics_records(conn, rows)
+
+    sqlite_history = HistoryService(db)
+    store_history = HistoryService(db, store=store)
+    print(f"numpy: {timeseries.np is not None}")
+    for label, span in (('15m', 900), ('1h', 3600), ('6h', 6 * 3600)):
+        db_ms, _ = timed(lambda: sqlite_history.query(since=now - span, until=now))
+        store_ms, _ = timed(lambda: store_history.query(since=now - span, until=now))
+        print(f"/api/history {label:>3}: sqlite {db_ms:7.2f} ms   store {store_ms:7.2f} ms   x{db_ms / store_ms:5.1f}")
+
+    db_ms, _ = timed(lambda: sqlite_history.query(max_points=300))
+    store_ms, _ = timed(lambda: store_history.query(max_points=300))
+    print(f"/api/history latest 300: sqlite {db_ms:6.2f} ms   store {store_ms:6.2f} ms")
+
+    # 30-minute CPU mean + p95 + disk trend (the /api/recommendations insights)
+    since = now - 1800
+
+    def sqlite_trends():
+        window = db.get_metrics_range(since, now)
+        cpu = [r['cpu_percent'] for r in window]
+        return sum(cpu) / len(cpu), percentile(cpu, 95)
+
+    def store_trends():
+        return (store.aggregate('cpu_percent', 'mean', since), store.aggregate('cpu_percent', 'p95', since),
+                store.aggregate('disk_percent', 'rate', since))
+
+    db_ms, (mean_db, p95_db) = timed(sqlite_trends)
+    store_ms, (mean_store, p95_store, rate) = timed(store_trends)
+    assert abs(mean_db - mean_store) < 1e-9 and p95_db == p95_store
+    print(f"30m trends: sqlite {db_ms:6.2f} ms (mean+p95)   store {store_ms:6.2f} ms (mean+p95+rate)")
+
+    store_ms, _ = timed(lambda: store.aggregate('cpu_percent', 'p95', now - 24 * 3600))
+    print(f"24h p95 over {len(store)} samples: store {store_ms:6.2f} ms")
+
+    n = 100000
+    bulk = TimeSeriesStore(capacity=args.samples)
+    started = time.perf_counter()
+    for i in range(n):
+        bulk.append(i, {'cpu_percent': 1.0, 'memory_percent': 2.0, 'disk_percent': 3.0}, i)
+    print(f"append: {(time.perf_counter() - started) / n * 1e6:.2f} us/sample (bounded at {args.samples})")
+
+    db.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
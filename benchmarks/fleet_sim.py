@@ -0,0 +1,161 @@
+"""
+Fleet simulation on one box: N AgentShippers (threads) ship synthetic
+metrics/events/actions to an in-process collector that uses the same
+decode_batch + FleetService + write-behind path as /api/ingest.
+
+Midway the collector is stopped, so agents spool to disk and back off;
+after it restarts, every row must arrive exactly once.
+
+Usage (from the repository root):
+    python benchmarks/fleet_sim.py [--agents 200] [--rows 300] [--outage 3]
+Exits non-zero if any row is missing.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
+
+from core.agent import AgentShipper
+from core.fleet import FleetService, IngestError, decode_batch
+from core.logging_db import DatabaseManager
+from core.write_queue import WriteBehindQueue, WriteQueueFull
+
+
+def collector_app(fleet: FleetService) -> Flask:
+    # Same handling as api_app.api_ingest, without the rest of the app
+    app = Flask('collector')
+
+    @app.route('/api/ingest', methods=['POST'])
+    def ingest():
+        try:
+            batch = decode_batch(request.get_data(cache=False), request.headers.get('Content-Encoding'))
+            fleet.ingest(batch)
+        except IngestError as e:
+            return jsonify({'error': str(e), 'invalid': e.invalid}), 400
+        except WriteQueueFull:
+            return jsonify({'error': 'Collector busy'}), 503, {'Retry-After': '1'}
+        return jsonify({'status': 'accepted'}), 202
+
+    return app
+
+
+class Collector:
+    def __init__(self, app: Flask, port: int):
+        self.app = app
+        self.port = port
+        self.server = None
+
+    def start(self):
+        self.server = make_server('127.0.0.1', self.port, self.app, threaded=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def run_agent(shipper: AgentShipper, index: int, rows: int, start: float, events_every: int):
+    for i in range(rows):
+        timestamp = datetime.fromtimestamp(start + i * 5).isoformat()
+        shipper.submit('metrics', {'timestamp': timestamp, 'cpu_percent': (index + i) % 100,
+                                   'memory_percent': 50.0, 'disk_percent': 70.0, 'id': i + 1})
+        if i % events_every == 0:
+            shipper.submit('event', {'id': i + 1, 'timestamp': timestamp, 'type': 'cpu_high', 'severity': 'warning',
+                                     'description': 'sim', 'metric_value': 95.0, 'threshold': 90.0})
+            shipper.submit('action', {'id': i + 1, 'event_id': i + 1, 'timestamp': timestamp,
+                                      'type': 'action_kill_high_cpu_process', 'status': 'success',
+                                      'output': 'sim', 'duration_ms': 12})
+        time.sleep(0.001)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--agents', type=int, default=200)
+    parser.add_argument('--rows', type=int, default=300, help='metric rows per agent')
+    parser.add_argument('--events-every', type=int, default=10)
+    parser.add_argument('--outage', type=float, default=3.0, help='seconds the collector is down')
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='fleet_sim_')
+    db = DatabaseManager(os.path.join(workdir, 'collector.db'))
+    db.init_db()
+    write_queue = WriteBehindQueue(db, maxsize=50000)
+    write_queue.start()
+    fleet = FleetService(db, write_queue)
+    collector = Collector(collector_app(fleet), args.port)
+    collector.start()
+
+    url = f'http://127.0.0.1:{args.port}'
+    shippers = [
+        AgentShipper(url, host=f'host-{i:04d}', batch_size=200, flush_interval=0.5, max_backoff=2,
+                     spool_dir=os.path.join(workdir, 'spool', str(i)), timeout=5)
+        for i in range(args.agents)
+    ]
+    for shipper in shippers:
+        shipper.start()
+
+    start = time.time() - args.rows * 5
+    started = time.perf_counter()
+    producers = [threading.Thread(target=run_agent, args=(s, i, args.rows, start, args.events_every))
+                 for i, s in enumerate(shippers)]
+    for thread in producers:
+        thread.start()
+
+    time.sleep(0.5)
+    collector.stop()
+    print(f"collector down for {args.outage:g}s")
+    time.sleep(args.outage)
+    spooled_batches = sum(s.spool_size() for s in shippers)
+    collector.start()
+    print(f"collector back; {spooled_batches} batches were spooled")
+
+    for thread in producers:
+        thread.join()
+    for shipper in shippers:
+        shipper.stop()
+    # Spooled batches of agents still backing off when stop() ran were resent there
+    write_queue.flush()
+    elapsed = time.perf_counter() - started
+    collector.stop()
+
+    per_agent_events = len(range(0, args.rows, args.events_every))
+    expected = {
+        'fleet_metrics': args.agents * args.rows,
+        'fleet_events': args.agents * per_agent_events,
+        'fleet_actions': args.agents * per_agent_events,
+        'hosts': args.agents,
+    }
+    conn = db.get_connection()
+    ok = True
+    for table, want in expected.items():
+        got = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        ok &= got == want
+        print(f"{table:14s} {got:>9d} / {want:<9d} {'ok' if got == want else 'MISSING'}")
+    conn.close()
+
+    total = sum(expected.values()) - args.agents
+    print(f"{total} rows from {args.agents} agents in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s incl. outage); "
+          f"{sum(s.sent for s in shippers)} batches, {fleet.batches} accepted, "
+          f"{write_queue.batches_written} writer transactions, "
+          f"{sum(s.dropped for s in shippers)} dropped")
+
+    write_queue.close()
+    db.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
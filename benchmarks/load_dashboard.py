@@ -0,0 +1,203 @@
+"""
+Dashboard load test: the app runs in a subprocess (threaded Werkzeug server,
+as `python api_app.py` serves it) against a scratch database, first with the
+HTTP layer off and then on (config.HTTP_CACHE_ENABLED). Client threads behave
+like browser tabs being opened over and over: each "tab" fetches the page,
+its CSS/JS and the settings, whitelist, events, actions and pending
+recommendations JSON. "revisit" clients behave like a browser with a warm
+cache (If-None-Match, immutable assets not re-requested); "cold" clients
+re-download everything (a new browser profile or a script), still sending
+Accept-Encoding.
+
+Usage (from the repository root):
+    python benchmarks/load_dashboard.py [--clients 8] [--seconds 10] [--events 2000]
+Prints requests/s, tabs/s and bytes per tab for each client kind, layer off
+and on; exits non-zero if the layer doesn't speed up either kind or any
+request fails.
+"""
+import argparse
+import gzip
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import requests
+
+from core.logging_db import DatabaseManager
+
+API = ('/api/settings', '/api/settings/whitelist', '/api/events', '/api/actions', '/api/recommendations/pending')
+
+SERVER = """
+import os, sys
+sys.path.insert(0, {root!r})
+import config
+config.HTTP_CACHE_ENABLED = {enabled!r}
+import api_app
+from werkzeug.serving import make_server
+import logging
+logging.getLogger('werkzeug').setLevel(logging.ERROR)
+make_server('127.0.0.1', {port}, api_app.create_app(), threaded=True).serve_forever()
+"""
+
+
+def populate(path, events):
+    db = DatabaseManager(path)
+    db.init_db()
+    now = time.time()
+    with db.pool.writer() as conn:
+        for i in range(events):
+            ts = now - (events - i) * 30
+            iso = datetime.fromtimestamp(ts).isoformat()
+            event_id = conn.execute(
+                "INSERT INTO events (timestamp, ts, type, severity, description, metric_value, threshold) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (iso, int(ts), 'cpu_high', 'warning', f'CPU usage at 9{i % 10}% (threshold 80%)', 90 + i % 10, 80)).lastrowid
+            if i % 2 == 0:
+                conn.execute(
+                    "INSERT INTO actions (event_id, timestamp, ts, type, status, output, duration_ms, target_process) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (event_id, iso, int(ts), 'action_throttle_process', 'success', 'Lowered priority of chrome (pid 4242)', 35, 'chrome'))
+            if i % 20 == 0:
+                conn.execute(
+                    "INSERT INTO recommendations (timestamp, ts, event_id, category, recommendation_text, action_type) VALUES (?, ?, ?, ?, ?, ?)",
+                    (iso, int(ts), event_id, 'cpu_high', 'Close chrome to free CPU', 'close_app'))
+    db.close()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(workdir, enabled):
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, '-c', SERVER.format(root=ROOT, enabled=enabled, port=port)],
+                            cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(200):
+        try:
+            requests.get(base + '/api/settings', timeout=1)
+            return proc, base
+        except requests.RequestException:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+class Tab:
+    """Browser-like client: conditional requests and an HTTP cache for immutable assets."""
+
+    def __init__(self, base, revisit=True):
+        self.base = base
+        self.revisit = revisit
+        self.session = requests.Session()
+        self.session.headers['Accept-Encoding'] = 'gzip, br'
+        self.etags = {}
+        self.fresh = {}
+        self.assets = []
+        self.requests = self.bytes = self.failures = self.not_modified = 0
+
+    def get(self, path):
+        if self.fresh.get(path, 0) > time.time():
+            return None
+        headers = {'If-None-Match': self.etags[path]} if path in self.etags and self.revisit else {}
+        r = self.session.get(self.base + path, headers=headers, stream=True)
+        raw = r.raw.read()  # bytes on the wire (before decompression)
+        self.requests += 1
+        self.bytes += len(raw)
+        if r.status_code == 304:
+            self.not_modified += 1
+        elif r.status_code != 200:
+            self.failures += 1
+        if 'ETag' in r.headers:
+            self.etags[path] = r.headers['ETag']
+        match = re.search(r'max-age=(\d+)', r.headers.get('Cache-Control', ''))
+        if match and 'immutable' in r.headers.get('Cache-Control', '') and self.revisit:
+            self.fresh[path] = time.time() + int(match.group(1))
+        return raw
+
+    def open(self):
+        html = self.get('/dashboard')
+        if html:  # a 304 keeps the asset list from the last load
+            try:
+                html = gzip.decompress(html)
+            except OSError:
+                pass
+            self.assets = re.findall(rb'(?:href|src)="(/static/[^"]+)"', html)
+        for asset in self.assets:
+            self.get(asset.decode())
+        for path in API:
+            self.get(path)
+
+
+def run(base, clients, seconds, revisit):
+    tabs = [Tab(base, revisit) for _ in range(clients)]
+    opened = [0] * clients
+    deadline = time.time() + seconds
+
+    def loop(i):
+        while time.time() < deadline:
+            tabs[i].open()
+            opened[i] += 1
+
+    threads = [threading.Thread(target=loop, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    total = sum(t.requests for t in tabs)
+    return {
+        'rps': total / elapsed,
+        'tabs': sum(opened) / elapsed,
+        'bytes_per_tab': sum(t.bytes for t in tabs) / max(1, sum(opened)),
+        'not_modified': sum(t.not_modified for t in tabs) / max(1, total),
+        'failures': sum(t.failures for t in tabs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--events', type=int, default=2000)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        populate(os.path.join(workdir, 'system_monitor.db'), args.events)
+        for enabled in (False, True):
+            proc, base = start_server(workdir, enabled)
+            try:
+                for revisit in (False, True):
+                    run(base, args.clients, 1, revisit)  # warm-up
+                    results[enabled, revisit] = result = run(base, args.clients, args.seconds, revisit)
+                    print(f"http layer {'on ' if enabled else 'off'}, {'revisit' if revisit else 'cold   '}: "
+                          f"{result['rps']:6.0f} req/s, {result['tabs']:6.1f} tabs/s, "
+                          f"{result['bytes_per_tab'] / 1024:6.1f} KB/tab, {result['not_modified']:4.0%} 304s, "
+                          f"{result['failures']} failures")
+            finally:
+                proc.terminate()
+                proc.wait(timeout=10)
+    ok = not any(r['failures'] for r in results.values())
+    for revisit in (False, True):
+        off, on = results[False, revisit], results[True, revisit]
+        ok &= on['tabs'] > off['tabs']
+        print(f"{'revisit' if revisit else 'cold'}: tabs/s x{on['tabs'] / off['tabs']:.1f}, "
+              f"bytes/tab x{off['bytes_per_tab'] / on['bytes_per_tab']:.1f} smaller")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
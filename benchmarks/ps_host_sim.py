@@ -0,0 +1,115 @@
+"""
+PowerShellHost check on Linux/macOS: drives the persistent host through
+platforms/windows/shell_host_stub.py (same line-framed JSON protocol, scripts
+run with `sh -c`) and checks output and exit codes, concurrent callers,
+timeouts, a crashing host, a host killed between calls, close(), and the
+WindowsExecutor fallback when no host can be started. Also times N calls
+through the one host vs starting a fresh stub process per call.
+
+Usage (from the repository root):
+    python benchmarks/ps_host_sim.py [--calls 200]
+Exits non-zero if any check fails.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from platforms.windows.executor_windows import WindowsExecutor
+from platforms.windows.ps_host import HostUnavailable, PowerShellHost
+from platforms.windows.shell_host_stub import STUB_PATH
+
+STUB = [sys.executable, STUB_PATH]
+
+
+def check(results, name, ok, detail=''):
+    results.append(ok)
+    print(f"[{'ok' if ok else 'FAIL'}] {name}{': ' + detail if detail else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=200)
+    args = parser.parse_args()
+    results = []
+
+    host = PowerShellHost(command=STUB)
+    ok, output = host.run("echo hello")
+    check(results, "run returns output", ok and output == 'hello', repr(output))
+    ok, output = host.run("echo failing >&2; exit 3")
+    check(results, "non-zero exit is a failure", not ok and output == 'failing', repr(output))
+
+    # Concurrent callers are serialized; every caller gets its own answer
+    answers = {}
+
+    def call(i):
+        answers[i] = host.run(f"echo {i}")
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    check(results, "16 concurrent callers", all(answers[i] == (True, str(i)) for i in range(16)))
+
+    started = time.perf_counter()
+    ok, output = host.run("sleep 5; echo late", timeout=0.5)
+    elapsed = time.perf_counter() - started
+    check(results, "timeout kills the host", not ok and 'timed out' in output and elapsed < 2,
+          f"{elapsed:.1f}s, {output!r}")
+    ok, output = host.run("echo after-timeout")
+    check(results, "next call restarts the host", ok and output == 'after-timeout' and host.restarts == 1,
+          f"restarts={host.restarts}")
+
+    ok, output = host.run("__crash__")
+    check(results, "crashing host fails the call", not ok and 'exited unexpectedly' in output, repr(output))
+    ok, output = host.run("echo after-crash")
+    check(results, "next call after a crash", ok and output == 'after-crash', f"restarts={host.restarts}")
+
+    host._proc.kill()
+    host._proc.wait()
+    ok, output = host.run("echo after-kill")
+    check(results, "host killed between calls restarts transparently", ok and output == 'after-kill',
+          f"restarts={host.restarts}")
+
+    started = time.perf_counter()
+    for i in range(args.calls):
+        host.run("true")
+    persistent = (time.perf_counter() - started) / args.calls
+    calls = max(1, args.calls // 10)
+    started = time.perf_counter()
+    for i in range(calls):
+        one_shot = PowerShellHost(command=STUB)
+        one_shot.run("true")
+        one_shot.close()
+    per_call = (time.perf_counter() - started) / calls
+    print(f"persistent host {persistent * 1000:.2f} ms/call, fresh host per call {per_call * 1000:.2f} ms/call "
+          f"(x{per_call / persistent:.0f})")
+    check(results, "persistent host is faster than a process per call", persistent < per_call)
+
+    proc = host._proc
+    host.close()
+    check(results, "close() stops the host", not host.alive and proc.poll() is not None)
+
+    try:
+        PowerShellHost(command=[os.path.join(ROOT, 'no-such-host')]).run("echo x")
+        unavailable = False
+    except HostUnavailable:
+        unavailable = True
+    check(results, "missing host raises HostUnavailable", unavailable)
+
+    # Without any host (and no powershell.exe here) the executor reports a failure instead of raising
+    executor = WindowsExecutor(host=PowerShellHost(command=[os.path.join(ROOT, 'no-such-host')]))
+    ok, output = executor._run_powershell("Get-Service")
+    check(results, "executor falls back to one-shot PowerShell", not ok and bool(output), repr(output[:60]))
+
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Query-plan check: runs every DatabaseManager read/write path (plus the
+retention engine) against a scratch database, captures each statement
+through sqlite3's trace callback and asserts that EXPLAIN QUERY PLAN uses an
+index (or the rowid b-tree) for it - no full scans, no temp b-trees.
+
+Usage (from the repository root):
+    python benchmarks/query_plans.py
+Exits non-zero and lists the offending statements on failure.
+"""
+import os
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from core.logging_db import DatabaseManager
+from core.models import Event, Action, AuditEntry, Incident
+from core.retention import RetentionEngine
+from core import export, queries
+
+# Whole-table reads of tiny configuration tables are intended
+SMALL_TABLES = {'settings', 'process_whitelist'}
+SKIP = re.compile(r'^\s*(INSERT|PRAGMA|BEGIN|COMMIT|ROLLBACK|CREATE|DROP|ALTER)\b', re.I)
+
+
+def exercise(db: DatabaseManager):
+    now = datetime.now().isoformat()
+    event_id = db.log_event(Event(timestamp=now, type='cpu_high', severity='warning', description='bench', metric_value=90, threshold=80))
+    action_id = db.log_action(Action(timestamp=now, type='action_kill_high_cpu_process', status='success', output='', duration_ms=0, event_id=event_id))
+    db.log_audit(AuditEntry(timestamp=now, action_id=action_id, affected_resources='cpu_high', status='success'))
+    rec_id = db.create_recommendation(event_id, 'cpu_high', 'Close bench', 'close_app')
+    db.log_metrics(10, 20, 30)
+
+    db.get_metrics_history()
+    db.max_metrics_id()
+    db.get_metrics_rollup('1m', time.time() - 3600)
+    db.get_whitelist()
+    db.add_to_whitelist('bench')
+    db.remove_from_whitelist('bench')
+    db.get_settings()
+    db.update_setting('cpu_threshold', '80.0')
+    db.get_recent_events()
+    db.get_recent_actions()
+    db.get_event(event_id)
+    db.get_action(action_id, fields=['type', 'status'])
+    db.get_pending_recommendations()
+    db.get_all_recommendations()
+    db.update_recommendation_status(rec_id, 'applied')
+    incident = Incident(key='cpu_high', type='cpu_high', severity='warning', description='bench',
+                        first_seen=now, last_seen=now, event_id=event_id)
+    with db.pool.writer() as conn:
+        incident.id = db._insert_incident(conn, incident)
+        db._update_incident(conn, incident)
+    db.get_open_incidents()
+    db.get_incidents_since(time.time() - 1800)
+    db.get_incidents()
+    db.get_incidents(status='closed')
+    batch = {'host': 'bench-host', 'agent_version': '1', 'items': [
+        {'kind': 'metrics', 'ts': time.time(), 'data': {'cpu_percent': 10, 'memory_percent': 20, 'disk_percent': 30}},
+        {'kind': 'event', 'ts': time.time(), 'data': {'id': 1, 'type': 'cpu_high'}},
+        {'kind': 'action', 'ts': time.time(), 'data': {'id': 1, 'event_id': 1, 'type': 'action_kill_high_cpu_process'}},
+    ]}
+    with db.pool.writer() as conn:
+        host_id = db._insert_fleet_batch(conn, batch)
+        db._insert_fleet_batch(conn, batch)
+    db.get_fleet_hosts()
+    db.get_fleet_host('bench-host')
+    db.get_fleet_metrics(host_id, time.time() - 3600, time.time() + 1)
+    db.get_fleet_events(host_id)
+    db.get_fleet_actions(host_id)
+    db.prune_fleet(time.time() - 86400)
+
+    for name, dataset in queries.DATASETS.items():
+        filters = {key: ['x', 'y'] for key in dataset.filters}
+        db.query(name, filters=filters, since=time.time() - 3600, until=time.time() + 60, before_id=10)
+        db.query(name, fields=['ts', 'status' if 'status' in dataset.names else 'severity'], filters={key: ['x'] for key in dataset.filters}, after_id=0, limit=20)
+        for chunk in export.export(db.pool.reader(), name, 'csv', True, time.time() - 3600, time.time() + 60, filters):
+            pass
+        for chunk in export.export(db.pool.reader(), name):
+            pass
+
+    RetentionEngine(db, raw_retention_hours=0).run(time.time() + 7200)
+
+
+def problems_for(conn, sql):
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    bad = []
+    for line in plan:
+        if 'TEMP B-TREE' in line:
+            bad.append(line)
+            continue
+        match = re.match(r'SCAN (\w+)(.*)', line)
+        if not match or 'USING' in match.group(2):
+            continue
+        table = match.group(1)
+        rowid_order = re.search(r'ORDER BY (\w+\.)?id\b', sql, re.I) and not re.search(r'\bWHERE\b', sql, re.I)
+        if table in SMALL_TABLES or rowid_order:
+            continue
+        bad.append(line)
+    return plan, bad
+
+
+def main():
+    statements = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'plans.db'))
+        db.init_db()
+        for conn in (db.pool.reader(),):
+            conn.set_trace_callback(statements.append)
+        with db.pool.writer() as conn:
+            conn.set_trace_callback(statements.append)
+        exercise(db)
+
+        checked, failures = set(), []
+        conn = db.get_connection()
+        for sql in statements:
+            if SKIP.match(sql) or sql in checked:
+                continue
+            checked.add(sql)
+            plan, bad = problems_for(conn, sql)
+            status = 'FAIL' if bad else 'ok'
+            print(f"[{status}] {' '.join(sql.split())}")
+            for line in plan:
+                print(f"         {line}")
+            if bad:
+                failures.append(sql)
+        conn.close()
+        db.close()
+
+    print(f"\n{len(checked)} statements checked, {len(failures)} without an index")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
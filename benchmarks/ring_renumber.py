@@ -0,0 +1,129 @@
+"""
+Metrics ring renumbering check: a new ring file next to a database that
+already has metrics_history rows (e.g. the ring file was deleted) must give
+its samples ids above the existing ones, and afterwards - also after a restart
+that reloads the ring into the in-memory store - only those samples may be
+read back, never the slots below them that were not written. Also checks a
+small ring that wraps after renumbering, and that a version 1 ring file
+written by the old renumbering is upgraded without its empty slots.
+
+Usage (from the repository root):
+    python benchmarks/ring_renumber.py [--existing 1000] [--capacity 17280]
+Exits non-zero if any check fails.
+"""
+import argparse
+import math
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from core.logging_db import DatabaseManager
+from core.metrics_ring import HEADER_SIZE, MAGIC, RECORD, MetricsRing, RingDrainer, record_to_row
+from core.timeseries import TimeSeriesStore
+
+CPU = (40.0, 50.0, 60.0)
+
+
+def check(results, name, ok, detail=''):
+    results.append(ok)
+    print(f"[{'ok' if ok else 'FAIL'}] {name}{': ' + detail if detail else ''}")
+
+
+def seqs(records):
+    return [r[0] for r in records]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--existing', type=int, default=1000, help='metrics_history rows before the new ring')
+    parser.add_argument('--capacity', type=int, default=17280)
+    args = parser.parse_args()
+    results = []
+    workdir = tempfile.mkdtemp(prefix='ring_renumber_')
+    ring_path = os.path.join(workdir, 'ring.bin')
+    now = time.time()
+    expected = list(range(args.existing + 1, args.existing + 1 + len(CPU)))
+
+    db = DatabaseManager(os.path.join(workdir, 'check.db'))
+    db.init_db()
+    old = [(i, now - 3600 + i, 10.0, 20.0, 30.0) for i in range(1, args.existing + 1)]
+    with db.pool.writer() as conn:
+        db._insert_metrics_records(conn, [record_to_row(r) for r in old])
+
+    # New ring, samples arrive, then the drainer checks the ids (as api_app starts)
+    ring = MetricsRing(ring_path, capacity=args.capacity)
+    for i, cpu in enumerate(CPU):
+        ring.append(now + i, cpu, 50.0, 70.0)
+    store = TimeSeriesStore(capacity=args.capacity)
+    store.load(ring.latest(ring.capacity))
+    drainer = RingDrainer(ring, db, on_renumber=store.shift_ids)
+    drainer.drain()
+    rows = db.pool.reader().execute("SELECT id, cpu_percent FROM metrics_history WHERE id > ? ORDER BY id",
+                                    (args.existing,)).fetchall()
+    check(results, "samples stored above the existing ids", [r[0] for r in rows] == expected and drainer.overwritten == 0,
+          f"ids {[r[0] for r in rows]}, overwritten {drainer.overwritten}")
+    check(results, "ring holds only the renumbered samples",
+          len(ring) == len(CPU) and ring.oldest_seq == expected[0] and seqs(ring.latest(ring.capacity)) == expected,
+          f"len {len(ring)}, oldest {ring.oldest_seq}")
+    check(results, "time range and oldest_ts skip unwritten slots",
+          seqs(ring.range(0, math.inf)) == expected and ring.oldest_ts() == now,
+          f"{len(ring.range(0, math.inf))} records")
+    check(results, "ring.after() from 0", seqs(ring.after(0)) == expected)
+    check(results, "store ids shifted", store.oldest_id == expected[0])
+    ring.close()
+
+    # Restart: the header keeps the first renumbered sequence
+    ring = MetricsRing(ring_path, capacity=args.capacity)
+    store = TimeSeriesStore(capacity=args.capacity)
+    store.load(ring.latest(ring.capacity))
+    mean = store.aggregate('cpu_percent', 'mean')
+    check(results, "after restart: 3 records, mean cpu 50",
+          len(ring) == len(CPU) and len(store) == len(CPU) and mean == 50.0, f"len {len(ring)}, mean {mean}")
+    ring.append(now + 10, 55.0, 50.0, 70.0)
+    check(results, "appends continue the sequence", seqs(ring.latest(2)) == [expected[-1], expected[-1] + 1])
+    ring.close()
+
+    # A small ring renumbered and then wrapped
+    small_path = os.path.join(workdir, 'small.bin')
+    small = MetricsRing(small_path, capacity=10)
+    for i in range(3):
+        small.append(now + i, 1.0, 1.0, 1.0)
+    small.ensure_after(args.existing)
+    for i in range(20):
+        small.append(now + 3 + i, 2.0, 2.0, 2.0)
+    records = small.latest(small.capacity)
+    last = args.existing + 23
+    check(results, "small ring wraps after renumbering",
+          len(small) == 10 and seqs(records) == list(range(last - 9, last + 1)), f"len {len(small)}")
+    small.close()
+
+    # Version 1 file as left by the old renumbering: header without the first seq,
+    # records only in the renumbered slots
+    v1_path = os.path.join(workdir, 'v1.bin')
+    capacity = args.capacity
+    with open(v1_path, 'wb') as f:
+        f.truncate(HEADER_SIZE + capacity * RECORD.size)
+    with open(v1_path, 'r+b') as f:
+        f.write(struct.pack('<8sIIQQ', MAGIC, 1, capacity, expected[-1] + 1, args.existing))
+        for seq, cpu in zip(expected, CPU):
+            f.seek(HEADER_SIZE + (seq % capacity) * RECORD.size)
+            f.write(RECORD.pack(seq, now, cpu, 50.0, 70.0))
+    v1 = MetricsRing(v1_path, capacity=capacity)
+    check(results, "version 1 file upgraded without empty slots",
+          len(v1) == len(CPU) and seqs(v1.latest(capacity)) == expected, f"len {len(v1)}")
+    v1.close()
+
+    db.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == '__main__':
+    main()
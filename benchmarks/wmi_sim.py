@@ -0,0 +1,156 @@
+"""
+WmiCollector check on Linux/macOS with FakeWmiBackend: services come from one
+batched query at start and then from modification events (no further
+queries however often the health loop reads them); a backend whose event
+subscription fails, or whose watcher dies later, falls back to polling every
+`fallback_poll_secs`; the slow Windows Update search runs on its own thread
+once per `updates_ttl`, and readers never wait for it. Also starts and closes
+a WindowsMonitor on the fake backend.
+
+Usage (from the repository root):
+    python benchmarks/wmi_sim.py [--reads 10000]
+Exits non-zero if any check fails.
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from platforms.windows.monitor_windows import WindowsMonitor
+from platforms.windows.wmi_collector import FakeWmiBackend, WmiCollector
+
+
+class NoEventsBackend(FakeWmiBackend):
+    """WMI without a usable event subscription (e.g. permissions)."""
+
+    def watch_services(self, names, poll_secs=2):
+        raise RuntimeError("access denied")
+
+
+class DyingWatcherBackend(FakeWmiBackend):
+    """The subscription works at first, then the watcher raises."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.broken = False
+
+    def watch_services(self, names, poll_secs=2):
+        next_change = super().watch_services(names, poll_secs)
+
+        def watcher(timeout_s):
+            if self.broken:
+                raise RuntimeError("RPC server unavailable")
+            return next_change(timeout_s)
+
+        return watcher
+
+
+def check(results, name, ok, detail=''):
+    results.append(ok)
+    print(f"[{'ok' if ok else 'FAIL'}] {name}{': ' + detail if detail else ''}")
+
+
+def wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+def status(collector, name):
+    return {s['name']: s['status'] for s in collector.services()}.get(name)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reads', type=int, default=10000)
+    args = parser.parse_args()
+    results = []
+
+    # Batched query, then events
+    backend = FakeWmiBackend(pending_updates=7, search_delay=0.5)
+    collector = WmiCollector(backend, updates_ttl=0.5)
+    collector.start()
+    loaded = wait_for(lambda: len(collector.services()) == 2)
+    check(results, "services loaded by one batched query", loaded and backend.queries == 1,
+          f"queries={backend.queries}")
+
+    started = time.perf_counter()
+    for _ in range(args.reads):
+        collector.services()
+        collector.updates_pending()
+    per_read = (time.perf_counter() - started) / args.reads
+    check(results, f"{args.reads} reads served from the cache", backend.queries == 1,
+          f"{per_read * 1e6:.1f} us/read, queries={backend.queries}")
+
+    backend.set_service_state('BITS', 'stopped', 'Manual')
+    applied = wait_for(lambda: status(collector, 'BITS') == 'stopped')
+    check(results, "state change arrives as an event", applied and backend.queries == 1,
+          f"queries={backend.queries}")
+    backend.set_service_state('Spooler', 'stopped')
+    backend.set_service_state('wuauserv', 'stopped')
+    wait_for(lambda: status(collector, 'wuauserv') == 'stopped')
+    check(results, "unwatched services are ignored", 'Spooler' not in {s['name'] for s in collector.services()})
+
+    # Updates: readers get 0 until the first (slow) search finishes, then the cached count
+    found = wait_for(lambda: collector.updates_pending() == 7)
+    time.sleep(2.0)
+    searches = backend.searches
+    # one search per search_delay + updates_ttl (1.0s) over ~2.5s
+    check(results, "updates searched once per TTL", found and 2 <= searches <= 4,
+          f"{searches} searches, checked_at set={collector.updates_checked_at is not None}")
+    threads = list(collector._threads)
+    collector.stop()
+    stopped = len(threads) == 2 and all(not t.is_alive() for t in threads)
+    check(results, "stop() ends the collector threads", stopped)
+
+    first = WmiCollector(FakeWmiBackend(search_delay=2.0), updates_ttl=3600)
+    first.start()
+    started = time.perf_counter()
+    pending = first.updates_pending()
+    waited = time.perf_counter() - started
+    check(results, "first read does not wait for the search", pending == 0 and waited < 0.01,
+          f"{waited * 1000:.2f} ms")
+    first.stop(timeout=0)
+
+    # No event subscription: poll
+    backend = NoEventsBackend()
+    collector = WmiCollector(backend, fallback_poll_secs=0.2, updates_ttl=3600)
+    collector.start()
+    wait_for(lambda: len(collector.services()) == 2)
+    backend.set_service_state('BITS', 'stopped')
+    polled = wait_for(lambda: status(collector, 'BITS') == 'stopped')
+    check(results, "no subscription: changes picked up by polling", polled and backend.queries >= 2,
+          f"queries={backend.queries}")
+    collector.stop()
+
+    # Watcher dies later: switch to polling
+    backend = DyingWatcherBackend()
+    collector = WmiCollector(backend, fallback_poll_secs=0.2, updates_ttl=3600)
+    collector.start()
+    wait_for(lambda: len(collector.services()) == 2)
+    backend.broken = True
+    time.sleep(1.2)  # the watcher is polled with a 1s timeout
+    backend.services['BITS'] = {'status': 'stopped', 'start_type': 'Auto'}  # no event queued
+    polled = wait_for(lambda: status(collector, 'BITS') == 'stopped')
+    check(results, "watcher failure: falls back to polling", polled, f"queries={backend.queries}")
+    collector.stop()
+
+    monitor = WindowsMonitor(wmi_backend=FakeWmiBackend(pending_updates=3), updates_ttl=3600)
+    ready = wait_for(lambda: monitor.collector.updates_pending() == 3 and len(monitor.collector.services()) == 2)
+    threads = list(monitor.collector._threads)
+    monitor.close()
+    check(results, "WindowsMonitor runs the collector on a fake backend",
+          ready and all(not t.is_alive() for t in threads))
+
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -45,7 +45,8 @@ def build():
     # Add hidden imports if necessary (Flask usually needs these)
     hidden_imports = [
         "engineio.async_drivers.threading",
-        "jinja2.ext"
+        "jinja2.ext",
+        "waitress"
     ]
     for hidden in hidden_imports:
         cmd.extend(["--hidden-import", hidden])
@@ -1,2 +1,100 @@
 ENVIRONMENT = "prod"
 AUTO_REMEDIATE_ENABLED = True
+
+# Background metrics sampler cadence (seconds). /api/health and the scheduler
+# job read the latest snapshot instead of collecting on demand.
+SAMPLE_INTERVAL_SECONDS = 5
+
+# Metrics retention: raw samples are kept this long, then only as rollups
+METRICS_RAW_RETENTION_HOURS = 24
+METRICS_ROLLUP_RETENTION_DAYS = {'1m': 7, '1h': 90, '1d': 730}
+RETENTION_INTERVAL_MINUTES = 5
+
+# Samples are appended to a memory-mapped ring file first (survives a locked
+# or busy database) and copied into SQLite every METRICS_DRAIN_SECONDS.
+# 17280 records = 24h at the default sample interval (~690KB).
+METRICS_RING_PATH = 'metrics_ring.bin'
+METRICS_RING_CAPACITY = 17280
+METRICS_DRAIN_SECONDS = 2
+
+# Health check cadence: fast while an incident is open or a metric is within
+# HEALTH_NEAR_THRESHOLD (relative) of a threshold, slow when every metric has
+# at least HEALTH_IDLE_HEADROOM left
+HEALTH_INTERVAL_SECONDS = 30
+HEALTH_INTERVAL_FAST_SECONDS = 5
+HEALTH_INTERVAL_IDLE_SECONDS = 60
+HEALTH_NEAR_THRESHOLD = 0.1
+HEALTH_IDLE_HEADROOM = 0.5
+
+# Incidents: repeated events of one condition are merged; remediation is
+# retried at most once per cooldown, and an incident closes after this many
+# clean health checks
+INCIDENT_COOLDOWN_SECONDS = 600
+INCIDENT_RECOVERY_SAMPLES = 2
+
+# Remediation runs on a bounded pool; each action must finish within the deadline
+REMEDIATION_WORKERS = 4
+REMEDIATION_DEADLINE_SECONDS = 60
+
+# Optional JSON file replacing the built-in analyzer rules (core/rules.py)
+ANALYZER_RULES_FILE = None
+
+# Windows: how often the (slow) pending-updates search runs
+WINDOWS_UPDATE_CHECK_HOURS = 6
+
+# Agent mode: ship metrics, events and action results to a central collector
+# (another instance of this app). Unsent batches are spooled to disk.
+AGENT_MODE = False
+COLLECTOR_URL = None  # e.g. "http://collector:5000"
+AGENT_HOST_ID = None  # defaults to the hostname
+AGENT_BATCH_SIZE = 500
+AGENT_FLUSH_SECONDS = 10
+AGENT_SPOOL_DIR = 'agent_spool'
+
+# Collector side: shared secret agents send as a Bearer token (None = open),
+# when a host counts as offline, and how long fleet data is kept
+INGEST_TOKEN = None
+FLEET_OFFLINE_AFTER_SECONDS = 180
+FLEET_RETENTION_DAYS = 7
+
+# Exhaustion forecasts: disk / memory trends are projected to their thresholds;
+# an ETA within the horizon becomes a recommendation (again after REWARN hours,
+# or sooner if the ETA halves). Needs MIN_SPAN seconds of samples first.
+FORECAST_HORIZON_HOURS = 48
+FORECAST_MIN_SPAN_SECONDS = 1800
+FORECAST_REWARN_HOURS = 12
+FORECAST_CHECK_MINUTES = 5
+
+# Volumes: every mounted physical volume is watched (usage polled in parallel,
+# a hung mount times out on its own). DISK_MOUNTS lists mount points to watch
+# instead, of any filesystem type (e.g. ['/', '/data', '/dev/shm']).
+DISK_MOUNTS = None
+DISK_REFRESH_SECONDS = 30
+DISK_TIMEOUT_SECONDS = 5
+
+# Disk cleanup deletes files older than RECLAIM_MIN_AGE_HOURS from these
+# directories, e.g. {'temp': ['/tmp'], 'cache': [...], 'logs': [...]}
+# (None = the platform's temp, cache and log folders; only rotated logs count)
+RECLAIM_PATHS = None
+RECLAIM_MIN_AGE_HOURS = 24
+RECLAIM_SCAN_MINUTES = 10
+
+# HTTP layer (core/http_cache.py): micro-caches for polled endpoints, ETags,
+# gzip/brotli (brotli if the package is installed) for bodies of at least
+# HTTP_COMPRESS_MIN_BYTES, and immutable caching of hashed static URLs
+HTTP_CACHE_ENABLED = True
+HTTP_COMPRESS_MIN_BYTES = 1024
+
+# Serving (`python api_app.py`; ENVIRONMENT = "dev" or --dev uses the Flask
+# debug server instead). Each open dashboard holds one thread for its event
+# stream, so SERVER_THREADS bounds live dashboards plus concurrent requests.
+# Roles: 'all' = HTTP + background services, 'web' = HTTP only, 'worker' =
+# background only. Background services run in one process at a time, elected
+# through a lock file (default: next to the database).
+SERVER_HOST = '0.0.0.0'
+SERVER_PORT = 5000
+SERVER_THREADS = 32
+SERVER_CONNECTION_LIMIT = 200
+SERVER_ROLE = 'all'
+LEADER_LOCK_PATH = None
+LEADER_RETRY_SECONDS = 5
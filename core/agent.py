@@ -0,0 +1,252 @@
+import gzip
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+import requests
+
+from .error_handling import logger
+
+AGENT_VERSION = '1'
+SPOOL_SUFFIX = '.json.gz'
+
+
+class AgentShipper:
+    """
+    Agent mode: ships this host's metrics, events and action results to a
+    central collector (POST {collector_url}/api/ingest).
+
+    `submit()` only appends to a bounded in-memory queue; a background thread
+    sends gzip'd JSON batches of up to `batch_size` items every
+    `flush_interval` seconds (sooner when a batch fills up). When the
+    collector is unreachable or overloaded, the batch is written to
+    `spool_dir` and retried, oldest first, with exponential backoff and
+    jitter. The spool keeps at most `max_spool_files` batches; the oldest are
+    dropped beyond that. When the collector rejects items as invalid (400
+    with their indexes), the batch is resent without them; other rejected
+    batches (4xx other than 408/429) are dropped, not retried.
+
+    The collector stores rows keyed by host and the agent's own row ids, so
+    a batch delivered twice is harmless.
+    """
+
+    def __init__(self, collector_url: str, host: str, token: Optional[str] = None, batch_size: int = 500,
+                 flush_interval: float = 10, spool_dir: str = 'agent_spool', max_spool_files: int = 1000,
+                 timeout: float = 10, max_queue: int = 10000, max_backoff: float = 300, session=None):
+        self.url = collector_url.rstrip('/') + '/api/ingest'
+        self.host = host
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_dir = spool_dir
+        self.max_spool_files = max_spool_files
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self._session = session or requests.Session()
+        self._headers = {'Content-Type': 'application/json', 'Content-Encoding': 'gzip'}
+        if token:
+            self._headers['Authorization'] = f'Bearer {token}'
+        self._queue: Deque[Dict[str, Any]] = deque(maxlen=max_queue)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self.sent = 0
+        self.spooled = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+        os.makedirs(spool_dir, exist_ok=True)
+
+    # --- Lifecycle ---
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='agent-shipper', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 15.0):
+        """Try one last delivery; whatever is still unsent goes to the spool."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._retry_at = 0.0
+        self._flush(final=True)
+
+    # --- Producers ---
+
+    def submit(self, kind: str, data: Dict[str, Any]):
+        """Queue one row ('metrics', 'event' or 'action'); never blocks."""
+        timestamp = data.get('timestamp')
+        ts = datetime.fromisoformat(timestamp).timestamp() if timestamp else time.time()
+        with self._lock:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1  # the deque evicts the oldest item
+            self._queue.append({'kind': kind, 'ts': ts, 'data': data})
+            full = len(self._queue) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    # --- Shipping ---
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self._flush()
+            except Exception as e:
+                logger.error(f"Agent shipping failed: {e}")
+
+    def _take(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            count = min(len(self._queue), self.batch_size)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _flush(self, final: bool = False):
+        if time.monotonic() >= self._retry_at and self._drain_spool():
+            # Collector reachable: send everything queued, batch by batch
+            while True:
+                items = self._take()
+                if not items:
+                    return
+                body = self._encode(items)
+                if not self._deliver(body):
+                    self._spool(body, len(items))
+                    break
+        # Backing off: park full batches (everything when stopping) in the spool
+        # so memory stays bounded while the collector is away
+        while final or len(self._queue) >= self.batch_size:
+            items = self._take()
+            if not items:
+                return
+            self._spool(self._encode(items), len(items))
+
+    def _drain_spool(self) -> bool:
+        """Resend spooled batches oldest first; False as soon as one fails."""
+        for name in sorted(os.listdir(self.spool_dir)):
+            if not name.endswith(SPOOL_SUFFIX):
+                continue
+            path = os.path.join(self.spool_dir, name)
+            try:
+                with open(path, 'rb') as f:
+                    body = f.read()
+            except OSError:
+                continue
+            if not self._deliver(body):
+                return False
+            os.remove(path)
+        return True
+
+    def _encode(self, items: List[Dict[str, Any]]) -> bytes:
+        batch = {
+            'host': self.host,
+            'agent_version': AGENT_VERSION,
+            'batch_id': uuid.uuid4().hex,
+            'sent_at': time.time(),
+            'items': items,
+        }
+        return gzip.compress(json.dumps(batch, default=str, separators=(',', ':')).encode('utf-8'), compresslevel=6)
+
+    def _deliver(self, body: bytes) -> bool:
+        """POST one batch. True when it needs no retry (accepted, or rejected as invalid)."""
+        try:
+            response = self._session.post(self.url, data=body, headers=self._headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            return self._failed(f"Collector unreachable: {e}")
+        if response.status_code < 300:
+            self._failures = 0
+            self.sent += 1
+            return True
+        if response.status_code == 400:
+            remaining = self._without_invalid(body, response)
+            if remaining is not None:
+                return self._deliver(remaining)
+        if 400 <= response.status_code < 500 and response.status_code not in (408, 429):
+            self.rejected += 1
+            logger.error(f"Collector rejected batch ({response.status_code}): {response.text[:200]}")
+            return True
+        return self._failed(f"Collector returned {response.status_code}",
+                            response.headers.get('Retry-After'))
+
+    def _without_invalid(self, body: bytes, response) -> Optional[bytes]:
+        """The batch minus the items the collector listed as invalid; None if nothing is left to send."""
+        try:
+            invalid = {entry['index'] for entry in response.json().get('invalid', [])}
+            batch = json.loads(gzip.decompress(body))
+        except (ValueError, KeyError, TypeError, AttributeError, OSError):
+            return None
+        items = batch['items']
+        if not invalid or not invalid.issubset(range(len(items))):
+            return None
+        self.dropped += len(invalid)
+        logger.error(f"Collector rejected {len(invalid)} invalid item(s), resending the other "
+                     f"{len(items) - len(invalid)}: {response.text[:200]}")
+        batch['items'] = [item for i, item in enumerate(items) if i not in invalid]
+        if not batch['items']:
+            return None
+        return gzip.compress(json.dumps(batch, default=str, separators=(',', ':')).encode('utf-8'), compresslevel=6)
+
+    def _failed(self, error: str, retry_after: Optional[str] = None) -> bool:
+        if self._failures == 0:
+            logger.warning(f"{error}; spooling to {self.spool_dir}")
+        self.last_error = error
+        self._failures += 1
+        delay = min(self.max_backoff, self.flush_interval * 2 ** min(self._failures - 1, 10))
+        delay = random.uniform(delay / 2, delay)  # jitter: agents must not retry in lockstep
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        self._retry_at = time.monotonic() + delay
+        return False
+
+    def _spool(self, body: bytes, count: int):
+        name = f"{time.time_ns():020d}-{count}{SPOOL_SUFFIX}"
+        path = os.path.join(self.spool_dir, name)
+        try:
+            with open(path + '.tmp', 'wb') as f:
+                f.write(body)
+            os.replace(path + '.tmp', path)  # never leave a half-written batch behind
+        except OSError as e:
+            self.dropped += count
+            logger.error(f"Agent spool write failed, dropped {count} items: {e}")
+            return
+        self.spooled += count
+        self._trim_spool()
+
+    def _trim_spool(self):
+        files = sorted(n for n in os.listdir(self.spool_dir) if n.endswith(SPOOL_SUFFIX))
+        for name in files[:max(0, len(files) - self.max_spool_files)]:
+            try:
+                os.remove(os.path.join(self.spool_dir, name))
+            except OSError:
+                continue
+            self.dropped += int(name[:-len(SPOOL_SUFFIX)].rsplit('-', 1)[-1])
+
+    def spool_size(self) -> int:
+        return sum(1 for n in os.listdir(self.spool_dir) if n.endswith(SPOOL_SUFFIX))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'collector': self.url,
+            'host': self.host,
+            'queued': len(self._queue),
+            'spool_batches': self.spool_size(),
+            'batches_sent': self.sent,
+            'items_spooled': self.spooled,
+            'items_dropped': self.dropped,
+            'batches_rejected': self.rejected,
+            'consecutive_failures': self._failures,
+            'last_error': self.last_error,
+        }
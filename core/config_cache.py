@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Mapping
+
+TRUE_VALUES = ('1', 'true', 'on', 'yes')
+
+
+def parse_bool(value: str) -> bool:
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+# Known settings and how to parse them; anything else stays a string
+SETTING_TYPES: Dict[str, Callable[[str], Any]] = {
+    'cpu_threshold': float,
+    'memory_threshold': float,
+    'disk_threshold': float,
+    'updates_pending_threshold': int,
+    'auto_remediate': parse_bool,
+}
+
+
+def parse_settings(raw: Mapping[str, str]) -> Dict[str, Any]:
+    typed = {}
+    for key, value in raw.items():
+        parser = SETTING_TYPES.get(key)
+        try:
+            typed[key] = parser(value) if parser else value
+        except (TypeError, ValueError):
+            typed[key] = value  # leave malformed values as text; readers apply their defaults
+    return typed
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    Immutable view of the settings table and the process whitelist.
+
+    `raw` holds the stored strings (what /api/settings returns), `settings`
+    the parsed values. `version` is the stored config change counter
+    (increased on every change, by any process), so callers can cheaply
+    tell whether anything changed.
+    """
+    version: int
+    raw: Mapping[str, str]
+    settings: Mapping[str, Any]
+    whitelist: FrozenSet[str]
+
+    @classmethod
+    def build(cls, version: int, raw: Mapping[str, str], whitelist: Iterable[str]) -> 'ConfigSnapshot':
+        raw = dict(raw)
+        return cls(
+            version=version,
+            raw=MappingProxyType(raw),
+            settings=MappingProxyType(parse_settings(raw)),
+            whitelist=frozenset(whitelist),
+        )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.settings.get(key, default)
+        # A malformed stored value must not replace a typed default
+        if default is not None and not isinstance(value, type(default)) and not isinstance(default, str):
+            try:
+                return type(default)(value)
+            except (TypeError, ValueError):
+                return default
+        return value
+
+    def with_setting(self, version: int, key: str, value: str) -> 'ConfigSnapshot':
+        raw = dict(self.raw)
+        raw[key] = value
+        return ConfigSnapshot.build(version, raw, self.whitelist)
+
+    def with_whitelist(self, version: int, whitelist: Iterable[str]) -> 'ConfigSnapshot':
+        return ConfigSnapshot.build(version, self.raw, whitelist)
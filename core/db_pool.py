@@ -0,0 +1,123 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+# Applied to every connection. WAL lets readers run alongside the single
+# writer; synchronous=NORMAL is durable across application crashes in WAL mode
+# and only fsyncs at checkpoints.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-8000",      # ~8MB page cache
+    "PRAGMA mmap_size=67108864",    # 64MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Per-connection prepared statement cache (sqlite3 default is 128)
+STATEMENT_CACHE_SIZE = 256
+
+
+class ConnectionManager:
+    """
+    Long-lived SQLite connections for DatabaseManager.
+
+    - One writer connection shared by all threads, serialized by a lock.
+    - One reader connection per thread (threading.local), opened lazily and
+      closed once its thread has exited (request-per-thread servers would
+      otherwise leak one connection per request).
+
+    Connections are never closed per call, so sqlite3's statement cache
+    reuses prepared statements across calls.
+
+    `versions()` reads per-table change counters that triggers bump on every
+    write (migrations.counter_triggers), so response caches keyed on them see
+    writes from any process, and never a version ahead of committed data.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._write_lock = threading.RLock()
+        self._writer = None
+        self._local = threading.local()
+        self._readers: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._readers_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            isolation_level=None,  # explicit BEGIN/COMMIT below
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Exclusive write transaction; commits on success, rolls back on error."""
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            conn = self._writer
+            if conn.in_transaction:
+                # Re-entrant use joins the outer transaction
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            else:
+                conn.execute("COMMIT")
+
+    def versions(self, *tables: str) -> Tuple[int, ...]:
+        """Committed change count per table (one of migrations.CACHED_TABLES), shared by all processes."""
+        rows = self.reader().execute(
+            f"SELECT name, version FROM change_counters WHERE name IN ({', '.join('?' * len(tables))})", tables)
+        counters = dict(rows.fetchall())
+        return tuple(counters.get(table, 0) for table in tables)
+
+    def reader(self) -> sqlite3.Connection:
+        """Autocommit connection owned by the calling thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._readers_lock:
+                self._prune_readers()
+                self._readers[threading.current_thread()] = conn
+        return conn
+
+    def _prune_readers(self):
+        """Close the connections of threads that have exited (caller holds _readers_lock)."""
+        for thread in [t for t in self._readers if not t.is_alive()]:
+            self._close_quietly(self._readers.pop(thread))
+
+    @staticmethod
+    def _close_quietly(conn: sqlite3.Connection):
+        try:
+            conn.close()
+        except sqlite3.ProgrammingError:
+            pass
+
+    def reader_count(self) -> int:
+        """Open reader connections (live threads plus exited ones not pruned yet)."""
+        with self._readers_lock:
+            return len(self._readers)
+
+    def close(self):
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._readers_lock:
+            for conn in self._readers.values():
+                self._close_quietly(conn)
+            self._readers.clear()
+        self._local = threading.local()
@@ -0,0 +1,415 @@
+import fnmatch
+import os
+import platform
+import stat
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import psutil
+
+from .error_handling import logger
+
+# Virtual / in-memory filesystems skipped by volume discovery (an explicit
+# mount list overrides this, e.g. to watch a tmpfs)
+PSEUDO_FSTYPES = {
+    'autofs', 'binfmt_misc', 'bpf', 'cgroup', 'cgroup2', 'configfs', 'debugfs', 'devfs', 'devpts', 'devtmpfs',
+    'efivarfs', 'fusectl', 'hugetlbfs', 'mqueue', 'nsfs', 'nullfs', 'overlay', 'proc', 'pstore', 'ramfs',
+    'rpc_pipefs', 'securityfs', 'squashfs', 'sysfs', 'tmpfs', 'tracefs',
+}
+GB = 1024 ** 3
+# DirEntry.stat() reports st_dev = 0 on Windows, so the same-filesystem check is skipped there
+_WINDOWS = platform.system() == 'Windows'
+
+
+def system_mount() -> str:
+    if _WINDOWS:
+        return os.environ.get('SystemDrive', 'C:') + '\\'
+    return '/'
+
+
+def discover_volumes(mounts: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Mounted volumes as {'name', 'device', 'fstype', 'system'} (name is the
+    mount point). `mounts` restricts the list to those mount points, of any
+    filesystem type.
+    """
+    root = system_mount()
+    if mounts:
+        known = {p.mountpoint: p for p in psutil.disk_partitions(all=True)}
+        volumes = []
+        for mount in mounts:
+            part = known.get(mount)
+            volumes.append({'name': mount, 'device': part.device if part else mount,
+                            'fstype': part.fstype if part else '', 'system': mount == root})
+        return volumes
+
+    volumes, seen = [], set()
+    for part in psutil.disk_partitions(all=True):
+        if part.fstype.lower() in PSEUDO_FSTYPES or not part.fstype or 'cdrom' in part.opts:
+            continue
+        # macOS: the sealed system volume's helpers (VM, Preboot, ...) are not user storage
+        if part.mountpoint.startswith('/System/Volumes/') and part.mountpoint != '/System/Volumes/Data':
+            continue
+        if part.mountpoint in seen:
+            continue
+        seen.add(part.mountpoint)
+        volumes.append({'name': part.mountpoint, 'device': part.device, 'fstype': part.fstype,
+                        'system': part.mountpoint == root})
+    return volumes
+
+
+class VolumeWatcher:
+    """
+    Usage of every mounted volume, refreshed in the background so metrics
+    collection only reads a cache.
+
+    Volumes are queried in parallel on a small pool, each with `timeout`
+    seconds: a hung mount (e.g. an unreachable network share) is reported
+    with responsive=False and its last known usage instead of stalling the
+    others, and is not queried again until the stuck call returns. The
+    volume list is rediscovered every `rediscover` seconds.
+    """
+
+    def __init__(self, mounts: Optional[Sequence[str]] = None, interval: float = 30, timeout: float = 5,
+                 rediscover: float = 300, max_workers: int = 8, usage: Callable[[str], Any] = psutil.disk_usage):
+        self.mounts = list(mounts) if mounts else None
+        self.interval = interval
+        self.timeout = timeout
+        self.rediscover = rediscover
+        self.usage = usage
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='volume-usage')
+        self._volumes: List[Dict[str, Any]] = []
+        self._discovered_at = 0.0
+        self._inflight: Dict[str, Any] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='volume-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        # Stuck calls cannot be interrupted; their threads are left to finish on their own
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Volume refresh failed: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def volumes(self) -> List[Dict[str, Any]]:
+        return self._volumes
+
+    def refresh(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        previous = {v['name']: v for v in self._volumes}
+        if not previous or now - self._discovered_at >= self.rediscover:
+            targets = discover_volumes(self.mounts)
+            self._discovered_at = now
+        else:
+            targets = [{k: v[k] for k in ('name', 'device', 'fstype', 'system')} for v in self._volumes]
+
+        futures = {}
+        for volume in targets:
+            name = volume['name']
+            pending = self._inflight.get(name)
+            if pending is not None and not pending.done():
+                continue  # still stuck from an earlier pass
+            futures[name] = self._inflight[name] = self._pool.submit(self.usage, name)
+        if futures:
+            wait(futures.values(), timeout=self.timeout)
+
+        volumes = []
+        for volume in targets:
+            name = volume['name']
+            future = futures.get(name)
+            entry = dict(previous.get(name, {}), **volume)
+            if future is not None and future.done():
+                try:
+                    usage = future.result()
+                except OSError as e:
+                    # Unmounted since discovery, or not accessible
+                    if name in previous:
+                        logger.warning(f"Volume {name} is no longer readable: {e}")
+                    continue
+                entry.update(percent=usage.percent, total_gb=round(usage.total / GB, 2),
+                             used_gb=round(usage.used / GB, 2), free_gb=round(usage.free / GB, 2),
+                             responsive=True, checked_at=now)
+            else:
+                if previous.get(name, {}).get('responsive', True):
+                    logger.warning(f"Volume {name} did not answer within {self.timeout:g}s")
+                entry['responsive'] = False
+            volumes.append(entry)
+        # Replace the list so readers never see a half-updated cache
+        self._volumes = volumes
+        return volumes
+
+
+def default_reclaim_paths() -> Dict[str, List[str]]:
+    """Temp, cache and log directories worth cleaning on this platform."""
+    system = platform.system()
+    home = os.path.expanduser('~')
+    paths = {'temp': [tempfile.gettempdir()], 'cache': [], 'logs': []}
+    if system == 'Windows':
+        paths['temp'].append(os.path.join(os.environ.get('SystemRoot', r'C:\Windows'), 'Temp'))
+        local = os.environ.get('LOCALAPPDATA')
+        if local:
+            paths['cache'].append(os.path.join(local, 'CrashDumps'))
+    elif system == 'Darwin':
+        paths['cache'].append(os.path.join(home, 'Library', 'Caches'))
+        paths['logs'].append(os.path.join(home, 'Library', 'Logs'))
+    else:
+        paths['cache'].append(os.environ.get('XDG_CACHE_HOME') or os.path.join(home, '.cache'))
+        paths['logs'].append('/var/log')
+    return paths
+
+
+# Only rotated / archived logs are reclaimable; live logs stay
+FILE_PATTERNS = {'logs': ('*.gz', '*.bz2', '*.xz', '*.zip', '*.old', '*.[0-9]', '*.[0-9].log')}
+
+
+class _Dir:
+    __slots__ = ('mtime_ns', 'files', 'subdirs', 'category', 'root')
+
+    def __init__(self, mtime_ns: int, category: str, root: str):
+        self.mtime_ns = mtime_ns
+        self.files: Dict[str, Tuple[int, float]] = {}  # name -> (size, mtime)
+        self.subdirs: List[Tuple[str, int]] = []  # (path, mtime_ns)
+        self.category = category
+        self.root = root
+
+
+class ReclaimIndex:
+    """
+    Index of files that disk cleanup may delete: temp directories, caches
+    and rotated logs, keyed by category.
+
+    `refresh()` walks the roots with os.scandir but only lists a directory
+    again when its mtime has changed (a file was added, removed or
+    renamed); unchanged directories reuse their cached entries, so a pass
+    costs one stat per directory rather than one per file. In-place growth
+    of an existing file does not touch the directory's mtime, so every
+    `full_scan_every` passes lists everything again. The walk does not
+    follow symlinks or cross into other filesystems.
+
+    Files older than `min_age_hours` are reclaimable. `reclaim()` deletes
+    them straight from the index (re-checking each file first) and reports
+    the bytes freed, without walking the tree before or after.
+    """
+
+    def __init__(self, paths: Optional[Mapping[str, Iterable[str]]] = None, min_age_hours: float = 24,
+                 full_scan_every: int = 12):
+        paths = default_reclaim_paths() if paths is None else paths
+        self.roots: List[Tuple[str, str]] = [(category, os.path.abspath(path))
+                                             for category, items in paths.items() for path in items]
+        self.min_age = min_age_hours * 3600
+        self.full_scan_every = max(1, full_scan_every)
+        self._dirs: Dict[str, _Dir] = {}
+        self._root_devices: Dict[str, int] = {}
+        self._passes = 0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.last_scan: Dict[str, Any] = {}
+
+    # --- Walker ---
+
+    def refresh(self, full: bool = False) -> Dict[str, Any]:
+        """One incremental pass over all roots; returns pass statistics."""
+        with self._refresh_lock:
+            started = time.perf_counter()
+            full = full or self._passes % self.full_scan_every == 0
+            self._passes += 1
+            old = self._dirs
+            new: Dict[str, _Dir] = {}
+            devices: Dict[str, int] = {}
+            listed = skipped = 0
+            for category, root in self.roots:
+                try:
+                    st = os.stat(root)
+                except OSError:
+                    continue
+                devices[root] = st.st_dev
+                patterns = FILE_PATTERNS.get(category)
+                stack = [(root, st.st_mtime_ns)]
+                while stack:
+                    path, mtime_ns = stack.pop()
+                    if path in new:
+                        continue  # nested roots
+                    cached = old.get(path)
+                    if not full and cached is not None and cached.mtime_ns == mtime_ns:
+                        entry = cached
+                        # Subdirectories may have changed on their own
+                        entry.subdirs = [(sub, m) for sub, m in (self._stat_dir(s) for s, _ in cached.subdirs) if sub]
+                        skipped += 1
+                    else:
+                        entry = self._list(path, mtime_ns, category, root, st.st_dev, patterns)
+                        if entry is None:
+                            continue
+                        listed += 1
+                    new[path] = entry
+                    stack.extend(entry.subdirs)
+            with self._lock:
+                self._dirs = new
+                self._root_devices = devices
+            self.last_scan = {'full': full, 'dirs_listed': listed, 'dirs_skipped': skipped,
+                              'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+                              'finished_at': time.time()}
+            return self.last_scan
+
+    @staticmethod
+    def _stat_dir(path: str) -> Tuple[Optional[str], int]:
+        try:
+            return path, os.stat(path, follow_symlinks=False).st_mtime_ns
+        except OSError:
+            return None, 0  # removed since the last pass
+
+    @staticmethod
+    def _list(path: str, mtime_ns: int, category: str, root: str, device: int,
+              patterns: Optional[Sequence[str]]) -> Optional[_Dir]:
+        entry = _Dir(mtime_ns, category, root)
+        try:
+            with os.scandir(path) as it:
+                for item in it:
+                    try:
+                        if item.is_dir(follow_symlinks=False):
+                            if getattr(item, 'is_junction', bool)():
+                                continue
+                            st = item.stat(follow_symlinks=False)
+                            if _WINDOWS or st.st_dev == device:
+                                entry.subdirs.append((item.path, st.st_mtime_ns))
+                        elif item.is_file(follow_symlinks=False):
+                            if patterns and not any(fnmatch.fnmatch(item.name, p) for p in patterns):
+                                continue
+                            st = item.stat(follow_symlinks=False)
+                            entry.files[item.name] = (st.st_size, st.st_mtime)
+                    except OSError:
+                        continue
+        except OSError:
+            return None  # permission denied or removed meanwhile
+        return entry
+
+    # --- Queries ---
+
+    def _selected(self, categories: Optional[Iterable[str]], device: Optional[int]) -> List[Tuple[str, _Dir]]:
+        categories = set(categories) if categories else None
+        return [(path, d) for path, d in self._dirs.items()
+                if (categories is None or d.category in categories)
+                and (device is None or self._root_devices.get(d.root) == device)]
+
+    def summary(self, categories: Optional[Iterable[str]] = None, device: Optional[int] = None,
+                now: Optional[float] = None) -> Dict[str, Dict[str, int]]:
+        """Per category: indexed files and bytes, and how much of that is reclaimable now."""
+        cutoff = (time.time() if now is None else now) - self.min_age
+        result: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            for _, d in self._selected(categories, device):
+                totals = result.setdefault(d.category, {'files': 0, 'bytes': 0, 'reclaimable_files': 0,
+                                                        'reclaimable_bytes': 0})
+                for size, mtime in d.files.values():
+                    totals['files'] += 1
+                    totals['bytes'] += size
+                    if mtime < cutoff:
+                        totals['reclaimable_files'] += 1
+                        totals['reclaimable_bytes'] += size
+        return result
+
+    def candidates(self, categories: Optional[Iterable[str]] = None, device: Optional[int] = None,
+                   now: Optional[float] = None) -> List[Tuple[str, int]]:
+        """(path, size) of reclaimable files, largest first."""
+        cutoff = (time.time() if now is None else now) - self.min_age
+        with self._lock:
+            found = [(os.path.join(path, name), size)
+                     for path, d in self._selected(categories, device)
+                     for name, (size, mtime) in d.files.items() if mtime < cutoff]
+        found.sort(key=lambda item: -item[1])
+        return found
+
+    def reclaim(self, categories: Optional[Iterable[str]] = None, device: Optional[int] = None,
+                dry_run: bool = False, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Delete reclaimable files. Each file is re-checked (still a regular
+        file, still old enough) right before it is removed; the bytes freed
+        are counted from those checks.
+        """
+        cutoff = (time.time() if now is None else now) - self.min_age
+        freed = deleted = skipped = failed = 0
+        updates: Dict[str, Optional[Tuple[int, float]]] = {}  # path -> new (size, mtime), None = gone
+        for path, _ in self.candidates(categories, device, now):
+            try:
+                st = os.stat(path, follow_symlinks=False)
+            except OSError:
+                updates[path] = None
+                skipped += 1
+                continue
+            if not stat.S_ISREG(st.st_mode) or st.st_mtime >= cutoff:
+                updates[path] = (st.st_size, st.st_mtime) if stat.S_ISREG(st.st_mode) else None
+                skipped += 1
+                continue
+            if not dry_run:
+                try:
+                    os.remove(path)
+                except OSError:
+                    failed += 1  # in use or no permission
+                    continue
+                updates[path] = None
+            freed += st.st_size
+            deleted += 1
+        with self._lock:
+            for path, value in updates.items():
+                d = self._dirs.get(os.path.dirname(path))
+                if d is None:
+                    continue
+                if value is None:
+                    d.files.pop(os.path.basename(path), None)
+                else:
+                    d.files[os.path.basename(path)] = value
+        return {'freed_bytes': freed, 'files_deleted': deleted, 'skipped': skipped, 'failed': failed,
+                'dry_run': dry_run}
+
+    def free_space(self, mount: Optional[str] = None, dry_run: bool = False) -> Tuple[bool, str, Dict[str, Any]]:
+        """
+        Remediation body for a full volume (the system volume by default):
+        reclaim everything indexed on it. Returns (success, output, extra)
+        like the executors.
+        """
+        mount = mount or system_mount()
+        device = self.device_of(mount)
+        if device is None:
+            return False, f"Volume {mount} is not accessible.", {}
+        categories = sorted(c for c, totals in self.summary(device=device).items() if totals['reclaimable_files'])
+        if not categories:
+            return True, f"Nothing to reclaim on {mount} (index updated {self._age()} ago).", {}
+        result = self.reclaim(categories, device=device, dry_run=dry_run)
+        mb = result['freed_bytes'] / 1024 ** 2
+        verb = "Would free" if dry_run else "Freed"
+        output = f"{verb} {mb:.1f}MB on {mount} ({result['files_deleted']} files in {', '.join(categories)})"
+        if result['failed']:
+            output += f"; {result['failed']} files in use or not permitted"
+        return True, output, {'files_deleted': ", ".join(categories), 'freed_bytes': result['freed_bytes']}
+
+    def _age(self) -> str:
+        finished = self.last_scan.get('finished_at')
+        return f"{time.time() - finished:.0f}s" if finished else "never"
+
+    def device_of(self, path: str) -> Optional[int]:
+        """Device id of a mount point, to restrict summary/reclaim to one volume."""
+        try:
+            return os.stat(path).st_dev
+        except OSError:
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.last_scan, roots=len(self.roots), dirs=len(self._dirs))
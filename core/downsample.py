@@ -0,0 +1,58 @@
+from typing import List, Sequence
+
+
+def lttb(rows: List[dict], max_points: int, x_key: str, y_keys: Sequence[str]) -> List[dict]:
+    """
+    Largest-Triangle-Three-Buckets downsampling over several series at once.
+
+    Rows are kept whole (one timestamp shared by all series); the triangle
+    area used to pick each bucket's representative is summed across `y_keys`
+    so a spike in any series survives. First and last rows are always kept.
+    """
+    n = len(rows)
+    if max_points >= n or max_points < 3:
+        return list(rows) if max_points >= n else rows[:1] + rows[-1:]
+    xs = [row[x_key] for row in rows]
+    columns = [[row.get(k) for row in rows] for k in y_keys]
+    return [rows[i] for i in lttb_indices(xs, columns, max_points)]
+
+
+def lttb_indices(xs: Sequence[float], columns: Sequence[Sequence[float]], max_points: int) -> List[int]:
+    """
+    LTTB on columns (e.g. the time-series store's arrays): returns the
+    indices of the points to keep. Missing values (None/NaN) count as 0.
+    """
+    n = len(xs)
+    if max_points >= n or max_points < 3:
+        return list(range(n)) if max_points >= n else [0, n - 1]
+    xs = list(xs)
+    ys = [[0.0 if v is None or v != v else v for v in column] for column in columns]
+
+    sampled = [0]
+    every = (n - 2) / (max_points - 2)
+    a = 0
+    for i in range(max_points - 2):
+        # Average point of the next bucket
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = [sum(column[next_start:next_end]) / span for column in ys]
+
+        # Pick the point in this bucket forming the largest triangle
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax = xs[a]
+        a_y = [column[a] for column in ys]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            bx = xs[j]
+            area = 0.0
+            for column, ay, avg in zip(ys, a_y, avg_y):
+                area += abs((ax - avg_x) * (column[j] - ay) - (ax - bx) * (avg - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(best)
+        a = best
+    sampled.append(n - 1)
+    return sampled
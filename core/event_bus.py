@@ -0,0 +1,100 @@
+import json
+import threading
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import fields
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+HEARTBEAT_SECONDS = 15
+
+
+class EventBus:
+    """
+    In-process publish/subscribe for the dashboard push channel.
+
+    Every message gets a monotonically increasing id and is kept in a bounded
+    backlog, so a reconnecting client that sends its last seen id
+    (the SSE Last-Event-ID header) gets everything it missed. If the client
+    is further behind than the backlog, it receives a 'reset' message and
+    should reload its state over the regular REST endpoints.
+    """
+
+    def __init__(self, backlog: int = 1000):
+        self._backlog: Deque[Tuple[int, str, str]] = deque(maxlen=backlog)
+        self._cond = threading.Condition()
+        self._last_id = 0
+        self._closed = False
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def publish(self, kind: str, data: Any) -> int:
+        payload = json.dumps(data, default=str)
+        with self._cond:
+            self._last_id += 1
+            self._backlog.append((self._last_id, kind, payload))
+            self._cond.notify_all()
+            return self._last_id
+
+    def close(self):
+        """End every open stream (shutdown), so server threads aren't held by idle clients."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _since(self, last_id: int):
+        """Messages newer than last_id, or None if some were already evicted."""
+        if last_id > self._last_id:
+            return None  # id from before a server restart
+        if not self._backlog or last_id == self._last_id:
+            return []
+        if self._backlog[0][0] > last_id + 1:
+            return None
+        return [m for m in self._backlog if m[0] > last_id]
+
+    def stream(self, last_id: Optional[int] = None, stop: Optional[threading.Event] = None) -> Iterator[str]:
+        """
+        Yield Server-Sent Events frames. Blocks between messages and emits a
+        comment heartbeat every HEARTBEAT_SECONDS so proxies keep the
+        connection open.
+        """
+        if last_id is None:
+            last_id = self._last_id
+        yield "retry: 3000\n\n"
+        while stop is None or not stop.is_set():
+            with self._cond:
+                pending = self._since(last_id)
+                if pending == [] and not self._closed:
+                    self._cond.wait(HEARTBEAT_SECONDS)
+                    pending = self._since(last_id)
+                if self._closed:
+                    return
+            if pending is None:
+                last_id = self._last_id
+                yield format_sse(last_id, 'reset', '{}')
+                continue
+            if not pending:
+                yield ": heartbeat\n\n"
+                continue
+            for msg_id, kind, payload in pending:
+                yield format_sse(msg_id, kind, payload)
+            last_id = pending[-1][0]
+
+
+def format_sse(msg_id: int, kind: str, payload: str) -> str:
+    return f"id: {msg_id}\nevent: {kind}\ndata: {payload}\n\n"
+
+
+def row_payload(obj, **extra) -> Dict[str, Any]:
+    """
+    Dict of a model dataclass for publishing. Pending write-queue Futures
+    (ids / foreign keys) are replaced by their results, so only call this once
+    the row has been written.
+    """
+    data = {}
+    for f in fields(obj):
+        value = getattr(obj, f.name)
+        data[f.name] = value.result() if isinstance(value, Future) else value
+    data.update(extra)
+    return data
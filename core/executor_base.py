@@ -17,13 +17,13 @@ class ExecutorBase(ABC):
         """
         pass
 
-def get_executor() -> 'ExecutorBase':
+def get_executor(reclaim=None) -> 'ExecutorBase':
     system = platform.system()
     if system == 'Darwin' or system == 'Linux':
         from platforms.mac.executor_mac import MacExecutor
-        return MacExecutor()
+        return MacExecutor(reclaim=reclaim)
     elif system == 'Windows':
         from platforms.windows.executor_windows import WindowsExecutor
-        return WindowsExecutor()
+        return WindowsExecutor(reclaim=reclaim)
     else:
         raise NotImplementedError(f"Unsupported platform: {system}")
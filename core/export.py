@@ -0,0 +1,126 @@
+"""
+Streaming export of events, actions and the audit log (NDJSON or CSV,
+optionally gzip'd) for /api/export/<dataset> and the command line:
+
+    python -m core.export audit --from 2026-01-01 --format csv --gzip -o audit.csv.gz
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from . import queries
+from .history import parse_time
+
+FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+DEFAULT_PAGE_SIZE = 2000
+MAX_PAGE_SIZE = 20000
+# Encoded output is handed to the caller (response / file) in pieces of about this size
+FLUSH_BYTES = 256 * 1024
+
+
+def _ndjson(names: Sequence[str], rows: List[tuple]) -> str:
+    dumps = json.dumps
+    return ''.join(dumps(dict(zip(names, row)), separators=(',', ':')) + '\n' for row in rows)
+
+
+def _csv(writer, buf: io.StringIO, rows: List[tuple]) -> str:
+    writer.writerows(rows)
+    text = buf.getvalue()
+    buf.seek(0)
+    buf.truncate()
+    return text
+
+
+def export(conn, name: str, fmt: str = 'ndjson', compress: bool = False,
+           since: Optional[float] = None, until: Optional[float] = None,
+           filters: Optional[Dict[str, Sequence[str]]] = None,
+           page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[bytes]:
+    """
+    Encoded export as a stream of byte chunks; memory stays at about one page
+    of rows plus FLUSH_BYTES regardless of the export size. CSV starts with a
+    header row. With `compress` the chunks form a single gzip stream.
+    """
+    dataset = queries.dataset(name)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'")
+    # Validated up front (not inside the generator) so callers can still answer 400
+    queries.check_filters(dataset, filters)
+    pages = queries.iter_pages(conn, name, since, until, filters, max(1, min(page_size, MAX_PAGE_SIZE)))
+    return _encode(dataset.names, pages, fmt, compress)
+
+
+def _encode(names: List[str], pages: Iterator[List[tuple]], fmt: str, compress: bool) -> Iterator[bytes]:
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    if fmt == 'csv':
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator='\n')
+        writer.writerow(names)
+        encode = lambda rows: _csv(writer, buf, rows)
+    else:
+        encode = lambda rows: _ndjson(names, rows)
+
+    def chunk(text: str) -> bytes:
+        data = text.encode('utf-8')
+        return gzip.compress(data) if gzip else data
+
+    pending = [chunk(encode([]))]
+    size = len(pending[0])
+    for rows in pages:
+        pending.append(chunk(encode(rows)))
+        size += len(pending[-1])
+        if size >= FLUSH_BYTES:
+            yield b''.join(pending)
+            pending, size = [], 0
+    if gzip:
+        pending.append(gzip.flush())
+    data = b''.join(pending)
+    if data:
+        yield data
+
+
+def filename(name: str, fmt: str, compress: bool) -> str:
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    return f"{name}-{stamp}.{fmt}{'.gz' if compress else ''}"
+
+
+def main(argv=None):
+    from .logging_db import DB_PATH, DatabaseManager
+
+    parser = argparse.ArgumentParser(prog='python -m core.export', description='Export events, actions or the audit log.')
+    parser.add_argument('dataset', choices=sorted(queries.DATASETS))
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--format', choices=sorted(FORMATS), default='ndjson')
+    parser.add_argument('--gzip', action='store_true')
+    parser.add_argument('--from', dest='since', help='epoch seconds or ISO-8601')
+    parser.add_argument('--to', dest='until', help='epoch seconds or ISO-8601 (exclusive)')
+    parser.add_argument('--filter', action='append', default=[], metavar='NAME=V1,V2',
+                        help='e.g. type=cpu_high,memory_high; repeatable')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument('-o', '--output', help='file to write (default: stdout)')
+    args = parser.parse_args(argv)
+
+    filters = {}
+    for item in args.filter:
+        key, _, values = item.partition('=')
+        filters[key] = [v for v in values.split(',') if v]
+    db = DatabaseManager(args.db)
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        for chunk in export(db.pool.reader(), args.dataset, args.format, args.gzip,
+                            parse_time(args.since), parse_time(args.until), filters, args.page_size):
+            out.write(chunk)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        if args.output:
+            out.close()
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+import json
+import math
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+from .downsample import lttb
+from .history import DEFAULT_MAX_POINTS, MAX_POINTS_LIMIT, SERIES
+
+KINDS = ('metrics', 'event', 'action')
+MAX_BATCH_BYTES = 8 * 1024 * 1024  # decompressed
+MAX_BATCH_ITEMS = 20000
+MAX_HOST_LENGTH = 255
+
+# Fields the collector stores per kind (see DatabaseManager.ingest_batch); the
+# required ones are NOT NULL in the fleet tables
+FIELDS = {
+    'metrics': ('cpu_percent', 'memory_percent', 'disk_percent'),
+    'event': ('type', 'severity', 'description', 'metric_value', 'threshold', 'target'),
+    'action': ('event_id', 'type', 'status', 'output', 'duration_ms', 'target_process', 'target_service'),
+}
+REQUIRED = {'event': ('type',), 'action': ('type',)}
+SCALARS = (str, int, float, bool, type(None))
+# Integer range of SQLite INTEGER columns; ts is stored as int(ts), with headroom below it
+MAX_TS = 2 ** 62
+MAX_INTEGER = 2 ** 63 - 1
+
+
+class IngestError(ValueError):
+    """
+    An agent batch that cannot be accepted (malformed, too large, wrong
+    encoding). `invalid` lists the offending items as {'index', 'error'}, so
+    the agent can resend the batch without them.
+    """
+
+    def __init__(self, message: str, invalid: Optional[List[Dict[str, Any]]] = None):
+        super().__init__(message)
+        self.invalid = invalid or []
+
+
+def _item_error(item: Dict[str, Any]) -> Optional[str]:
+    """Why the writer could not store this item, or None."""
+    kind, data, ts = item['kind'], item.get('data'), item.get('ts')
+    # bool is an int subclass; json.loads also yields NaN/Infinity and unbounded ints
+    if not isinstance(data, dict) or not isinstance(ts, (int, float)) or isinstance(ts, bool):
+        return "needs a numeric 'ts' and a 'data' object"
+    if not (math.isfinite(ts) and 0 <= ts < MAX_TS):
+        return "'ts' must be epoch seconds"
+    if kind != 'metrics':
+        row_id = data.get('id')
+        if not isinstance(row_id, int) or isinstance(row_id, bool) or not 0 <= row_id <= MAX_INTEGER:
+            return f"'{kind}' items need the agent's row 'id'"
+    for field in REQUIRED.get(kind, ()):
+        if not isinstance(data.get(field), str) or not data[field]:
+            return f"'{kind}' items need a non-empty '{field}'"
+    for field in FIELDS[kind]:
+        value = data.get(field)
+        if not isinstance(value, SCALARS) or (isinstance(value, int) and abs(value) > MAX_INTEGER):
+            return f"'{field}' must be a string, number or null"
+    return None
+
+
+def _gunzip(body: bytes, limit: int) -> bytes:
+    # Bounded decompression: a small gzip body must not expand without limit
+    inflater = zlib.decompressobj(wbits=31)
+    try:
+        data = inflater.decompress(body, limit + 1)
+    except zlib.error as e:
+        raise IngestError(f"Invalid gzip body: {e}")
+    if len(data) > limit or inflater.unconsumed_tail:
+        raise IngestError(f"Batch exceeds {limit} bytes")
+    return data
+
+
+def decode_batch(body: bytes, content_encoding: Optional[str] = None, max_bytes: int = MAX_BATCH_BYTES) -> Dict[str, Any]:
+    """
+    Parse and validate an agent batch:
+        {"host": str, "agent_version": str, "batch_id": str, "sent_at": float,
+         "items": [{"kind": "metrics" | "event" | "action", "ts": epoch, "data": {...}}]}
+    Items of unknown kinds are dropped so newer agents can talk to older collectors.
+    Every other item is checked up front: the batch is written after the 202,
+    so a row the database would refuse must fail the request instead.
+    """
+    encoding = (content_encoding or '').strip().lower()
+    if encoding == 'gzip':
+        body = _gunzip(body, max_bytes)
+    elif encoding not in ('', 'identity'):
+        raise IngestError(f"Unsupported Content-Encoding: {content_encoding}")
+    elif len(body) > max_bytes:
+        raise IngestError(f"Batch exceeds {max_bytes} bytes")
+
+    try:
+        batch = json.loads(body)
+    except ValueError as e:
+        raise IngestError(f"Invalid JSON: {e}")
+    if not isinstance(batch, dict):
+        raise IngestError("Batch must be a JSON object")
+    host = batch.get('host')
+    if not isinstance(host, str) or not host or len(host) > MAX_HOST_LENGTH:
+        raise IngestError("'host' must be a non-empty string")
+    items = batch.get('items')
+    if not isinstance(items, list):
+        raise IngestError("'items' must be a list")
+    if len(items) > MAX_BATCH_ITEMS:
+        raise IngestError(f"Batch has more than {MAX_BATCH_ITEMS} items")
+
+    valid, invalid = [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or item.get('kind') not in KINDS:
+            continue
+        error = _item_error(item)
+        if error:
+            invalid.append({'index': index, 'error': error})
+        else:
+            valid.append({'kind': item['kind'], 'ts': item['ts'], 'data': item['data']})
+    if invalid:
+        raise IngestError(f"{len(invalid)} invalid item(s), first: item {invalid[0]['index']} {invalid[0]['error']}",
+                          invalid)
+
+    version = batch.get('agent_version')
+    return {
+        'host': host,
+        'agent_version': str(version) if version is not None else None,
+        'batch_id': batch.get('batch_id'),
+        'items': valid,
+    }
+
+
+class FleetService:
+    """
+    Collector side of agent mode.
+
+    `ingest()` hands a decoded batch to the write-behind queue as a single
+    item, so the writer commits many agents' batches per transaction and the
+    request thread never waits on SQLite. Reads add online/offline status
+    (no batch for `offline_after` seconds) and LTTB-downsampled host series.
+    """
+
+    def __init__(self, db_manager, write_queue, offline_after: float = 180, retention_days: Optional[float] = 7):
+        self.db = db_manager
+        self.write_queue = write_queue
+        self.offline_after = offline_after
+        self.retention_days = retention_days
+        self.batches = 0
+        self.items = 0
+
+    def ingest(self, batch: Dict[str, Any]):
+        """Queue a decoded batch. Raises WriteQueueFull when the writer is saturated."""
+        future = self.write_queue.submit_fleet_batch(batch)
+        self.batches += 1
+        self.items += len(batch['items'])
+        return future
+
+    def hosts(self, now: Optional[float] = None) -> List[dict]:
+        now = time.time() if now is None else now
+        hosts = self.db.get_fleet_hosts()
+        for host in hosts:
+            host['status'] = 'online' if now - host['last_seen'] <= self.offline_after else 'offline'
+        return hosts
+
+    def host_metrics(self, name: str, since: Optional[float] = None, until: Optional[float] = None,
+                     max_points: int = DEFAULT_MAX_POINTS) -> Optional[Dict[str, Any]]:
+        host = self.db.get_fleet_host(name)
+        if host is None:
+            return None
+        until = time.time() + 1 if until is None else until  # include the current second
+        since = until - 3600 if since is None else since
+        if since >= until:
+            raise ValueError("'from' must be earlier than 'to'")
+        max_points = max(3, min(int(max_points), MAX_POINTS_LIMIT))
+        points = lttb(self.db.get_fleet_metrics(host['id'], since, until), max_points, 'ts', SERIES)
+        return {'host': name, 'points': points}
+
+    def host_events(self, name: str, limit: int = 100) -> Optional[List[dict]]:
+        host = self.db.get_fleet_host(name)
+        return None if host is None else self.db.get_fleet_events(host['id'], limit)
+
+    def host_actions(self, name: str, limit: int = 50) -> Optional[List[dict]]:
+        host = self.db.get_fleet_host(name)
+        return None if host is None else self.db.get_fleet_actions(host['id'], limit)
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Scheduled job: drop fleet rows older than `retention_days`."""
+        if not self.retention_days:
+            return 0
+        now = time.time() if now is None else now
+        return self.db.prune_fleet(now - self.retention_days * 86400)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'batches': self.batches, 'items': self.items, 'write_queue_pending': self.write_queue.pending}
@@ -0,0 +1,276 @@
+import datetime
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+LN2 = math.log(2)
+# Projections further out than this are reported as no ETA
+MAX_ETA_SECONDS = 365 * 86400
+
+
+class _DecayedMean:
+    """Exponentially weighted mean over time; normalized, so early values are not biased toward 0."""
+
+    def __init__(self, half_life: float):
+        self.half_life = half_life
+        self._sum = self._weight = 0.0
+
+    def add(self, value: float, dt: float):
+        keep = math.exp(-LN2 * dt / self.half_life)
+        self._sum = keep * self._sum + value
+        self._weight = keep * self._weight + 1.0
+
+    @property
+    def value(self) -> float:
+        return self._sum / self._weight if self._weight else 0.0
+
+
+class DecayedLinearTrend:
+    """
+    Online least-squares line with exponential forgetting (half-life in
+    seconds). Keeps five weighted sums with the time origin at the latest
+    sample, so each update is O(1) and the sums never grow ill-conditioned.
+    A long half-life suits slow, steady growth (disk); a short one follows
+    level shifts (memory).
+
+    `noise` is the typical one-step prediction error, with outliers clipped
+    at 4 sigma; `fit_error` is the RMS residual of the line over its window.
+    A sudden step (a large download, say) leaves fit_error well above noise
+    until it has aged out, while a genuine trend keeps them about equal.
+    """
+
+    def __init__(self, half_life: float):
+        self.half_life = half_life
+        self.last_ts: Optional[float] = None
+        self.samples = 0
+        self._w = self._wx = self._wxx = self._wy = self._wxy = self._wyy = 0.0
+        self._noise = _DecayedMean(half_life)  # squared one-step prediction error
+
+    def update(self, ts: float, value: float):
+        if self.last_ts is not None:
+            dt = max(0.0, ts - self.last_ts)
+            if self.samples >= 2:
+                error = (value - self.predict(ts)) ** 2
+                if self.samples >= 10:
+                    error = min(error, 16 * self._noise.value)
+                self._noise.add(error, dt)
+            # Move the origin to `ts` (x -> x - dt), then decay
+            w, wx, wy = self._w, self._wx, self._wy
+            self._wxy -= dt * wy
+            self._wxx += -2 * dt * wx + dt * dt * w
+            self._wx -= dt * w
+            decay = math.exp(-LN2 * dt / self.half_life)
+            self._w, self._wx, self._wxx, self._wy, self._wxy, self._wyy = (
+                s * decay for s in (self._w, self._wx, self._wxx, self._wy, self._wxy, self._wyy))
+        self._w += 1.0
+        self._wy += value
+        self._wyy += value * value
+        self.last_ts = ts
+        self.samples += 1
+
+    @property
+    def slope(self) -> Optional[float]:
+        """Units per second."""
+        denom = self._w * self._wxx - self._wx * self._wx
+        if self.samples < 2 or denom <= 1e-12 * max(1.0, self._w * self._wxx):
+            return None
+        return (self._w * self._wxy - self._wx * self._wy) / denom
+
+    @property
+    def level(self) -> Optional[float]:
+        """Fitted value at the latest sample."""
+        if not self._w:
+            return None
+        slope = self.slope or 0.0
+        return (self._wy - slope * self._wx) / self._w
+
+    @property
+    def noise(self) -> float:
+        return math.sqrt(self._noise.value)
+
+    @property
+    def fit_error(self) -> float:
+        if not self._w:
+            return 0.0
+        slope = self.slope or 0.0
+        sse = (self._wyy - self._wy * self._wy / self._w
+               - slope * (self._wxy - self._wx * self._wy / self._w))
+        return math.sqrt(max(sse, 0.0) / self._w)
+
+    @property
+    def slope_error(self) -> Optional[float]:
+        """Standard error of the slope (weights treated as sample counts)."""
+        spread = self._wxx - self._wx * self._wx / self._w if self._w else 0.0
+        return self.noise / math.sqrt(spread) if spread > 0 else None
+
+    def predict(self, ts: float) -> Optional[float]:
+        level = self.level
+        if level is None:
+            return None
+        return level + (self.slope or 0.0) * (ts - self.last_ts)
+
+
+@dataclass(frozen=True)
+class ForecastSeries:
+    """
+    One forecast series and the settings key of the threshold it must stay
+    under. One model runs per half-life: the long one is stable, the short
+    one catches growth that starts after a flat period.
+    """
+    series: str
+    threshold_key: str
+    default_threshold: float
+    label: str
+    category: str
+    action_type: str
+    advice: str
+    half_lives_hours: Tuple[float, ...]
+
+
+DEFAULT_SERIES = (
+    ForecastSeries('disk_percent', 'disk_threshold', 90.0, 'Disk usage', 'forecast_disk', 'free_disk_space',
+                   'Free space or extend the volume before then.', (6.0, 0.5)),
+    ForecastSeries('memory_percent', 'memory_threshold', 85.0, 'Memory usage', 'forecast_memory', 'close_app',
+                   'Check for a process whose memory keeps growing.', (1.0, 0.25)),
+)
+
+
+class ExhaustionForecaster:
+    """
+    Predicts when disk and memory usage will cross their configured
+    thresholds.
+
+    Each sample updates a DecayedLinearTrend per series and half-life in
+    O(1), so a forecast never refits over history. A model's forecast
+    counts once it has seen `min_span_seconds` of data, its slope is at
+    least three standard errors above zero and the line fits its window
+    (fit_error within 1.5x noise, which rules out recent steps); the
+    earliest such ETA wins.
+
+    `due()` returns the forecasts that should become recommendations: ETA
+    within `horizon_hours`, and no earlier recommendation for the series in
+    the last `rewarn_hours` unless the ETA has at least halved since.
+    """
+
+    def __init__(self, horizon_hours: float = 48, min_span_seconds: float = 1800, rewarn_hours: float = 12,
+                 series: Iterable[ForecastSeries] = DEFAULT_SERIES):
+        self.horizon = horizon_hours * 3600
+        self.min_span = min_span_seconds
+        self.rewarn = rewarn_hours * 3600
+        self.specs = {spec.series: spec for spec in series}
+        self._models = {name: [DecayedLinearTrend(hours * 3600) for hours in spec.half_lives_hours]
+                        for name, spec in self.specs.items()}
+        self._first_ts: Dict[str, float] = {}
+        self._warned: Dict[str, tuple] = {}  # series -> (warned at, eta then)
+        self._lock = threading.Lock()
+
+    def observe(self, ts: float, metrics: Mapping[str, Any]):
+        """Sampler listener body: one O(1) model update per series."""
+        with self._lock:
+            for name, models in self._models.items():
+                value = metrics.get(name)
+                if value is None or value != value:
+                    continue
+                if models[0].last_ts is not None and ts <= models[0].last_ts:
+                    continue
+                self._first_ts.setdefault(name, ts)
+                for model in models:
+                    model.update(ts, float(value))
+
+    def warm_start(self, rows: Iterable[Mapping[str, Any]]):
+        """Feed history rows (oldest first, with 'ts' or 'timestamp') once at startup."""
+        for row in rows:
+            ts = row.get('ts')
+            if ts is None:
+                ts = datetime.datetime.fromisoformat(row['timestamp']).timestamp()
+            self.observe(ts, row)
+
+    def load(self, db_manager):
+        """Pending forecast recommendations from a previous run count as already warned."""
+        categories = {spec.category: name for name, spec in self.specs.items()}
+        for rec in db_manager.get_pending_recommendations(limit=50):
+            name = categories.get(rec.get('category'))
+            if name and name not in self._warned:
+                warned_at = datetime.datetime.fromisoformat(rec['timestamp']).timestamp()
+                self._warned[name] = (warned_at, None)
+
+    def forecast(self, config_snapshot: Mapping[str, Any], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Current model state and time-to-threshold per series."""
+        now = time.time() if now is None else now
+        results = []
+        with self._lock:
+            for name, models in self._models.items():
+                spec = self.specs[name]
+                threshold = float(config_snapshot.get(spec.threshold_key, spec.default_threshold))
+                candidates = [self._forecast(name, model, threshold, now) for model in models]
+                confident = [c for c in candidates if c['confident'] and c['eta_seconds'] is not None]
+                results.append(min(confident, key=lambda c: c['eta_seconds']) if confident else candidates[0])
+        return results
+
+    def _forecast(self, name, model: DecayedLinearTrend, threshold: float, now: float) -> Dict[str, Any]:
+        result = {'series': name, 'threshold': threshold, 'samples': model.samples,
+                  'half_life_hours': model.half_life / 3600,
+                  'current': None, 'rate_per_hour': None, 'eta_seconds': None, 'eta': None, 'confident': False}
+        if model.last_ts is None:
+            return result
+        current = model.predict(max(now, model.last_ts))
+        slope = model.slope
+        span = model.last_ts - self._first_ts.get(name, model.last_ts)
+        result['current'] = round(current, 2)
+        if slope is not None:
+            result['rate_per_hour'] = round(slope * 3600, 4)
+        error = model.slope_error
+        result['confident'] = (span >= self.min_span and slope is not None and error is not None
+                               and slope > 3 * error
+                               and model.fit_error <= max(1.5 * model.noise, 1e-6 * abs(current)))
+        if current >= threshold:
+            result['eta_seconds'] = 0
+        elif slope and slope > 0 and (threshold - current) / slope <= MAX_ETA_SECONDS:
+            result['eta_seconds'] = int((threshold - current) / slope)
+        if result['eta_seconds'] is not None:
+            result['eta'] = datetime.datetime.fromtimestamp(now + result['eta_seconds']).isoformat(timespec='minutes')
+        return result
+
+    def due(self, config_snapshot: Mapping[str, Any], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Forecasts that should be written as recommendations now, each with
+        'category', 'action_type', 'priority' and 'text'. Marks them as warned.
+        """
+        now = time.time() if now is None else now
+        due = []
+        for result in self.forecast(config_snapshot, now):
+            eta = result['eta_seconds']
+            # Already over the threshold: the analyzer's events cover that
+            if not result['confident'] or not eta or eta > self.horizon:
+                continue
+            name = result['series']
+            warned_at, warned_eta = self._warned.get(name, (None, None))
+            if warned_at is not None and now - warned_at < self.rewarn and (warned_eta is None or eta > warned_eta / 2):
+                continue
+            self._warned[name] = (now, eta)
+            spec = self.specs[name]
+            due.append(dict(
+                result,
+                category=spec.category,
+                action_type=spec.action_type,
+                priority='high' if eta < 24 * 3600 else 'medium',
+                text=(f"{spec.label} is projected to reach {result['threshold']:.0f}% in about "
+                      f"{_duration(eta)} (around {result['eta']}), growing {result['rate_per_hour']:.2f}% per hour. "
+                      f"{spec.advice}")
+            ))
+        return due
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {name: {'samples': models[0].samples, 'noise': [round(m.noise, 4) for m in models]}
+                    for name, models in self._models.items()}
+
+
+def _duration(seconds: float) -> str:
+    if seconds < 2 * 3600:
+        return f"{max(1, round(seconds / 60))} minutes"
+    if seconds < 72 * 3600:
+        return f"{round(seconds / 3600)} hours"
+    return f"{round(seconds / 86400)} days"
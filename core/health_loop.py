@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
+
+from .error_handling import logger
+
+URGENT, NORMAL, IDLE = 'urgent', 'normal', 'idle'
+
+
+class AdaptiveHealthLoop:
+    """
+    Runs the health check as a single APScheduler job that never overlaps
+    itself (max_instances=1, coalesce) and adapts its own interval.
+
+    After every cycle `assess()` reports the host state:
+    - URGENT (open incident, metric near a threshold): `fast` interval,
+      applied immediately
+    - NORMAL: `normal` interval
+    - IDLE: `slow` interval, only after `idle_cycles` idle cycles in a row so
+      the loop does not flap between speeds
+
+    Cycle latency and skipped/missed runs are counted for stats().
+    """
+
+    def __init__(self, job: Callable[[], Any], assess: Callable[[], str], fast: float = 5, normal: float = 30,
+                 slow: float = 60, idle_cycles: int = 10, job_id: str = 'health_check', history: int = 120):
+        self.job = job
+        self.assess = assess
+        self.intervals = {URGENT: fast, NORMAL: normal, IDLE: slow}
+        self.idle_cycles = idle_cycles
+        self.job_id = job_id
+        self.scheduler = None
+        self.interval = normal
+        self.mode = NORMAL
+        self._idle_streak = 0
+        self._running = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=history)
+        self.cycles = 0
+        self.failures = 0
+        self.skipped = 0  # a run came due while the previous one was still running
+        self.missed = 0  # the scheduler could not start a run within its grace time
+        self.last_run: Optional[float] = None
+
+    def attach(self, scheduler):
+        self.scheduler = scheduler
+        scheduler.add_job(func=self.run, trigger='interval', seconds=self.interval, id=self.job_id,
+                          max_instances=1, coalesce=True, misfire_grace_time=max(1, int(self.interval)),
+                          replace_existing=True)
+        scheduler.add_listener(self._on_scheduler_event, EVENT_JOB_MAX_INSTANCES | EVENT_JOB_MISSED)
+
+    def run(self):
+        # Also guards manual calls racing the scheduled one
+        if not self._running.acquire(blocking=False):
+            self.skipped += 1
+            return
+        try:
+            started = time.perf_counter()
+            try:
+                self.job()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Health check cycle failed: {e}")
+            self._latencies.append(time.perf_counter() - started)
+            self.cycles += 1
+            self.last_run = time.time()
+            self._adapt()
+        finally:
+            self._running.release()
+
+    def _adapt(self):
+        try:
+            state = self.assess()
+        except Exception as e:
+            logger.error(f"Health loop assessment failed: {e}")
+            state = NORMAL
+
+        self._idle_streak = self._idle_streak + 1 if state == IDLE else 0
+        if state == IDLE and self._idle_streak < self.idle_cycles:
+            state = NORMAL
+        self.mode = state
+        interval = self.intervals[state]
+        if interval != self.interval:
+            logger.info(f"Health check interval {self.interval:g}s -> {interval:g}s ({state})")
+            self.interval = interval
+            if self.scheduler is not None:
+                self.scheduler.reschedule_job(self.job_id, trigger='interval', seconds=interval)
+
+    def _on_scheduler_event(self, event):
+        if getattr(event, 'job_id', None) != self.job_id:
+            return
+        if event.code == EVENT_JOB_MAX_INSTANCES:
+            self.skipped += 1
+        elif event.code == EVENT_JOB_MISSED:
+            self.missed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+        ms = lambda seconds: round(seconds * 1000, 1)
+        return {
+            'mode': self.mode,
+            'interval_seconds': self.interval,
+            'cycles': self.cycles,
+            'failures': self.failures,
+            'skipped_runs': self.skipped,
+            'missed_runs': self.missed,
+            'last_run': self.last_run,
+            'latency_ms': {
+                'last': ms(self._latencies[-1]) if latencies else None,
+                'avg': ms(sum(latencies) / len(latencies)) if latencies else None,
+                'p95': ms(latencies[int(0.95 * (len(latencies) - 1))]) if latencies else None,
+                'max': ms(latencies[-1]) if latencies else None,
+            },
+        }
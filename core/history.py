@@ -0,0 +1,124 @@
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from .downsample import lttb
+
+SERIES = ('cpu_percent', 'memory_percent', 'disk_percent')
+
+# Finest tier used for a given span (seconds). Raw rows arrive every sample
+# (~5s), so each choice keeps the number of rows read in the low thousands;
+# raw spans are usually served from the metrics ring.
+TIER_BY_SPAN = (
+    (6 * 3600, 'raw'),
+    (3 * 86400, '1m'),
+    (90 * 86400, '1h'),
+)
+
+DEFAULT_MAX_POINTS = 300
+MAX_POINTS_LIMIT = 2000
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Accept epoch seconds or an ISO-8601 string."""
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def pick_resolution(since: float, until: float) -> str:
+    span = until - since
+    for limit, tier in TIER_BY_SPAN:
+        if span <= limit:
+            return tier
+    return '1d'
+
+
+class HistoryService:
+    """
+    Range-aware metrics history for /api/history.
+
+    Picks raw samples or a rollup tier based on the requested span, then
+    downsamples to `max_points` with LTTB, so a week costs the same bandwidth
+    as the last minute. `since_id` returns only raw rows newer than the
+    client's last id for incremental updates.
+
+    With a TimeSeriesStore, raw reads it covers (latest rows, since_id,
+    recent ranges) are served from its columns without querying SQLite; its
+    ids are the metrics_history ids, so since_id works across both.
+    """
+
+    def __init__(self, db_manager, raw_retention_hours: float = 24, store=None):
+        self.db = db_manager
+        self.raw_retention_hours = raw_retention_hours
+        self.store = store
+
+    def query(self, since: Optional[float] = None, until: Optional[float] = None,
+              max_points: int = DEFAULT_MAX_POINTS, since_id: Optional[int] = None) -> Dict[str, Any]:
+        max_points = max(3, min(int(max_points), MAX_POINTS_LIMIT))
+
+        store = self.store
+        if since_id is not None:
+            oldest_id = store.oldest_id if store is not None else None
+            if oldest_id is not None and since_id >= oldest_id - 1:
+                points = store.after(int(since_id), max_points)
+            else:
+                points = self.db.get_metrics_since_id(int(since_id), limit=max_points)
+            return self._result('raw', points, since_id)
+
+        if since is None and until is None:
+            if store is not None and len(store) >= max_points:
+                points = store.latest(max_points)
+            else:
+                points = self.db.get_metrics_history(limit=max_points)
+            return self._result('raw', points, None)
+
+        until = time.time() if until is None else until
+        since = until - 3600 if since is None else since
+        if since >= until:
+            raise ValueError("'from' must be earlier than 'to'")
+
+        resolution = pick_resolution(since, until)
+        if resolution == 'raw' and since < time.time() - self.raw_retention_hours * 3600:
+            resolution = '1m'  # raw rows for that range were already pruned
+
+        if resolution == 'raw':
+            oldest = store.oldest_ts() if store is not None else None
+            if oldest is not None and since >= int(oldest):
+                # Entirely in memory: downsample on the columns
+                return self._result('raw', store.downsample(since, until, max_points), None)
+            if oldest is None or oldest >= until:
+                points = self.db.get_metrics_range(since, until)
+            else:
+                # Older part from SQLite, the rest (including undrained samples) from the store
+                split = int(oldest)
+                points = self.db.get_metrics_range(since, split) + store.range(split, until)
+        else:
+            points = [self._rollup_point(row) for row in self.db.get_metrics_rollup(resolution, since, until)]
+
+        points = lttb(points, max_points, 'ts', SERIES)
+        return self._result(resolution, points, None)
+
+    @staticmethod
+    def _rollup_point(row: dict) -> Dict[str, Any]:
+        return {
+            'timestamp': datetime.fromtimestamp(row['bucket_start']).isoformat(),
+            'ts': row['bucket_start'],
+            'cpu_percent': row['cpu_avg'],
+            'memory_percent': row['memory_avg'],
+            'disk_percent': row['disk_avg'],
+            'cpu_max': row['cpu_max'],
+            'memory_max': row['memory_max'],
+            'disk_max': row['disk_max'],
+        }
+
+    @staticmethod
+    def _result(resolution: str, points, since_id: Optional[int]) -> Dict[str, Any]:
+        last_id = since_id
+        for point in points:
+            if point.get('id') is not None:
+                last_id = max(last_id or 0, point['id'])
+        return {'resolution': resolution, 'points': points, 'last_id': last_id}
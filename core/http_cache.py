@@ -0,0 +1,241 @@
+"""
+Response layer for the Flask app:
+
+- `cached(version)` micro-caches a GET endpoint's serialized body per URL
+  until `version()` changes (e.g. the DB write version of the tables it
+  reads), so repeated polls skip the query and the JSON encoding.
+- Every 200 GET response with a body gets a strong ETag (a hash of the body)
+  and If-None-Match is answered with an empty 304.
+- JSON / text / JS / CSS bodies are gzip or brotli encoded per
+  Accept-Encoding; encoded bodies are cached by ETag, so an unchanged
+  payload is compressed once.
+- `asset_url(name)` links static files with a content hash (`?v=`); such
+  URLs are served as immutable for a year, unversioned ones revalidate.
+"""
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from flask import Response, make_response, request, url_for
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE = ('application/json', 'application/x-ndjson', 'application/javascript', 'image/svg+xml')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Response headers kept with a micro-cached body (ETag and Content-* are rebuilt)
+CACHED_HEADERS = ('Link',)
+
+
+def _compressible(mimetype: str) -> bool:
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE
+
+
+class _LRU:
+    """Bounded by total bytes of the stored bodies."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: 'OrderedDict[Hashable, Tuple[Hashable, tuple, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version=None):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] != version:
+                return None
+            self._items.move_to_end(key)
+            return item[1]
+
+    def put(self, key, value: tuple, nbytes: int, version=None):
+        if nbytes > self.max_bytes // 4:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= old[2]
+            self._items[key] = (version, value, nbytes)
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                _, (_, _, dropped) = self._items.popitem(last=False)
+                self.size -= dropped
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._items)
+
+
+class HttpCache:
+    def __init__(self, app=None, enabled: bool = True, min_size: int = 1024,
+                 max_bytes: int = 16 * 1024 * 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.enabled = enabled
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._responses = _LRU(max_bytes)     # (endpoint, view args, query) -> body, mimetype, etag, headers
+        self._encoded = _LRU(max_bytes)       # (etag, encoding) -> encoded body
+        self._assets: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        self.static_folder = None
+        self.hits = self.misses = self.not_modified = self.compressed = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        app.after_request(self._finalize)
+        app.jinja_env.globals['asset_url'] = self.asset_url
+
+    # --- micro-cache ---
+
+    def cached(self, version: Callable[[], Hashable]):
+        """
+        Decorator for GET views: the body is reused until `version()` changes.
+        `version` is read before the view runs, so a write landing meanwhile
+        at worst stores newer data under the older version; the next request
+        sees the new version and refreshes.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or request.method != 'GET':
+                    return view(*args, **kwargs)
+                key = (request.endpoint, tuple(sorted(kwargs.items())), tuple(sorted(request.args.items(multi=True))))
+                current = version()
+                entry = self._responses.get(key, current)
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        return response
+                    body = response.get_data()
+                    entry = (body, response.mimetype, self._etag(body),
+                             tuple((h, response.headers[h]) for h in CACHED_HEADERS if h in response.headers))
+                    self._responses.put(key, entry, len(body), current)
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                body, mimetype, etag, headers = entry
+                response = Response(body, mimetype=mimetype, headers=headers)
+                response.set_etag(etag)
+                return response
+            return wrapper
+        return decorator
+
+    # --- static assets ---
+
+    def asset_hash(self, filename: str) -> str:
+        path = os.path.join(self.static_folder, filename)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        known = self._assets.get(filename)
+        if known is None or known[0] != stamp:
+            with open(path, 'rb') as f:
+                known = (stamp, hashlib.sha256(f.read()).hexdigest()[:12])
+            self._assets[filename] = known
+        return known[1]
+
+    def asset_url(self, filename: str) -> str:
+        """Static URL carrying the file's content hash (use in templates)."""
+        try:
+            return url_for('static', filename=filename, v=self.asset_hash(filename))
+        except OSError:
+            return url_for('static', filename=filename)
+
+    # --- ETag, conditional GET, compression ---
+
+    @staticmethod
+    def _etag(body: bytes) -> str:
+        return hashlib.sha1(body).hexdigest()
+
+    def _encoding(self) -> Optional[str]:
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def _encode(self, body: bytes, etag: str, encoding: str) -> bytes:
+        key = (etag, encoding)
+        encoded = self._encoded.get(key)
+        if encoded is None:
+            if encoding == 'br':
+                data = brotli.compress(body, quality=self.brotli_quality)
+            else:
+                data = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+            encoded = (data,)
+            self._encoded.put(key, encoded, len(data))
+        return encoded[0]
+
+    def _finalize(self, response: Response) -> Response:
+        if not self.enabled:
+            return response
+        if request.endpoint == 'static':
+            fresh = request.args.get('v')
+            try:
+                immutable = fresh is not None and fresh == self.asset_hash(request.view_args.get('filename', ''))
+            except OSError:
+                immutable = False
+            if immutable:
+                response.headers['Cache-Control'] = IMMUTABLE
+            else:
+                response.cache_control.no_cache = True
+            if response.direct_passthrough and response.status_code == 200:
+                # send_file: buffer the (small) static file so it can be compressed
+                response.direct_passthrough = False
+                response.get_data()
+        if (response.status_code != 200 or response.is_streamed or request.method not in ('GET', 'HEAD')
+                or 'Content-Encoding' in response.headers):
+            return response
+        body = response.get_data()
+        etag, _ = response.get_etag()
+        if etag is None:
+            etag = self._etag(body)
+        compressible = _compressible(response.mimetype or '')
+        if compressible:
+            response.vary.add('Accept-Encoding')
+        if response.mimetype == 'application/json' and 'Cache-Control' not in response.headers:
+            response.cache_control.no_cache = True  # always revalidate; the ETag makes that a 304
+
+        encoding = self._encoding() if compressible and len(body) >= self.min_size else None
+        tag = f"{etag}-{encoding}" if encoding else etag
+        if_none_match = request.if_none_match
+        if if_none_match and (if_none_match.star_tag or any(
+                if_none_match.contains_weak(t) for t in (etag, f"{etag}-gzip", f"{etag}-br"))):
+            self.not_modified += 1
+            not_modified = Response(status=304, headers={
+                h: response.headers[h] for h in ('Cache-Control', 'Vary', 'Link') if h in response.headers})
+            not_modified.set_etag(tag)
+            return not_modified
+        response.set_etag(tag)
+        if encoding:
+            response.set_data(self._encode(body, etag, encoding))
+            response.headers['Content-Encoding'] = encoding
+            self.compressed += 1
+        return response
+
+    def clear(self):
+        self._responses.clear()
+        self._encoded.clear()
+
+    def stats(self) -> dict:
+        return {
+            'enabled': self.enabled,
+            'brotli': brotli is not None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'not_modified': self.not_modified,
+            'compressed': self.compressed,
+            'cached_responses': len(self._responses),
+            'cached_bytes': self._responses.size + self._encoded.size,
+        }
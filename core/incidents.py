@@ -0,0 +1,184 @@
+import datetime
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import Event, Incident
+
+SEVERITY_RANK = {'info': 0, 'warning': 1, 'critical': 2}
+
+
+def incident_key(event: Event) -> str:
+    return f"{event.type}:{event.target}" if event.target else event.type
+
+
+@dataclass
+class Decision:
+    """What the health job should do about one event of the current cycle."""
+    event: Event
+    incident: Incident
+    is_new: bool  # first event of the incident: it was logged as an Event row
+    remediate: bool  # no remediation yet, or the cooldown has expired
+
+    @property
+    def event_id(self):
+        return self.incident.event_id
+
+
+class IncidentTracker:
+    """
+    Collapses a sustained condition into one open incident.
+
+    Events of the same type and target (e.g. service_crashed on BITS) update
+    the open incident - count, last seen, severity - instead of producing a
+    new event row every cycle. Remediation is allowed when the incident opens
+    and then at most once per `cooldown_seconds`. An incident closes after
+    `recovery_samples` consecutive cycles without a matching event.
+
+    Only the first event is written to the events table. The incident row
+    is written when it opens, escalates, is remediated or closes, and
+    otherwise at most every `touch_seconds` to refresh count and last seen.
+
+    The health loop feeds it while API threads read `activity()`, so the
+    open-incident state is only touched under `_lock`.
+    """
+
+    def __init__(self, write_queue, cooldown_seconds: float = 600, recovery_samples: int = 2,
+                 touch_seconds: float = 300):
+        self.write_queue = write_queue
+        self.cooldown_seconds = cooldown_seconds
+        self.recovery_samples = max(1, recovery_samples)
+        self.touch_seconds = touch_seconds
+        self._open: Dict[str, Incident] = {}
+        self._misses: Dict[str, int] = {}
+        self._persisted_at: Dict[str, float] = {}
+        self._remediated_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def load(self, db_manager):
+        """Resume incidents left open by a previous run."""
+        now = time.time()
+        incidents = db_manager.get_open_incidents()
+        with self._lock:
+            for incident in incidents:
+                self._open[incident.key] = incident
+                self._misses[incident.key] = 0
+                self._persisted_at[incident.key] = now
+                if incident.last_remediated:
+                    self._remediated_at[incident.key] = datetime.datetime.fromisoformat(incident.last_remediated).timestamp()
+
+    def open_incidents(self) -> List[Incident]:
+        with self._lock:
+            return list(self._open.values())
+
+    def activity(self, db_manager, since: float, now: Optional[float] = None) -> Dict[str, dict]:
+        """
+        Per event type, incidents active since epoch seconds `since`:
+        `incidents` (how often the condition recurred), `occurrences` (health
+        cycles it was seen in) and `open_seconds` (longest still-open one).
+        Stored rows lag by up to `touch_seconds`, so the open incidents this
+        process tracks replace their rows.
+        """
+        now = time.time() if now is None else now
+        active = {('open', i.key) if i.status == 'open' else i.id: i for i in db_manager.get_incidents_since(since)}
+        for incident in self.open_incidents():
+            active[('open', incident.key)] = incident
+        summary: Dict[str, dict] = {}
+        for incident in active.values():
+            stats = summary.setdefault(incident.type, {'incidents': 0, 'occurrences': 0, 'open_seconds': 0})
+            stats['incidents'] += 1
+            stats['occurrences'] += incident.count
+            if incident.status == 'open':
+                opened = datetime.datetime.fromisoformat(incident.first_seen).timestamp()
+                stats['open_seconds'] = max(stats['open_seconds'], now - opened)
+        return summary
+
+    def observe(self, events: Iterable[Event], now: Optional[float] = None) -> Tuple[List[Decision], List[Incident]]:
+        """
+        Feed one cycle's events. Returns the decisions for this cycle's events
+        and the incidents that closed because their condition recovered.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._observe(events, now)
+
+    def _observe(self, events: Iterable[Event], now: float) -> Tuple[List[Decision], List[Incident]]:
+        decisions = []
+        seen = set()
+        for event in events:
+            key = incident_key(event)
+            if key in seen:
+                continue
+            seen.add(key)
+            self._misses[key] = 0
+            incident = self._open.get(key)
+            if incident is None:
+                decisions.append(Decision(event, self._open_incident(key, event, now), is_new=True, remediate=True))
+                continue
+
+            incident.count += 1
+            incident.last_seen = event.timestamp
+            incident.last_value = event.metric_value
+            incident.description = event.description
+            escalated = SEVERITY_RANK.get(event.severity, 0) > SEVERITY_RANK.get(incident.severity, 0)
+            if escalated:
+                incident.severity = event.severity
+            if escalated or now - self._persisted_at.get(key, 0) >= self.touch_seconds:
+                self._persist(incident, now)
+            last = self._remediated_at.get(key)
+            remediate = last is None or now - last >= self.cooldown_seconds
+            decisions.append(Decision(event, incident, is_new=False, remediate=remediate))
+
+        closed = []
+        for key in [k for k in self._open if k not in seen]:
+            self._misses[key] = self._misses.get(key, 0) + 1
+            if self._misses[key] >= self.recovery_samples:
+                closed.append(self._close(key, now))
+        return decisions, closed
+
+    def flush(self, now: Optional[float] = None):
+        """Write the current count / last seen of every open incident (shutdown path)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            for incident in self._open.values():
+                self._persist(incident, now)
+
+    def mark_remediated(self, incident: Incident, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._remediated_at[incident.key] = now
+            incident.last_remediated = datetime.datetime.fromtimestamp(now).isoformat()
+            self._persist(incident, now)
+
+    def _open_incident(self, key: str, event: Event, now: float) -> Incident:
+        incident = Incident(
+            key=key,
+            type=event.type,
+            target=event.target,
+            severity=event.severity,
+            description=event.description,
+            first_seen=event.timestamp,
+            last_seen=event.timestamp,
+            last_value=event.metric_value,
+        )
+        # The incident row references its first event; both are resolved on the writer thread
+        incident.event_id = self.write_queue.submit_event(event)
+        self._open[key] = incident
+        self._persist(incident, now)
+        return incident
+
+    def _close(self, key: str, now: float) -> Incident:
+        incident = self._open.pop(key)
+        incident.status = 'closed'
+        incident.closed_at = datetime.datetime.fromtimestamp(now).isoformat()
+        self._persist(incident, now)
+        for state in (self._misses, self._persisted_at, self._remediated_at):
+            state.pop(key, None)
+        return incident
+
+    def _persist(self, incident: Incident, now: float):
+        future = self.write_queue.submit_incident(incident)
+        if incident.id is None:
+            incident.id = future  # row id once written; later updates resolve it
+        self._persisted_at[incident.key] = now
@@ -0,0 +1,85 @@
+import os
+import threading
+from typing import Callable, Optional
+
+from .error_handling import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class LeaderLock:
+    """
+    Leader election between processes sharing one database: an exclusive,
+    non-blocking OS lock on a small file next to it. Only the holder runs the
+    sampler, metrics ring drainer and scheduled jobs, so a multi-process
+    server or a second instance never runs them twice.
+
+    The OS releases the lock when the holder exits, even on a crash, so a
+    waiting process (`wait()`) takes over without any stale-lock cleanup.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self) -> bool:
+        """Try once; True if this process is (now) the leader."""
+        with self._lock:
+            if self._fd is not None:
+                return True
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            except OSError:
+                os.close(fd)
+                return False
+            # Holder's pid, for operators; the lock itself is what counts
+            os.ftruncate(fd, 0)
+            os.write(fd, str(os.getpid()).encode())
+            self._fd = fd
+            return True
+
+    def release(self):
+        with self._lock:
+            if self._fd is None:
+                return
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(self._fd, 0, os.SEEK_SET)
+                    msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            except OSError as e:
+                logger.warning(f"Releasing leader lock {self.path} failed: {e}")
+            finally:
+                os.close(self._fd)
+                self._fd = None
+
+    def wait(self, on_acquired: Callable[[], None], interval: float = 5.0,
+             stop: Optional[threading.Event] = None) -> threading.Thread:
+        """Retry every `interval` seconds in the background; call `on_acquired` once elected."""
+        stop = stop or threading.Event()
+
+        def _run():
+            while not stop.wait(interval):
+                if self.acquire():
+                    logger.info(f"Leader lock {self.path} acquired by pid {os.getpid()}")
+                    on_acquired()
+                    return
+
+        self._thread = threading.Thread(target=_run, name='leader-election', daemon=True)
+        self._thread.start()
+        return self._thread
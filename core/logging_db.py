@@ -1,215 +1,417 @@
 import sqlite3
 import json
+import threading
 from datetime import datetime
 from typing import List, Dict, Any, Optional
-from .models import Event, Action, AuditEntry
+from .models import Event, Action, AuditEntry, Incident
+from .db_pool import ConnectionManager
+from .config_cache import ConfigSnapshot
+from . import migrations, queries
 
 DB_PATH = 'system_monitor.db'
-SCHEMA_PATH = 'schema.sql'
+SCHEMA_PATH = migrations.SCHEMA_PATH
+
+
+def to_epoch(iso_ts: str) -> int:
+    """Epoch seconds for the local-time ISO strings stored in `timestamp` columns."""
+    return int(datetime.fromisoformat(iso_ts).timestamp())
 
 class DatabaseManager:
     def __init__(self, db_path=DB_PATH):
         self.db_path = db_path
+        self.pool = ConnectionManager(db_path)
+        # Settings + whitelist cache; replaced (never mutated) on every change
+        self._config: Optional[ConfigSnapshot] = None
+        self._config_lock = threading.Lock()
+        # Fleet host name -> hosts.id; only used on the writer thread
+        self._host_ids: Dict[str, int] = {}
 
     def get_connection(self):
+        """Standalone connection (schema setup, one-off scripts). Hot paths use self.pool."""
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         return conn
 
+    def close(self):
+        self.pool.close()
+
+    def _read(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        return self.pool.reader().execute(sql, params).fetchall()
+
     def init_db(self):
+        """Create or upgrade the schema through the versioned migrations in core/migrations.py."""
         conn = self.get_connection()
         try:
-            # Basic migration: try adding columns if they don't exist
-            # This is a naive migration for MVP
-            try:
-                conn.execute("ALTER TABLE actions ADD COLUMN target_process TEXT")
-                conn.execute("ALTER TABLE actions ADD COLUMN target_service TEXT")
-                conn.execute("ALTER TABLE actions ADD COLUMN files_deleted TEXT")
-            except sqlite3.OperationalError:
-                pass # Columns probably exist
-        except Exception:
-            pass
-            
-    # ... (previous init_db code)
-        try:
-           # Basic migration for whitelist
-           conn.execute("CREATE TABLE IF NOT EXISTS process_whitelist (name TEXT PRIMARY KEY)")
-        except: pass
-            
-    # ... (previous init_db code)
-        try:
-           conn.execute("CREATE TABLE IF NOT EXISTS metrics_history (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, cpu_percent REAL, memory_percent REAL, disk_percent REAL)")
-        except: pass
-        
-        try:
-           conn.execute("CREATE TABLE IF NOT EXISTS recommendations (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, event_id INTEGER, category TEXT NOT NULL, recommendation_text TEXT NOT NULL, action_type TEXT, priority TEXT DEFAULT 'medium', status TEXT DEFAULT 'pending', applied_at TEXT, FOREIGN KEY(event_id) REFERENCES events(id))")
-        except: pass
-        
-        with open(SCHEMA_PATH, 'r') as f:
-            conn.executescript(f.read())
-        conn.commit()
-        conn.close()
+            migrations.migrate(conn)
+        finally:
+            conn.close()
 
     def log_metrics(self, cpu, mem, disk):
-        conn = self.get_connection()
-        conn.execute("INSERT INTO metrics_history (timestamp, cpu_percent, memory_percent, disk_percent) VALUES (?, ?, ?, ?)",
-                     (datetime.now().isoformat(), cpu, mem, disk))
-        # Cleanup old metrics (keep last 24h roughly 2880 entries at 30s interval or just limit by count)
-        # For MVP, keep last 1000
-        conn.execute("DELETE FROM metrics_history WHERE id NOT IN (SELECT id FROM metrics_history ORDER BY id DESC LIMIT 1000)")
-        conn.commit()
-        conn.close()
+        with self.pool.writer() as conn:
+            self._insert_metrics(conn, cpu, mem, disk)
 
     def get_metrics_history(self, limit=60): # Last ~30-60 mins depending on polling
-        conn = self.get_connection()
-        cur = conn.execute("SELECT timestamp, cpu_percent, memory_percent, disk_percent FROM metrics_history ORDER BY id ASC LIMIT ?", (limit,))
-        rows = cur.fetchall()
-        conn.close()
+        """Latest `limit` raw samples, oldest first."""
+        rows = self._read("SELECT id, timestamp, ts, cpu_percent, memory_percent, disk_percent FROM metrics_history ORDER BY id DESC LIMIT ?", (limit,))
+        return [dict(row) for row in reversed(rows)]
+
+    def get_metrics_range(self, since: float, until: float) -> List[dict]:
+        """Raw samples with epoch `ts` in [since, until), oldest first."""
+        rows = self._read(
+            "SELECT id, timestamp, ts, cpu_percent, memory_percent, disk_percent FROM metrics_history WHERE ts >= ? AND ts < ? ORDER BY ts",
+            (int(since), int(until))
+        )
         return [dict(row) for row in rows]
 
+    def get_metrics_since_id(self, since_id: int, limit: int = 1000) -> List[dict]:
+        """Raw samples newer than `since_id` (incremental chart updates), oldest first."""
+        rows = self._read(
+            "SELECT id, timestamp, ts, cpu_percent, memory_percent, disk_percent FROM metrics_history WHERE id > ? ORDER BY id LIMIT ?",
+            (since_id, limit)
+        )
+        return [dict(row) for row in rows]
+
+    def max_metrics_id(self) -> int:
+        return self._read("SELECT COALESCE(MAX(id), 0) FROM metrics_history")[0][0]
+
+    def get_metrics_rollup(self, resolution: str, since: float, until: float = None) -> List[dict]:
+        """Aggregated history ('1m', '1h' or '1d') between epoch seconds `since` and `until`."""
+        if resolution not in ('1m', '1h', '1d'):
+            raise ValueError(f"Unknown rollup resolution: {resolution}")
+        if until is None:
+            until = datetime.now().timestamp()
+        rows = self._read(
+            f"SELECT * FROM metrics_rollup_{resolution} WHERE bucket_start >= ? AND bucket_start < ? ORDER BY bucket_start",
+            (int(since), int(until))
+        )
+        return [dict(row) for row in rows]
+
+    # --- Settings and whitelist (cached) ---
+
+    @staticmethod
+    def _stored_config_version(conn) -> int:
+        """change_counters['config']: bumped by triggers on every settings/whitelist change, in any process."""
+        return conn.execute("SELECT version FROM change_counters WHERE name = 'config'").fetchone()[0]
+
+    def config(self) -> ConfigSnapshot:
+        """
+        Current settings and whitelist. Lock-free on the hot path: the
+        snapshot is immutable; one primary-key read of the stored version
+        tells whether another process (or an external edit) changed them.
+        """
+        snapshot = self._config
+        if snapshot is None or snapshot.version != self._stored_config_version(self.pool.reader()):
+            snapshot = self.reload_config()
+        return snapshot
+
+    def reload_config(self) -> ConfigSnapshot:
+        """Re-read settings and whitelist from SQLite."""
+        with self._config_lock:
+            conn = self.pool.reader()
+            # Version first: rows newer than it only cause one more reload later
+            version = self._stored_config_version(conn)
+            raw = {row['key']: row['value'] for row in conn.execute("SELECT key, value FROM settings")}
+            whitelist = [row['name'] for row in conn.execute("SELECT name FROM process_whitelist")]
+            self._config = ConfigSnapshot.build(version, raw, whitelist)
+            return self._config
+
+    def _update_config(self, conn, change):
+        """
+        Write-through, inside the write transaction so concurrent writers
+        apply their changes in commit order: `change(snapshot, new_version)`
+        builds the replacement. If the cached snapshot missed a change it is
+        dropped and the next config() reloads it.
+        """
+        version = self._stored_config_version(conn)
+        with self._config_lock:
+            current = self._config
+            if current is not None and current.version == version:
+                return  # the statement changed nothing
+            self._config = change(current, version) if current is not None and current.version == version - 1 else None
+
     def get_whitelist(self) -> List[str]:
-        conn = self.get_connection()
-        cur = conn.execute("SELECT name FROM process_whitelist")
-        rows = cur.fetchall()
-        conn.close()
-        return [row['name'] for row in rows]
+        return sorted(self.config().whitelist)
 
     def add_to_whitelist(self, name: str):
-        conn = self.get_connection()
-        try:
-            conn.execute("INSERT INTO process_whitelist (name) VALUES (?)", (name,))
-            conn.commit()
-        except sqlite3.IntegrityError:
-            pass # Already exists
-        finally:
-            conn.close()
+        with self.pool.writer() as conn:
+            conn.execute("INSERT OR IGNORE INTO process_whitelist (name) VALUES (?)", (name,))
+            self._update_config(conn, lambda c, v: c.with_whitelist(v, c.whitelist | {name}))
 
     def remove_from_whitelist(self, name: str):
-        conn = self.get_connection()
-        conn.execute("DELETE FROM process_whitelist WHERE name = ?", (name,))
-        conn.commit()
-        conn.close()
+        with self.pool.writer() as conn:
+            conn.execute("DELETE FROM process_whitelist WHERE name = ?", (name,))
+            self._update_config(conn, lambda c, v: c.with_whitelist(v, c.whitelist - {name}))
 
     def log_event(self, event: Event) -> int:
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute(
-            '''INSERT INTO events (timestamp, type, severity, description, metric_value, threshold)
-               VALUES (?, ?, ?, ?, ?, ?)''',
-            (event.timestamp, event.type, event.severity, event.description, event.metric_value, event.threshold)
-        )
-        conn.commit()
-        event_id = cur.lastrowid
-        conn.close()
-        return event_id
+        with self.pool.writer() as conn:
+            return self._insert_event(conn, event)
 
     def log_action(self, action: Action, extra: dict = None) -> int:
-        if extra is None:
-            extra = {}
-        
-        conn = self.get_connection()
-        cur = conn.cursor()
-        
-        target_process = extra.get('target_process')
-        target_service = extra.get('target_service')
-        files_deleted = extra.get('files_deleted')
-
-        cur.execute(
-            '''INSERT INTO actions (
-                event_id, timestamp, type, status, output, duration_ms,
-                target_process, target_service, files_deleted
-            )
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-            (
-                action.event_id, action.timestamp, action.type, action.status, 
-                action.output, action.duration_ms,
-                target_process, target_service, files_deleted
-            )
-        )
-        conn.commit()
-        action_id = cur.lastrowid
-        conn.close()
-        return action_id
+        with self.pool.writer() as conn:
+            return self._insert_action(conn, action, extra)
 
     def log_audit(self, entry: AuditEntry):
-        conn = self.get_connection()
-        conn.execute(
-            '''INSERT INTO audit_log (timestamp, action_id, affected_resources, status)
-               VALUES (?, ?, ?, ?)''',
-            (entry.timestamp, entry.action_id, entry.affected_resources, entry.status)
-        )
-        conn.commit()
-        conn.close()
+        with self.pool.writer() as conn:
+            self._insert_audit(conn, entry)
 
     def get_settings(self) -> Dict[str, str]:
-        conn = self.get_connection()
-        cur = conn.execute("SELECT key, value FROM settings")
-        rows = cur.fetchall()
-        conn.close()
-        return {row['key']: row['value'] for row in rows}
+        """Stored (string) settings; use config() for parsed values."""
+        return dict(self.config().raw)
 
     def update_setting(self, key: str, value: str):
-        conn = self.get_connection()
-        conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, str(value)))
-        conn.commit()
-        conn.close()
+        with self.pool.writer() as conn:
+            conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, str(value)))
+            self._update_config(conn, lambda c, v: c.with_setting(v, key, str(value)))
 
     def get_recent_events(self, limit=100) -> List[dict]:
-        conn = self.get_connection()
-        cur = conn.execute("SELECT * FROM events ORDER BY id DESC LIMIT ?", (limit,))
-        rows = cur.fetchall()
-        conn.close()
-        return [dict(row) for row in rows]
+        return self.query('events', limit=limit)['items']
+
+    def get_event(self, event_id: int, fields: Optional[List[str]] = None) -> Optional[dict]:
+        return queries.get(self.pool.reader(), 'events', event_id, fields)
 
     def get_recent_actions(self, limit=50) -> List[dict]:
-        conn = self.get_connection()
-        cur = conn.execute("SELECT * FROM actions ORDER BY id DESC LIMIT ?", (limit,))
-        rows = cur.fetchall()
-        conn.close()
-        return [dict(row) for row in rows]
+        return self.query('actions', limit=limit)['items']
+
+    def get_action(self, action_id: int, fields: Optional[List[str]] = None) -> Optional[dict]:
+        return queries.get(self.pool.reader(), 'actions', action_id, fields)
+
+    def query(self, dataset: str, **kwargs) -> Dict[str, Any]:
+        """
+        Keyset-paginated events / actions / audit rows, newest first; see
+        core.queries.page for the cursor, filter and projection arguments.
+        """
+        return queries.page(self.pool.reader(), dataset, **kwargs)
 
     def create_recommendation(self, event_id: int, category: str, recommendation_text: str, 
                             action_type: str = None, priority: str = 'medium') -> int:
         """Create a new recommendation for user action."""
-        conn = self.get_connection()
-        cur = conn.cursor()
-        timestamp = datetime.now().isoformat()
-        cur.execute(
-            '''INSERT INTO recommendations (timestamp, event_id, category, recommendation_text, action_type, priority)
-               VALUES (?, ?, ?, ?, ?, ?)''',
-            (timestamp, event_id, category, recommendation_text, action_type, priority)
-        )
-        conn.commit()
-        rec_id = cur.lastrowid
-        conn.close()
-        return rec_id
+        with self.pool.writer() as conn:
+            return self._insert_recommendation(conn, event_id, category, recommendation_text, action_type, priority)
 
     def get_pending_recommendations(self, limit=20) -> List[dict]:
         """Get all pending recommendations."""
-        conn = self.get_connection()
-        cur = conn.execute(
+        rows = self._read(
             "SELECT * FROM recommendations WHERE status = 'pending' ORDER BY id DESC LIMIT ?", 
             (limit,)
         )
-        rows = cur.fetchall()
-        conn.close()
         return [dict(row) for row in rows]
 
     def get_all_recommendations(self, limit=50) -> List[dict]:
         """Get all recommendations regardless of status."""
-        conn = self.get_connection()
-        cur = conn.execute("SELECT * FROM recommendations ORDER BY id DESC LIMIT ?", (limit,))
-        rows = cur.fetchall()
-        conn.close()
+        rows = self._read("SELECT * FROM recommendations ORDER BY id DESC LIMIT ?", (limit,))
         return [dict(row) for row in rows]
 
     def update_recommendation_status(self, rec_id: int, status: str):
         """Update recommendation status (pending, applied, dismissed)."""
-        conn = self.get_connection()
         timestamp = datetime.now().isoformat() if status == 'applied' else None
+        with self.pool.writer() as conn:
+            conn.execute(
+                "UPDATE recommendations SET status = ?, applied_at = ? WHERE id = ?",
+                (status, timestamp, rec_id)
+            )
+
+    def get_incidents(self, status: str = None, limit=50) -> List[dict]:
+        """Latest incidents, optionally only 'open' or 'closed' ones."""
+        if status:
+            rows = self._read("SELECT * FROM incidents WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limit))
+        else:
+            rows = self._read("SELECT * FROM incidents ORDER BY id DESC LIMIT ?", (limit,))
+        return [dict(row) for row in rows]
+
+    def get_open_incidents(self) -> List[Incident]:
+        rows = self._read("SELECT * FROM incidents WHERE status = 'open' ORDER BY id")
+        return self._incidents(rows)
+
+    def get_incidents_since(self, since: float) -> List[Incident]:
+        """Incidents (open or closed) last seen at or after epoch seconds `since`."""
+        rows = self._read("SELECT * FROM incidents WHERE last_ts >= ?", (int(since),))
+        return self._incidents(rows)
+
+    @staticmethod
+    def _incidents(rows) -> List[Incident]:
+        fields = Incident.__dataclass_fields__
+        return [Incident(**{k: row[k] for k in row.keys() if k in fields}) for row in rows]
+
+    # --- Fleet (collector side) ---
+
+    def get_fleet_hosts(self) -> List[dict]:
+        rows = self._read("SELECT * FROM hosts ORDER BY name")
+        return [dict(row) for row in rows]
+
+    def get_fleet_host(self, name: str) -> Optional[dict]:
+        rows = self._read("SELECT * FROM hosts WHERE name = ?", (name,))
+        return dict(rows[0]) if rows else None
+
+    def get_fleet_metrics(self, host_id: int, since: float, until: float) -> List[dict]:
+        """One host's samples with epoch `ts` in [since, until), oldest first."""
+        rows = self._read(
+            "SELECT ts, cpu_percent, memory_percent, disk_percent FROM fleet_metrics WHERE host_id = ? AND ts >= ? AND ts < ? ORDER BY ts",
+            (host_id, int(since), int(until))
+        )
+        return [dict(row) for row in rows]
+
+    def get_fleet_events(self, host_id: int, limit=100) -> List[dict]:
+        rows = self._read("SELECT * FROM fleet_events WHERE host_id = ? ORDER BY ts DESC LIMIT ?", (host_id, limit))
+        return [dict(row) for row in rows]
+
+    def get_fleet_actions(self, host_id: int, limit=50) -> List[dict]:
+        rows = self._read("SELECT * FROM fleet_actions WHERE host_id = ? ORDER BY ts DESC LIMIT ?", (host_id, limit))
+        return [dict(row) for row in rows]
+
+    def prune_fleet(self, before: float) -> int:
+        """Delete fleet rows older than epoch `before`, host by host (uses the (host_id, ts) keys)."""
+        deleted = 0
+        with self.pool.writer() as conn:
+            host_ids = [row[0] for row in conn.execute("SELECT id FROM hosts")]
+            for host_id in host_ids:
+                for table in ('fleet_metrics', 'fleet_events', 'fleet_actions'):
+                    deleted += conn.execute(f"DELETE FROM {table} WHERE host_id = ? AND ts < ?",
+                                            (host_id, int(before))).rowcount
+        return deleted
+
+    # --- Insert helpers (run inside an open writer transaction) ---
+
+    def _insert_metrics(self, conn, cpu, mem, disk, timestamp: str = None) -> int:
+        timestamp = timestamp or datetime.now().isoformat()
+        cur = conn.execute("INSERT INTO metrics_history (timestamp, ts, cpu_percent, memory_percent, disk_percent) VALUES (?, ?, ?, ?, ?)",
+                           (timestamp, to_epoch(timestamp), cpu, mem, disk))
+        return cur.lastrowid
+
+    def _insert_metrics_records(self, conn, rows: List[dict]):
+        """Bulk copy from the metrics ring; ids are the ring sequence numbers, so a repeated copy is ignored."""
+        conn.executemany(
+            '''INSERT OR IGNORE INTO metrics_history (id, timestamp, ts, cpu_percent, memory_percent, disk_percent)
+               VALUES (:id, :timestamp, :ts, :cpu_percent, :memory_percent, :disk_percent)''',
+            rows
+        )
+
+    def _insert_event(self, conn, event: Event) -> int:
+        cur = conn.execute(
+            '''INSERT INTO events (timestamp, ts, type, severity, description, metric_value, threshold)
+               VALUES (?, ?, ?, ?, ?, ?, ?)''',
+            (event.timestamp, to_epoch(event.timestamp), event.type, event.severity, event.description, event.metric_value, event.threshold)
+        )
+        return cur.lastrowid
+
+    def _insert_action(self, conn, action: Action, extra: dict = None) -> int:
+        if extra is None:
+            extra = {}
+        
+        target_process = extra.get('target_process')
+        target_service = extra.get('target_service')
+        files_deleted = extra.get('files_deleted')
+        target_pid = extra.get('target_pid')
+
+        cur = conn.execute(
+            '''INSERT INTO actions (
+                event_id, timestamp, ts, type, status, output, duration_ms,
+                target_process, target_service, files_deleted, target_pid
+            )
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+            (
+                action.event_id, action.timestamp, to_epoch(action.timestamp), action.type, action.status, 
+                action.output, action.duration_ms,
+                target_process, target_service, files_deleted, target_pid
+            )
+        )
+        return cur.lastrowid
+
+    def _insert_audit(self, conn, entry: AuditEntry) -> int:
+        cur = conn.execute(
+            '''INSERT INTO audit_log (timestamp, ts, action_id, affected_resources, status)
+               VALUES (?, ?, ?, ?, ?)''',
+            (entry.timestamp, to_epoch(entry.timestamp), entry.action_id, entry.affected_resources, entry.status)
+        )
+        return cur.lastrowid
+
+    def _insert_recommendation(self, conn, event_id: int, category: str, recommendation_text: str,
+                               action_type: str = None, priority: str = 'medium') -> int:
+        now = datetime.now()
+        cur = conn.execute(
+            '''INSERT INTO recommendations (timestamp, ts, event_id, category, recommendation_text, action_type, priority)
+               VALUES (?, ?, ?, ?, ?, ?, ?)''',
+            (now.isoformat(), int(now.timestamp()), event_id, category, recommendation_text, action_type, priority)
+        )
+        return cur.lastrowid
+
+    def _insert_incident(self, conn, incident: Incident) -> int:
+        cur = conn.execute(
+            '''INSERT INTO incidents (key, type, target, severity, status, description, count, event_id, last_value,
+                                    first_seen, ts, last_seen, last_ts, last_remediated, closed_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+            (incident.key, incident.type, incident.target, incident.severity, incident.status, incident.description,
+             incident.count, incident.event_id, incident.last_value, incident.first_seen, to_epoch(incident.first_seen),
+             incident.last_seen, to_epoch(incident.last_seen), incident.last_remediated, incident.closed_at)
+        )
+        return cur.lastrowid
+
+    def _update_incident(self, conn, incident: Incident) -> int:
         conn.execute(
-            "UPDATE recommendations SET status = ?, applied_at = ? WHERE id = ?",
-            (status, timestamp, rec_id)
+            '''UPDATE incidents SET severity = ?, status = ?, description = ?, count = ?, last_value = ?,
+                                    last_seen = ?, last_ts = ?, last_remediated = ?, closed_at = ?
+               WHERE id = ?''',
+            (incident.severity, incident.status, incident.description, incident.count, incident.last_value,
+             incident.last_seen, to_epoch(incident.last_seen), incident.last_remediated, incident.closed_at, incident.id)
         )
-        conn.commit()
-        conn.close()
+        return incident.id
+
+    def _host_id(self, conn, name: str, agent_version: Optional[str], seen: int) -> int:
+        """Id of the host row, marking it seen. Cached ids are re-checked (the row may have been rolled back)."""
+        host_id = self._host_ids.get(name)
+        if host_id is not None and conn.execute(
+                "UPDATE hosts SET last_seen = ?, agent_version = COALESCE(?, agent_version) WHERE id = ?",
+                (seen, agent_version, host_id)).rowcount:
+            return host_id
+        conn.execute(
+            '''INSERT INTO hosts (name, agent_version, first_seen, last_seen) VALUES (?, ?, ?, ?)
+               ON CONFLICT (name) DO UPDATE SET last_seen = excluded.last_seen,
+                                                agent_version = COALESCE(excluded.agent_version, agent_version)''',
+            (name, agent_version, seen, seen)
+        )
+        host_id = conn.execute("SELECT id FROM hosts WHERE name = ?", (name,)).fetchone()[0]
+        self._host_ids[name] = host_id
+        return host_id
+
+    def _insert_fleet_batch(self, conn, batch: dict) -> int:
+        """
+        Store one decoded agent batch (see core.fleet.decode_batch). Rows are
+        keyed by (host_id, ts) / (host_id, local id), so a batch that is
+        delivered twice (agent retry) is ignored the second time.
+        """
+        now = int(datetime.now().timestamp())
+        host_id = self._host_id(conn, batch['host'], batch.get('agent_version'), now)
+        metrics, events, actions = [], [], []
+        latest = None
+        for item in batch['items']:
+            data, ts = item['data'], int(item['ts'])
+            kind = item['kind']
+            if kind == 'metrics':
+                row = (host_id, ts, data.get('cpu_percent'), data.get('memory_percent'), data.get('disk_percent'))
+                metrics.append(row)
+                if latest is None or ts >= latest[1]:
+                    latest = row
+            elif kind == 'event':
+                events.append((host_id, data['id'], ts, data.get('type'), data.get('severity'), data.get('description'),
+                               data.get('metric_value'), data.get('threshold'), data.get('target')))
+            elif kind == 'action':
+                actions.append((host_id, data['id'], data.get('event_id'), ts, data.get('type'), data.get('status'),
+                                data.get('output'), data.get('duration_ms'), data.get('target_process'),
+                                data.get('target_service')))
+        if metrics:
+            conn.executemany("INSERT OR IGNORE INTO fleet_metrics (host_id, ts, cpu_percent, memory_percent, disk_percent) VALUES (?, ?, ?, ?, ?)", metrics)
+        if events:
+            conn.executemany(
+                '''INSERT OR IGNORE INTO fleet_events (host_id, local_id, ts, type, severity, description, metric_value, threshold, target)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''', events)
+        if actions:
+            conn.executemany(
+                '''INSERT OR IGNORE INTO fleet_actions (host_id, local_id, event_local_id, ts, type, status, output, duration_ms,
+                                                      target_process, target_service)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', actions)
+        if latest is not None:
+            conn.execute(
+                '''UPDATE hosts SET metrics_ts = ?, cpu_percent = ?, memory_percent = ?, disk_percent = ?
+                   WHERE id = ? AND (metrics_ts IS NULL OR metrics_ts <= ?)''',
+                latest[1:] + (host_id, latest[1])
+            )
+        return host_id
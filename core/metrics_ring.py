@@ -0,0 +1,309 @@
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .error_handling import logger
+
+MAGIC = b'PXRING1\0'
+VERSION = 2
+# magic, version, capacity, next seq, last seq copied into SQLite, oldest seq ever written
+# (version 1 had no oldest seq; those files are upgraded in place)
+HEADER = struct.Struct('<8sIIQQQ')
+HEADER_SIZE = 64
+# seq, epoch seconds, cpu, memory, disk (NaN = not collected)
+RECORD = struct.Struct('<Qdddd')
+TS_OFFSET = 8
+
+Record = Tuple[int, float, float, float, float]
+
+
+def _value(v: float) -> Optional[float]:
+    return None if math.isnan(v) else v
+
+
+def record_to_row(record: Record) -> Dict[str, Any]:
+    """Same shape as a metrics_history row; the ring sequence is the row id."""
+    seq, ts, cpu, mem, disk = record
+    return {
+        'id': seq,
+        'timestamp': datetime.fromtimestamp(ts).isoformat(),
+        'ts': int(ts),
+        'cpu_percent': _value(cpu),
+        'memory_percent': _value(mem),
+        'disk_percent': _value(disk),
+    }
+
+
+class MetricsRing:
+    """
+    Fixed-size ring of packed metric records in a memory-mapped file.
+
+    `append()` is O(1) and never touches SQLite, so a locked database cannot
+    lose samples. Records get consecutive sequence numbers, which are also
+    their metrics_history ids once RingDrainer has copied them. The header
+    keeps the next sequence, the drained position and the first sequence
+    written, so undrained records survive a restart and slots never written
+    since the ring started (or was renumbered) are never read. Once
+    `capacity` records are pending, the oldest are overwritten.
+
+    Records are in sequence (and therefore time) order, so time ranges are
+    found by binary search.
+    """
+
+    def __init__(self, path: str, capacity: int = 17280):
+        self.path = path
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        size = HEADER_SIZE + capacity * RECORD.size
+        fresh = not os.path.exists(path) or os.path.getsize(path) != size
+        self._file = open(path, 'r+b' if not fresh else 'w+b')
+        if fresh:
+            self._file.truncate(size)
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        magic, version, stored_capacity, self._next, self._drained, self._first = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version not in (1, VERSION) or stored_capacity != capacity:
+            if not fresh:
+                logger.warning(f"Metrics ring {path} has an incompatible layout; starting a new one")
+            self._next, self._drained, self._first = 1, 0, 1
+            self._write_header()
+        elif version == 1:
+            self._first = self._first_written()
+            self._write_header()
+
+    def close(self):
+        with self._lock:
+            if self._mm.closed:
+                return
+            self._mm.flush()
+            self._mm.close()
+            self._file.close()
+
+    # --- Writes ---
+
+    def append(self, ts: float, cpu: Optional[float], mem: Optional[float], disk: Optional[float]) -> int:
+        """Store one sample; returns its sequence number (future metrics_history id)."""
+        nan = float('nan')
+        with self._lock:
+            seq = self._next
+            RECORD.pack_into(self._mm, self._offset(seq), seq, ts,
+                             nan if cpu is None else cpu, nan if mem is None else mem, nan if disk is None else disk)
+            # Header after the record: a crash in between only loses this sample
+            self._next = seq + 1
+            self._write_header()
+            return seq
+
+    def mark_drained(self, seq: int):
+        with self._lock:
+            self._drained = max(self._drained, seq)
+            self._write_header()
+
+    def ensure_after(self, floor: int) -> int:
+        """
+        Make sure pending records get ids above `floor` (the highest existing
+        metrics_history id), renumbering them if needed - e.g. a new ring file
+        next to an existing database. Returns the offset applied.
+        """
+        with self._lock:
+            if self._drained >= floor:
+                return 0
+            offset = floor - self._drained
+            oldest = self._oldest()
+            records = self._records(oldest, self._next)
+            for seq, ts, cpu, mem, disk in records:
+                RECORD.pack_into(self._mm, self._offset(seq + offset), seq + offset, ts, cpu, mem, disk)
+            # Slots below the renumbered records were never written with these sequences
+            self._first = oldest + offset
+            self._next += offset
+            self._drained = floor
+            self._write_header()
+            return offset
+
+    def flush(self):
+        """msync the mapping (the drainer calls this after every copy)."""
+        with self._lock:
+            self._mm.flush()
+
+    # --- Reads ---
+
+    @property
+    def last_seq(self) -> int:
+        return self._next - 1
+
+    @property
+    def drained(self) -> int:
+        return self._drained
+
+    @property
+    def oldest_seq(self) -> int:
+        return self._oldest()
+
+    def __len__(self) -> int:
+        return self._next - self._oldest()
+
+    def pending(self) -> int:
+        """Records not yet copied into SQLite (including any already overwritten)."""
+        return self._next - 1 - self._drained
+
+    def after(self, seq: int, limit: Optional[int] = None) -> List[Record]:
+        """Records with a sequence above `seq`, oldest first."""
+        with self._lock:
+            start = max(seq + 1, self._oldest())
+            end = self._next if limit is None else min(self._next, start + limit)
+            return self._records(start, end)
+
+    def latest(self, count: int) -> List[Record]:
+        with self._lock:
+            return self._records(max(self._oldest(), self._next - count), self._next)
+
+    def oldest_ts(self) -> Optional[float]:
+        with self._lock:
+            if self._next == self._oldest():
+                return None
+            return self._ts(self._oldest())
+
+    def range(self, since: float, until: float) -> List[Record]:
+        """Records with since <= ts < until, oldest first (binary search on ts)."""
+        with self._lock:
+            first = self._bisect(since)
+            return self._records(first, self._bisect(until, lo=first))
+
+    # --- Internals (lock held) ---
+
+    def _oldest(self) -> int:
+        return max(self._first, self._next - self.capacity)
+
+    def _first_written(self) -> int:
+        """Oldest slot holding its own sequence (version 1 headers did not record it)."""
+        seq = max(1, self._next - self.capacity)
+        while seq < self._next and struct.unpack_from('<Q', self._mm, self._offset(seq))[0] != seq:
+            seq += 1
+        return seq
+
+    def _offset(self, seq: int) -> int:
+        return HEADER_SIZE + (seq % self.capacity) * RECORD.size
+
+    def _ts(self, seq: int) -> float:
+        return struct.unpack_from('<d', self._mm, self._offset(seq) + TS_OFFSET)[0]
+
+    def _bisect(self, ts: float, lo: Optional[int] = None) -> int:
+        lo = self._oldest() if lo is None else lo
+        hi = self._next
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ts(mid) < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _records(self, start: int, end: int) -> List[Record]:
+        if start >= end:
+            return []
+        first, last = self._offset(start), self._offset(end - 1)
+        if first <= last:
+            return list(RECORD.iter_unpack(self._mm[first:last + RECORD.size]))
+        # Wraps around the end of the file
+        return (list(RECORD.iter_unpack(self._mm[first:HEADER_SIZE + self.capacity * RECORD.size])) +
+                list(RECORD.iter_unpack(self._mm[HEADER_SIZE:last + RECORD.size])))
+
+    def _write_header(self):
+        HEADER.pack_into(self._mm, 0, MAGIC, VERSION, self.capacity, self._next, self._drained, self._first)
+
+
+class RingDrainer:
+    """
+    Background copy of ring records into metrics_history, `batch_size` rows
+    per transaction. If SQLite is locked or failing the records simply stay
+    in the ring and the next run retries, so nothing is lost unless the
+    outage outlasts the ring's capacity (counted in `overwritten`).
+    """
+
+    def __init__(self, ring: MetricsRing, db_manager, interval: float = 2.0, batch_size: int = 5000,
+                 on_renumber: Optional[Callable[[int], None]] = None):
+        self.ring = ring
+        self.on_renumber = on_renumber
+        self.db = db_manager
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._checked_ids = False
+        self.rows_copied = 0
+        self.failures = 0
+        self.overwritten = 0
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='metrics-ring-drainer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the thread and make a last attempt to copy everything."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.drain()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.drain()
+
+    def drain(self) -> int:
+        """Copy all pending records; returns rows copied (0 if SQLite is unavailable)."""
+        copied = 0
+        try:
+            if not self._checked_ids:
+                offset = self.ring.ensure_after(self.db.max_metrics_id())
+                self._checked_ids = True
+                if offset and self.on_renumber:
+                    self.on_renumber(offset)
+            while True:
+                lost = self.ring.oldest_seq - 1 - self.ring.drained
+                if lost > 0:
+                    self.overwritten += lost
+                    logger.error(f"Metrics ring overflowed while SQLite was unavailable; {lost} samples lost")
+                    self.ring.mark_drained(self.ring.oldest_seq - 1)
+                records = self.ring.after(self.ring.drained, self.batch_size)
+                if not records:
+                    break
+                with self.db.pool.writer() as conn:
+                    self.db._insert_metrics_records(conn, [record_to_row(r) for r in records])
+                self.ring.mark_drained(records[-1][0])
+                copied += len(records)
+        except Exception as e:
+            if self.last_error is None:
+                logger.warning(f"Metrics ring drain deferred, {self.ring.pending()} samples pending: {e}")
+            self.failures += 1
+            self.last_error = str(e)
+        else:
+            if self.last_error is not None:
+                logger.info(f"Metrics ring drain resumed after {self.failures} failed attempts")
+            self.last_error = None
+        if copied:
+            self.ring.flush()
+            self.rows_copied += copied
+        return copied
+
+    def watermark(self) -> float:
+        """Epoch seconds up to which every ring sample is in SQLite (for rollups)."""
+        pending = self.ring.after(self.ring.drained, 1)
+        return pending[0][1] if pending else time.time()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'ring_records': len(self.ring),
+            'capacity': self.ring.capacity,
+            'pending': self.ring.pending(),
+            'rows_copied': self.rows_copied,
+            'failed_attempts': self.failures,
+            'overwritten': self.overwritten,
+            'last_error': self.last_error,
+        }
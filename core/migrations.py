@@ -0,0 +1,236 @@
+import sqlite3
+from typing import Callable, List, Tuple
+
+SCHEMA_PATH = 'schema.sql'
+
+# Tables that get an integer epoch `ts` column mirroring their ISO `timestamp`
+EPOCH_TABLES = ('events', 'actions', 'audit_log', 'metrics_history', 'recommendations')
+# Tables with a row in change_counters, bumped by triggers on every change
+CACHED_TABLES = ('events', 'actions', 'incidents', 'recommendations')
+
+
+def _column_names(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def add_column_if_missing(conn: sqlite3.Connection, table: str, column: str, decl: str):
+    if column not in _column_names(conn, table):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+def counter_triggers(conn: sqlite3.Connection, counter: str, table: str):
+    """Bump change_counters[counter] on every insert/update/delete of table, from any connection or process."""
+    for op in ('INSERT', 'UPDATE', 'DELETE'):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_{op.lower()}_{counter}_counter AFTER {op} ON {table}
+            BEGIN
+                UPDATE change_counters SET version = version + 1 WHERE name = '{counter}';
+            END
+        """)
+
+
+# --- Migrations (append only; never edit a released step) ---
+
+def _baseline(conn: sqlite3.Connection):
+    """Tables, default settings and default whitelist from schema.sql."""
+    with open(SCHEMA_PATH, 'r') as f:
+        conn.executescript(f.read())
+
+
+def _action_target_columns(conn: sqlite3.Connection):
+    """Databases created before actions carried remediation metadata."""
+    for column in ('target_process', 'target_service', 'files_deleted'):
+        add_column_if_missing(conn, 'actions', column, 'TEXT')
+
+
+def _epoch_timestamps(conn: sqlite3.Connection):
+    """Integer epoch seconds next to the ISO text column, backfilled from local time."""
+    for table in EPOCH_TABLES:
+        add_column_if_missing(conn, table, 'ts', 'INTEGER')
+        conn.execute(
+            f"UPDATE {table} SET ts = CAST(strftime('%s', timestamp, 'utc') AS INTEGER) WHERE ts IS NULL"
+        )
+
+
+def _read_path_indexes(conn: sqlite3.Connection):
+    """Indexes for every query DatabaseManager and the retention engine issue."""
+    conn.execute("DROP INDEX IF EXISTS idx_metrics_history_timestamp")
+    for sql in (
+        "CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts)",
+        "CREATE INDEX IF NOT EXISTS idx_events_type_ts ON events (type, ts)",
+        "CREATE INDEX IF NOT EXISTS idx_actions_event_id ON actions (event_id)",
+        "CREATE INDEX IF NOT EXISTS idx_actions_ts ON actions (ts)",
+        "CREATE INDEX IF NOT EXISTS idx_audit_log_action_id ON audit_log (action_id)",
+        "CREATE INDEX IF NOT EXISTS idx_audit_log_ts ON audit_log (ts)",
+        "CREATE INDEX IF NOT EXISTS idx_metrics_history_ts ON metrics_history (ts)",
+        "CREATE INDEX IF NOT EXISTS idx_recommendations_status_id ON recommendations (status, id)",
+        "CREATE INDEX IF NOT EXISTS idx_recommendations_event_id ON recommendations (event_id)",
+    ):
+        conn.execute(sql)
+
+
+def _incidents(conn: sqlite3.Connection):
+    """Deduplicated incidents: one row per sustained condition instead of one event per cycle."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS incidents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT NOT NULL,
+            type TEXT NOT NULL,
+            target TEXT,
+            severity TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'open',
+            description TEXT,
+            count INTEGER NOT NULL DEFAULT 1,
+            event_id INTEGER,
+            last_value REAL,
+            first_seen TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            last_seen TEXT NOT NULL,
+            last_ts INTEGER NOT NULL,
+            last_remediated TEXT,
+            closed_at TEXT,
+            FOREIGN KEY(event_id) REFERENCES events(id)
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_incidents_status_id ON incidents (status, id)")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_incidents_open_key ON incidents (key) WHERE status = 'open'")
+
+
+def _fleet_tables(conn: sqlite3.Connection):
+    """
+    Collector-side storage for agents. Per-host tables are clustered on
+    (host_id, ...) WITHOUT ROWID, so each host's rows are contiguous and
+    retried batches are deduplicated by primary key.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS hosts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            agent_version TEXT,
+            first_seen INTEGER NOT NULL,
+            last_seen INTEGER NOT NULL,
+            metrics_ts INTEGER,
+            cpu_percent REAL,
+            memory_percent REAL,
+            disk_percent REAL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS fleet_metrics (
+            host_id INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            cpu_percent REAL,
+            memory_percent REAL,
+            disk_percent REAL,
+            PRIMARY KEY (host_id, ts)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS fleet_events (
+            host_id INTEGER NOT NULL,
+            local_id INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            severity TEXT,
+            description TEXT,
+            metric_value REAL,
+            threshold REAL,
+            target TEXT,
+            PRIMARY KEY (host_id, local_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS fleet_actions (
+            host_id INTEGER NOT NULL,
+            local_id INTEGER NOT NULL,
+            event_local_id INTEGER,
+            ts INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            status TEXT,
+            output TEXT,
+            duration_ms INTEGER,
+            target_process TEXT,
+            target_service TEXT,
+            PRIMARY KEY (host_id, local_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_fleet_events_host_ts ON fleet_events (host_id, ts)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_fleet_actions_host_ts ON fleet_actions (host_id, ts)")
+
+
+def _action_target_pid(conn: sqlite3.Connection):
+    """PID a throttle/kill acted on, so rollback restores that instance rather than the first name match."""
+    add_column_if_missing(conn, 'actions', 'target_pid', 'INTEGER')
+
+
+def _config_counter(conn: sqlite3.Connection):
+    """
+    Change counters kept by triggers, so every process (and edits made outside
+    the app) can cheaply tell whether its cached settings are stale.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS change_counters (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    conn.execute("INSERT OR IGNORE INTO change_counters (name) VALUES ('config')")
+    for table in ('settings', 'process_whitelist'):
+        counter_triggers(conn, 'config', table)
+
+
+def _incidents_last_seen_index(conn: sqlite3.Connection):
+    """Incidents active within a window (recommendation insights)."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_incidents_last_ts ON incidents (last_ts)")
+
+
+def _cache_counters(conn: sqlite3.Connection):
+    """Change counters for the tables behind micro-cached endpoints (see ConnectionManager.versions)."""
+    for table in CACHED_TABLES:
+        conn.execute("INSERT OR IGNORE INTO change_counters (name) VALUES (?)", (table,))
+        counter_triggers(conn, table, table)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, 'baseline schema', _baseline),
+    (2, 'actions target columns', _action_target_columns),
+    (3, 'epoch timestamp columns', _epoch_timestamps),
+    (4, 'read path indexes', _read_path_indexes),
+    (5, 'incidents table', _incidents),
+    (6, 'fleet tables', _fleet_tables),
+    (7, 'actions target pid', _action_target_pid),
+    (8, 'config change counter', _config_counter),
+    (9, 'incidents last seen index', _incidents_last_seen_index),
+    (10, 'cache change counters', _cache_counters),
+]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Apply every migration newer than the database's PRAGMA user_version, in
+    order, each in its own transaction. Returns the resulting version.
+    """
+    conn.isolation_level = None
+    current = schema_version(conn)
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        if step is _baseline:
+            # executescript manages its own transaction
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+        else:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        current = version
+    return current
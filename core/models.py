@@ -11,6 +11,7 @@ class Event:
     metric_value: Optional[float] = None
     threshold: Optional[float] = None
     id: Optional[int] = None
+    target: Optional[str] = None  # item the rule matched (e.g. a service name); not stored
 
 @dataclass
 class Action:
@@ -29,3 +30,20 @@ class AuditEntry:
     affected_resources: str
     status: str
     id: Optional[int] = None
+
+@dataclass
+class Incident:
+    key: str  # type, or type:target
+    type: str
+    severity: str
+    description: str
+    first_seen: str
+    last_seen: str
+    target: Optional[str] = None
+    status: str = 'open'  # 'open', 'closed'
+    count: int = 1
+    event_id: Optional[int] = None  # first event of the incident
+    last_value: Optional[float] = None
+    last_remediated: Optional[str] = None
+    closed_at: Optional[str] = None
+    id: Optional[int] = None
@@ -11,6 +11,7 @@ class MonitorBase(ABC):
             'cpu_percent': float,
             'memory_percent': float,
             'disk_percent': float,
+            'volumes': [{'name': str, 'percent': float, 'free_gb': float, 'system': bool, ...}],
             'top_processes': [{'name': str, 'pid': int, 'cpu': float}],
             'services': [{'name': str, 'status': str, 'start_type': str}],
             'updates_pending': int
@@ -0,0 +1,149 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import psutil
+
+# Never throttled or killed, whatever the whitelist says
+SYSTEM_PROCESSES = {
+    "MsMpEng", "System", "System Idle Process", "Registry", "svchost", "csrss",
+    "lsass", "wininit", "services", "smss", "winlogon",
+    "kernel_task", "launchd", "WindowServer", "systemd", "init", "kthreadd",
+    "Antigravity",
+}
+
+# Platform priority levels: Windows priority classes, POSIX nice values
+if hasattr(psutil, 'BELOW_NORMAL_PRIORITY_CLASS'):
+    PRIORITY_LOW = psutil.BELOW_NORMAL_PRIORITY_CLASS
+    PRIORITY_NORMAL = psutil.NORMAL_PRIORITY_CLASS
+    PRIORITY_LOW_NAME, PRIORITY_NORMAL_NAME = 'BelowNormal', 'Normal'
+else:
+    PRIORITY_LOW = 10
+    PRIORITY_NORMAL = 0
+    PRIORITY_LOW_NAME, PRIORITY_NORMAL_NAME = 'nice 10', 'nice 0'
+
+
+def normalize_name(name: str) -> str:
+    """'chrome.exe' and 'chrome' refer to the same application."""
+    name = name or ''
+    return name[:-4] if name.lower().endswith('.exe') else name
+
+
+def in_list(name: str, names: Iterable[str]) -> bool:
+    wanted = normalize_name(name).lower()
+    return any(normalize_name(n).lower() == wanted for n in names)
+
+
+class ProcessController:
+    """
+    In-process remediation on top of psutil: priority changes and kills act
+    directly on the PID the monitor captured in metrics['top_processes'],
+    without spawning a shell.
+
+    With dry_run=True nothing is changed; the same decisions are made and
+    reported as "Would ...", which is how MacExecutor runs in development.
+    """
+
+    def __init__(self, dry_run: bool = False):
+        self.dry_run = dry_run
+
+    # --- Target selection ---
+
+    @staticmethod
+    def pick_target(top_processes: Optional[List[Dict[str, Any]]], name_hint: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """First non-system entry of top_processes (already sorted by CPU), preferring `name_hint`."""
+        candidates = [p for p in (top_processes or []) if p.get('pid') and p.get('name')]
+        if name_hint:
+            for p in candidates:
+                if normalize_name(p['name']) == normalize_name(name_hint):
+                    return p
+        for p in candidates:
+            if not in_list(p['name'], SYSTEM_PROCESSES):
+                return p
+        return candidates[0] if candidates else None
+
+    def _open(self, target: Dict[str, Any]) -> psutil.Process:
+        """psutil handle for target, guarding against the PID having been reused."""
+        proc = psutil.Process(target['pid'])
+        create_time = target.get('create_time')
+        if create_time is not None and abs(proc.create_time() - create_time) > 1e-3:
+            raise psutil.NoSuchProcess(target['pid'], target.get('name'), "PID reused")
+        if target.get('name') and normalize_name(proc.name()) != normalize_name(target['name']):
+            raise psutil.NoSuchProcess(target['pid'], target.get('name'), "PID reused")
+        return proc
+
+    # --- Actions ---
+
+    def throttle(self, target: Dict[str, Any]) -> Tuple[bool, str]:
+        name = target.get('name')
+        if self.dry_run:
+            return True, f"Would throttle ({name}) to {PRIORITY_LOW_NAME} priority"
+        try:
+            proc = self._open(target)
+            old = proc.nice()
+            proc.nice(PRIORITY_LOW)
+        except psutil.NoSuchProcess:
+            return False, f"Process ({name}) not found"
+        except psutil.AccessDenied:
+            return False, f"Access denied throttling ({name})"
+        return True, f"Throttled ({name}) from {self._priority_name(old)} to {PRIORITY_LOW_NAME} priority"
+
+    def kill(self, target: Dict[str, Any]) -> Tuple[bool, str]:
+        name = target.get('name')
+        if self.dry_run:
+            return True, f"Would kill ({name}) pid {target.get('pid')}"
+        try:
+            self._open(target).kill()
+        except psutil.NoSuchProcess:
+            return False, f"Process ({name}) not found"
+        except psutil.AccessDenied:
+            return False, f"Access denied killing ({name})"
+        return True, f"Killed: {name}"
+
+    def restore_priority(self, name: str, pid: Optional[int] = None) -> Tuple[bool, str]:
+        """Undo a throttle: back to normal priority, by PID if still valid, else by name."""
+        if self.dry_run:
+            return True, f"Would restore {PRIORITY_NORMAL_NAME} priority for ({name})"
+        procs = []
+        if pid:
+            try:
+                procs = [self._open({'pid': pid, 'name': name})]
+            except psutil.Error:
+                procs = []
+        if not procs:
+            procs = [p for p in psutil.process_iter(['name']) if normalize_name(p.info['name'] or '') == normalize_name(name)]
+        for proc in procs:
+            try:
+                proc.nice(PRIORITY_NORMAL)
+                return True, f"Restored {PRIORITY_NORMAL_NAME} priority for ({name})"
+            except psutil.Error:
+                continue
+        return False, f"Process ({name}) not found"
+
+    def remediate_high_cpu(self, top_processes, whitelist: Iterable[str]) -> Tuple[bool, str, Dict[str, Any]]:
+        """
+        Smart throttling for cpu_high: whitelisted apps are lowered to
+        below-normal priority, anything else is killed, system processes are
+        left alone.
+        """
+        target = self.pick_target(top_processes)
+        if not target:
+            return True, "No action needed.", {}
+        name = target['name']
+        extra = {'target_process': name, 'target_pid': target['pid']}
+
+        if in_list(name, SYSTEM_PROCESSES):
+            return True, f"CPU high due to system process ({name}); cannot throttle", extra
+        if in_list(name, whitelist):
+            success, output = self.throttle(target)
+            extra['action_detail'] = 'throttled'
+        else:
+            success, output = self.kill(target)
+            extra['action_detail'] = 'killed'
+        return success, output, extra
+
+    @staticmethod
+    def _priority_name(value) -> str:
+        if value == PRIORITY_NORMAL:
+            return PRIORITY_NORMAL_NAME
+        if value == PRIORITY_LOW:
+            return PRIORITY_LOW_NAME
+        return str(getattr(value, 'name', value))
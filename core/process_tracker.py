@@ -0,0 +1,134 @@
+import heapq
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+import psutil
+
+Key = Tuple[int, float]  # (pid, create_time) - unique even when PIDs are reused
+
+
+class TrackedProcess:
+    """Per-process state kept across sampling cycles."""
+
+    __slots__ = ('proc', 'pid', 'name', 'create_time', 'cpu_time', 'io_bytes', 'sampled_at',
+                 'cpu_percent', 'rss', 'io_rate', 'cpu_history')
+
+    def __init__(self, proc: psutil.Process, name: str, create_time: float, history: int):
+        self.proc = proc
+        self.pid = proc.pid
+        self.name = name
+        self.create_time = create_time
+        self.cpu_time: Optional[float] = None
+        self.io_bytes: Optional[int] = None
+        self.sampled_at: Optional[float] = None
+        self.cpu_percent = 0.0
+        self.rss = 0
+        self.io_rate = 0.0
+        self.cpu_history: Deque[float] = deque(maxlen=history)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'pid': self.pid,
+            'name': self.name,
+            'cpu_percent': round(self.cpu_percent, 1),
+            'rss_mb': round(self.rss / (1024 * 1024), 1),
+            'io_kbps': round(self.io_rate / 1024, 1),
+            'create_time': self.create_time,
+        }
+
+
+class ProcessTracker:
+    """
+    Process table that survives between monitor cycles.
+
+    psutil.Process handles are kept per (pid, create_time), so CPU usage is
+    the real delta of CPU time over wall time since the previous cycle
+    instead of the 0.0 a fresh Process object reports. A process seen for the
+    first time gets its lifetime average. Top-k selection by CPU, RSS or IO
+    uses a heap, and each process keeps a short rolling CPU history.
+    """
+
+    def __init__(self, history: int = 12, exclude: Iterable[str] = ('System Idle Process',)):
+        self.history = history
+        self.exclude = set(exclude)
+        self._procs: Dict[Key, TrackedProcess] = {}
+
+    def sample(self) -> List[TrackedProcess]:
+        """Walk the process table once and update every tracked process."""
+        now = time.time()
+        seen: Dict[Key, TrackedProcess] = {}
+        for proc in psutil.process_iter(['name', 'create_time']):
+            info = proc.info
+            name = info.get('name') or ''
+            if name in self.exclude or info.get('create_time') is None:
+                continue
+            key = (proc.pid, info['create_time'])
+            tracked = self._procs.get(key) or TrackedProcess(proc, name, info['create_time'], self.history)
+            try:
+                self._update(tracked, now)
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                continue
+            except psutil.AccessDenied:
+                pass  # keep it listed with whatever we could read
+            seen[key] = tracked
+        self._procs = seen  # processes that exited drop out here
+        return list(seen.values())
+
+    @staticmethod
+    def _update(tracked: TrackedProcess, now: float):
+        proc = tracked.proc
+        with proc.oneshot():
+            times = proc.cpu_times()
+            cpu_time = times.user + times.system
+            tracked.rss = proc.memory_info().rss
+            io_bytes = None
+            if hasattr(proc, 'io_counters'):
+                try:
+                    io = proc.io_counters()
+                    io_bytes = io.read_bytes + io.write_bytes
+                except (psutil.AccessDenied, NotImplementedError):
+                    pass
+
+        if tracked.sampled_at is None:
+            # First sight: lifetime average rather than a meaningless 0.0
+            age = max(now - tracked.create_time, 1e-6)
+            tracked.cpu_percent = cpu_time / age * 100.0
+        else:
+            elapsed = max(now - tracked.sampled_at, 1e-6)
+            tracked.cpu_percent = max(0.0, cpu_time - tracked.cpu_time) / elapsed * 100.0
+            if io_bytes is not None and tracked.io_bytes is not None:
+                tracked.io_rate = max(0, io_bytes - tracked.io_bytes) / elapsed
+
+        tracked.cpu_time = cpu_time
+        tracked.io_bytes = io_bytes
+        tracked.sampled_at = now
+        tracked.cpu_history.append(tracked.cpu_percent)
+
+    # --- Queries ---
+
+    def top(self, k: int = 3, by: str = 'cpu') -> List[Dict[str, Any]]:
+        key = {
+            'cpu': lambda t: t.cpu_percent,
+            'rss': lambda t: t.rss,
+            'io': lambda t: t.io_rate,
+        }[by]
+        return [t.as_dict() for t in heapq.nlargest(k, self._procs.values(), key=key)]
+
+    def stats(self, pid: int) -> Optional[Dict[str, Any]]:
+        """Rolling CPU stats for a live PID."""
+        for tracked in self._procs.values():
+            if tracked.pid == pid:
+                samples = list(tracked.cpu_history)
+                return {
+                    'pid': pid,
+                    'name': tracked.name,
+                    'samples': len(samples),
+                    'cpu_avg': round(sum(samples) / len(samples), 1) if samples else 0.0,
+                    'cpu_max': round(max(samples), 1) if samples else 0.0,
+                    'cpu_last': round(tracked.cpu_percent, 1),
+                }
+        return None
+
+    def __len__(self) -> int:
+        return len(self._procs)
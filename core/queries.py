@@ -0,0 +1,207 @@
+"""
+Keyset-paginated reads of events, actions and the audit log, shared by the
+query API (DatabaseManager.query) and the streaming export (core/export.py).
+
+Pages walk the rowid b-tree from a cursor id (`id < before_id` / `id >
+after_id`) instead of using OFFSET, so every page costs the same however deep
+it is. Filter columns are prefixed with unary + so the planner never trades
+that walk for a ts/type index followed by a sort.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+@dataclass(frozen=True)
+class Dataset:
+    table: str          # table whose id drives the pagination, aliased `t`
+    source: str         # FROM clause
+    columns: Tuple[Tuple[str, str], ...]    # (output name, SQL expression); id first
+    filters: Dict[str, str]                 # query parameter -> SQL expression
+
+    @property
+    def names(self) -> List[str]:
+        return [name for name, _ in self.columns]
+
+
+DATASETS = {
+    'events': Dataset(
+        table='events',
+        source='events t',
+        columns=(('id', 't.id'), ('timestamp', 't.timestamp'), ('ts', 't.ts'), ('type', 't.type'),
+                 ('severity', 't.severity'), ('description', 't.description'),
+                 ('metric_value', 't.metric_value'), ('threshold', 't.threshold')),
+        filters={'type': 't.type', 'severity': 't.severity'},
+    ),
+    'actions': Dataset(
+        table='actions',
+        source='actions t',
+        columns=(('id', 't.id'), ('event_id', 't.event_id'), ('timestamp', 't.timestamp'), ('ts', 't.ts'),
+                 ('type', 't.type'), ('status', 't.status'), ('output', 't.output'),
+                 ('duration_ms', 't.duration_ms'), ('target_process', 't.target_process'),
+                 ('target_service', 't.target_service'), ('files_deleted', 't.files_deleted'),
+                 ('target_pid', 't.target_pid')),
+        filters={'type': 't.type', 'status': 't.status', 'target_process': 't.target_process'},
+    ),
+    # Audit entries with the action they record and the event that caused it
+    'audit': Dataset(
+        table='audit_log',
+        source='audit_log t LEFT JOIN actions a ON a.id = t.action_id LEFT JOIN events e ON e.id = a.event_id',
+        columns=(('id', 't.id'), ('timestamp', 't.timestamp'), ('ts', 't.ts'), ('status', 't.status'),
+                 ('affected_resources', 't.affected_resources'), ('action_id', 't.action_id'),
+                 ('action_type', 'a.type'), ('action_status', 'a.status'), ('action_output', 'a.output'),
+                 ('duration_ms', 'a.duration_ms'), ('target_process', 'a.target_process'),
+                 ('target_service', 'a.target_service'), ('files_deleted', 'a.files_deleted'),
+                 ('event_id', 'a.event_id'), ('event_timestamp', 'e.timestamp'), ('event_type', 'e.type'),
+                 ('severity', 'e.severity'), ('event_description', 'e.description'),
+                 ('metric_value', 'e.metric_value'), ('threshold', 'e.threshold')),
+        filters={'type': 'a.type', 'status': 't.status', 'event_type': 'e.type', 'severity': 'e.severity'},
+    ),
+}
+
+
+def dataset(name: str) -> Dataset:
+    if name not in DATASETS:
+        raise ValueError(f"Unknown dataset '{name}'")
+    return DATASETS[name]
+
+
+def check_filters(ds: Dataset, filters: Optional[Dict[str, Sequence[str]]]):
+    unknown = set(filters or {}) - set(ds.filters)
+    if unknown:
+        raise ValueError(f"Unknown filter(s) for {ds.table}: {', '.join(sorted(unknown))}")
+
+
+def projection(ds: Dataset, fields: Optional[Sequence[str]] = None) -> Tuple[Tuple[str, str], ...]:
+    """Selected (name, expression) pairs; `id` is always included since it is the cursor."""
+    if not fields:
+        return ds.columns
+    known = dict(ds.columns)
+    unknown = [f for f in fields if f not in known]
+    if unknown:
+        raise ValueError(f"Unknown field(s) for {ds.table}: {', '.join(unknown)}")
+    return (('id', known['id']),) + tuple((f, known[f]) for f in dict.fromkeys(fields) if f != 'id')
+
+
+def first_id_since(conn, ds: Dataset, since: float) -> Optional[int]:
+    """Lowest id with ts >= since (covering scan of the ts index), None if there is none."""
+    return conn.execute(f"SELECT MIN(id) FROM {ds.table} WHERE ts >= ?", (int(since),)).fetchone()[0]
+
+
+def last_id_before(conn, ds: Dataset, until: Optional[float]) -> int:
+    """Highest id with ts < until (or overall), 0 for none."""
+    if until is None:
+        row = conn.execute(f"SELECT MAX(id) FROM {ds.table}").fetchone()
+    else:
+        row = conn.execute(f"SELECT MAX(id) FROM {ds.table} WHERE ts < ?", (int(until),)).fetchone()
+    return row[0] or 0
+
+
+def where_clause(ds: Dataset, filters: Optional[Dict[str, Sequence[str]]] = None,
+                 since: Optional[float] = None, until: Optional[float] = None) -> Tuple[List[str], list]:
+    """Non-cursor conditions, all prefixed with unary + (see module docstring)."""
+    where, params = [], []
+    if since is not None:
+        where.append("+t.ts >= ?")
+        params.append(int(since))
+    if until is not None:
+        where.append("+t.ts < ?")
+        params.append(int(until))
+    for name, values in (filters or {}).items():
+        if not values:
+            continue
+        where.append(f"+{ds.filters[name]} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    return where, params
+
+
+def page(conn, name: str, fields: Optional[Sequence[str]] = None,
+         filters: Optional[Dict[str, Sequence[str]]] = None,
+         since: Optional[float] = None, until: Optional[float] = None,
+         before_id: Optional[int] = None, after_id: Optional[int] = None,
+         limit: int = DEFAULT_LIMIT) -> Dict[str, Any]:
+    """
+    One page of rows, newest first.
+
+    Without a cursor (or with `before_id`) it holds the newest `limit` rows
+    older than the cursor; with `after_id` the oldest `limit` rows newer than
+    it, so polling with after_id = the newest id seen never skips rows.
+    `has_more` says whether further rows exist in that direction.
+    """
+    ds = dataset(name)
+    check_filters(ds, filters)
+    columns = projection(ds, fields)
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    if before_id is not None and after_id is not None:
+        raise ValueError("Use either before_id or after_id, not both")
+
+    where, params = where_clause(ds, filters, since, until)
+    if since is not None:
+        # Lower id bound so a sparse range doesn't walk the rest of the table
+        low = first_id_since(conn, ds, since)
+        if low is None:
+            return {'items': [], 'has_more': False}
+        where.append("t.id >= ?")
+        params.append(low)
+    if after_id is not None:
+        where.append("t.id > ?")
+        params.append(int(after_id))
+        order = 'ASC'
+    else:
+        if before_id is not None:
+            where.append("t.id < ?")
+            params.append(int(before_id))
+        order = 'DESC'
+    sql = (f"SELECT {', '.join(expr for _, expr in columns)} FROM {ds.source}"
+           f"{' WHERE ' + ' AND '.join(where) if where else ''} ORDER BY t.id {order} LIMIT ?")
+    rows = conn.execute(sql, (*params, limit + 1)).fetchall()
+    names = [n for n, _ in columns]
+    items = [dict(zip(names, row)) for row in rows[:limit]]
+    if order == 'ASC':
+        items.reverse()
+    return {'items': items, 'has_more': len(rows) > limit}
+
+
+def get(conn, name: str, row_id: int, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+    """Single row by primary key."""
+    ds = dataset(name)
+    columns = projection(ds, fields)
+    row = conn.execute(f"SELECT {', '.join(expr for _, expr in columns)} FROM {ds.source} WHERE t.id = ?",
+                       (int(row_id),)).fetchone()
+    return dict(zip([n for n, _ in columns], row)) if row else None
+
+
+def iter_pages(conn, name: str, since: Optional[float] = None, until: Optional[float] = None,
+               filters: Optional[Dict[str, Sequence[str]]] = None, page_size: int = 2000):
+    """
+    All matching rows as tuples in id order, `page_size` at a time (export).
+
+    The id range is fixed up front, so rows written meanwhile don't extend
+    it. Each page is its own short statement rather than one cursor held
+    open for the whole export: a read that spans the export would pin its WAL
+    snapshot and stop checkpoints for as long as a multi-GB download takes.
+    """
+    ds = dataset(name)
+    after = 0
+    if since is not None:
+        low = first_id_since(conn, ds, since)
+        if low is None:
+            return
+        after = low - 1
+    last = last_id_before(conn, ds, until)
+    if last <= after:
+        return
+    where, params = where_clause(ds, filters, since, until)
+    where = ["t.id > ?", "t.id <= ?"] + where
+    sql = (f"SELECT {', '.join(expr for _, expr in ds.columns)} FROM {ds.source} "
+           f"WHERE {' AND '.join(where)} ORDER BY t.id LIMIT ?")
+    while True:
+        rows = [tuple(row) for row in conn.execute(sql, (after, last, *params, page_size))]
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        after = rows[-1][0]
@@ -0,0 +1,174 @@
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional
+
+from .error_handling import logger
+
+# Actions that must not run concurrently with themselves
+DEFAULT_TYPE_LIMITS = {
+    'action_free_disk_space': 1,
+    'action_restart_service': 1,
+    'action_handle_updates_pending': 1,
+}
+
+
+@dataclass
+class RemediationResult:
+    action_type: str
+    status: str  # 'success', 'failed', 'timeout', 'cancelled'
+    output: str
+    extra: Dict[str, Any] = field(default_factory=dict)
+    started_at: Optional[float] = None  # epoch seconds; None if it never ran
+    duration_ms: int = 0
+
+    @property
+    def success(self) -> bool:
+        return self.status == 'success'
+
+
+class RemediationTask:
+    """Handle for one submitted action. `future` resolves to a RemediationResult."""
+
+    def __init__(self, action_type: str, issue_dict: dict, deadline: float, context: Any = None):
+        self.action_type = action_type
+        self.issue_dict = issue_dict
+        self.deadline = deadline  # time.monotonic() by which it must have finished
+        self.context = context  # caller data handed back with the result (e.g. the incident decision)
+        self.future: Future = Future()
+
+    @property
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def cancel(self) -> bool:
+        """Cancel if not started yet; a running action cannot be interrupted."""
+        return self.future.cancel()
+
+
+class RemediationDispatcher:
+    """
+    Runs executor actions off the health-check thread.
+
+    - A bounded pool of `max_workers` threads; actions beyond that wait.
+    - Per-action-type limits (e.g. one disk cleanup at a time). An action
+      over its limit waits in a per-type queue and does not hold a worker.
+    - Every task has a deadline. Tasks still waiting when it passes finish
+      as 'timeout' without running; running tasks get the remaining time as
+      issue_dict['timeout'], which executors pass to their subprocess or
+      PowerShell calls.
+    - `duration_ms` is measured around the executor call.
+    """
+
+    def __init__(self, executor, max_workers: int = 4, type_limits: Optional[Dict[str, int]] = None,
+                 default_deadline: float = 60.0):
+        self.executor = executor
+        self.type_limits = dict(DEFAULT_TYPE_LIMITS if type_limits is None else type_limits)
+        self.default_deadline = default_deadline
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='remediation')
+        self._lock = threading.Lock()
+        self._running: Dict[str, int] = defaultdict(int)
+        self._waiting: Dict[str, Deque[RemediationTask]] = defaultdict(deque)
+        self._closed = False
+        self._cancel_on_close = False
+        self.completed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+
+    def submit(self, action_type: str, issue_dict: dict, deadline: Optional[float] = None,
+               on_done: Optional[Callable[[RemediationTask, RemediationResult], None]] = None,
+               context: Any = None) -> RemediationTask:
+        """Queue an action; `on_done(task, result)` runs on a worker thread when it finishes."""
+        task = RemediationTask(action_type, dict(issue_dict),
+                               time.monotonic() + (deadline if deadline is not None else self.default_deadline), context)
+        if on_done:
+            task.future.add_done_callback(lambda f: self._notify(on_done, task, f))
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("RemediationDispatcher is shut down")
+            limit = self.type_limits.get(action_type)
+            if limit is not None and self._running[action_type] >= limit:
+                self._waiting[action_type].append(task)
+            else:
+                self._start(task)
+        return task
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(len(q) for q in self._waiting.values()) + sum(self._running.values())
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = True):
+        with self._lock:
+            self._closed = True
+            self._cancel_on_close = cancel_pending
+            if cancel_pending:
+                for waiting in self._waiting.values():
+                    while waiting:
+                        if waiting.popleft().cancel():
+                            self.cancelled += 1
+        # Tasks already handed to the pool see _cancel_on_close and resolve as cancelled
+        self._pool.shutdown(wait=wait)
+
+    # --- Internals ---
+
+    def _start(self, task: RemediationTask):
+        """Called with the lock held."""
+        self._running[task.action_type] += 1
+        self._pool.submit(self._run, task)
+
+    def _run(self, task: RemediationTask):
+        try:
+            if self._cancel_on_close:
+                task.cancel()
+            if not task.future.set_running_or_notify_cancel():
+                self.cancelled += 1
+                return
+            if task.remaining <= 0:
+                self.timed_out += 1
+                task.future.set_result(RemediationResult(task.action_type, 'timeout', "Deadline passed before the action could start."))
+                return
+
+            started_at = time.time()
+            started = time.perf_counter()
+            task.issue_dict['timeout'] = task.remaining
+            try:
+                success, output, extra = self.executor.execute_action(task.action_type, task.issue_dict)
+                status = 'success' if success else 'failed'
+            except Exception as e:
+                logger.error(f"Remediation {task.action_type} raised: {e}")
+                success, output, extra, status = False, f"Execution failed: {e}", {}, 'failed'
+            duration_ms = int((time.perf_counter() - started) * 1000)
+            if task.remaining < 0 and not success:
+                status = 'timeout'
+                self.timed_out += 1
+            self.completed += 1
+            task.future.set_result(RemediationResult(task.action_type, status, output, extra or {}, started_at, duration_ms))
+        finally:
+            self._release(task.action_type)
+
+    def _release(self, action_type: str):
+        with self._lock:
+            self._running[action_type] -= 1
+            waiting = self._waiting.get(action_type)
+            while waiting:
+                task = waiting.popleft()
+                if self._closed:
+                    task.cancel()  # the pool no longer accepts work
+                if task.future.cancelled():
+                    self.cancelled += 1
+                    continue
+                self._start(task)
+                break
+
+    @staticmethod
+    def _notify(on_done, task: RemediationTask, future: Future):
+        if future.cancelled():
+            result = RemediationResult(task.action_type, 'cancelled', "Cancelled before it started.")
+        else:
+            result = future.result()
+        try:
+            on_done(task, result)
+        except Exception as e:
+            logger.error(f"Remediation callback for {task.action_type} failed: {e}")
@@ -0,0 +1,210 @@
+import math
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .error_handling import logger
+
+METRICS = ('cpu', 'memory', 'disk')
+
+# (name, bucket width in seconds, source) - each tier is rolled up from the previous one
+TIERS = (
+    ('1m', 60, 'raw'),
+    ('1h', 3600, '1m'),
+    ('1d', 86400, '1h'),
+)
+
+# Buckets are only closed once they are this far in the past, so rows still
+# sitting in the write-behind queue land before their bucket is aggregated.
+SETTLE_SECONDS = 30
+
+DEFAULT_ROLLUP_RETENTION_DAYS = {'1m': 7, '1h': 90, '1d': 730}
+
+PRUNE_CHUNK = 5000
+
+
+def rollup_table(tier: str) -> str:
+    return f"metrics_rollup_{tier}"
+
+
+def percentile(values: Sequence[float], pct: float, weights: Optional[Sequence[float]] = None) -> Optional[float]:
+    """Nearest-rank percentile, optionally weighted (used for p95 of child buckets)."""
+    if not values:
+        return None
+    if weights is None:
+        ordered = sorted(values)
+        rank = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+        return ordered[rank]
+    pairs = sorted(zip(values, weights))
+    target = pct / 100.0 * sum(w for _, w in pairs)
+    running = 0.0
+    for value, weight in pairs:
+        running += weight
+        if running >= target:
+            return value
+    return pairs[-1][0]
+
+
+class RetentionEngine:
+    """
+    Keeps metrics_history bounded by time instead of row count.
+
+    Raw samples are kept for `raw_retention_hours`, then survive as 1-minute,
+    1-hour and 1-day aggregates (min/max/avg/p95 per metric). Each tier is
+    built incrementally from the tier below it, starting after the newest
+    bucket already written, and every delete is a range delete on an indexed
+    column. `run()` is meant to be scheduled on its own interval, away from
+    the insert path.
+
+    `watermark`, if given, returns the epoch time up to which raw samples are
+    known to be in SQLite (the metrics ring drainer may be behind); buckets
+    after it are left for a later run.
+    """
+
+    def __init__(self, db_manager, raw_retention_hours: float = 24,
+                 rollup_retention_days: Optional[Dict[str, float]] = None,
+                 watermark: Optional[Callable[[], float]] = None):
+        self.db = db_manager
+        self.watermark = watermark
+        self.raw_retention_hours = raw_retention_hours
+        self.rollup_retention_days = dict(DEFAULT_ROLLUP_RETENTION_DAYS)
+        if rollup_retention_days:
+            self.rollup_retention_days.update(rollup_retention_days)
+
+    def run(self, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        try:
+            for tier, width, source in TIERS:
+                self.rollup(tier, width, source, now)
+            self.prune(now)
+        except Exception as e:
+            logger.error(f"Metrics retention run failed: {e}")
+
+    # --- Rollups ---
+
+    def rollup(self, tier: str, width: int, source: str, now: float) -> int:
+        """Aggregate all complete, not yet aggregated buckets of `tier`. Returns buckets written."""
+        settled = now - SETTLE_SECONDS
+        if self.watermark is not None:
+            settled = min(settled, self.watermark())
+        end = math.floor(settled / width) * width
+        start = self._next_bucket(tier, width, source)
+        if start is None or start >= end:
+            return 0
+
+        if source == 'raw':
+            buckets = self._group_raw(start, end, width)
+        else:
+            buckets = self._group_rollup(source, start, end, width)
+
+        table = rollup_table(tier)
+        columns = ['bucket_start', 'samples'] + [f"{m}_{s}" for m in METRICS for s in ('min', 'max', 'avg', 'p95')]
+        sql = f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        with self.db.pool.writer() as conn:
+            conn.executemany(sql, buckets)
+        return len(buckets)
+
+    def _next_bucket(self, tier: str, width: int, source: str) -> Optional[int]:
+        reader = self.db.pool.reader()
+        row = reader.execute(f"SELECT MAX(bucket_start) FROM {rollup_table(tier)}").fetchone()
+        if row[0] is not None:
+            return row[0] + width
+        # First run: start at the oldest source row
+        if source == 'raw':
+            first = reader.execute("SELECT MIN(ts) FROM metrics_history").fetchone()[0]
+        else:
+            row = reader.execute(f"SELECT MIN(bucket_start) FROM {rollup_table(source)}").fetchone()
+            first = row[0]
+        if first is None:
+            return None
+        return int(math.floor(first / width) * width)
+
+    def _group_raw(self, start: int, end: int, width: int) -> List[tuple]:
+        rows = self.db.pool.reader().execute(
+            "SELECT ts, cpu_percent, memory_percent, disk_percent FROM metrics_history "
+            "WHERE ts >= ? AND ts < ? ORDER BY ts",
+            (start, end)
+        ).fetchall()
+        grouped: Dict[int, List[Tuple[float, float, float]]] = {}
+        for ts, cpu, mem, disk in rows:
+            bucket = ts // width * width
+            grouped.setdefault(bucket, []).append((cpu, mem, disk))
+
+        buckets = []
+        for bucket, samples in sorted(grouped.items()):
+            record = [bucket, len(samples)]
+            for idx in range(len(METRICS)):
+                values = [s[idx] for s in samples if s[idx] is not None]
+                record.extend(self._stats(values))
+            buckets.append(tuple(record))
+        return buckets
+
+    def _group_rollup(self, source: str, start: int, end: int, width: int) -> List[tuple]:
+        reader = self.db.pool.reader()
+        rows = reader.execute(
+            f"SELECT * FROM {rollup_table(source)} WHERE bucket_start >= ? AND bucket_start < ? ORDER BY bucket_start",
+            (start, end)
+        ).fetchall()
+        grouped: Dict[int, list] = {}
+        for row in rows:
+            grouped.setdefault(row['bucket_start'] // width * width, []).append(row)
+
+        buckets = []
+        for bucket, children in sorted(grouped.items()):
+            record = [bucket, sum(c['samples'] for c in children)]
+            for m in METRICS:
+                present = [c for c in children if c[f"{m}_avg"] is not None]
+                if not present:
+                    record.extend([None, None, None, None])
+                    continue
+                weights = [c['samples'] for c in present]
+                total = sum(weights)
+                record.extend([
+                    min(c[f"{m}_min"] for c in present),
+                    max(c[f"{m}_max"] for c in present),
+                    sum(c[f"{m}_avg"] * c['samples'] for c in present) / total,
+                    # Approximation: sample-weighted p95 of the child p95s
+                    percentile([c[f"{m}_p95"] for c in present], 95, weights),
+                ])
+            buckets.append(tuple(record))
+        return buckets
+
+    @staticmethod
+    def _stats(values: List[float]) -> Iterable[Optional[float]]:
+        if not values:
+            return (None, None, None, None)
+        return (min(values), max(values), sum(values) / len(values), percentile(values, 95))
+
+    # --- Pruning ---
+
+    def prune(self, now: float):
+        """Range-delete expired rows. Nothing is dropped before it has been rolled up."""
+        reader = self.db.pool.reader()
+
+        cutoff = now - self.raw_retention_hours * 3600
+        rolled = reader.execute("SELECT MAX(bucket_start) FROM metrics_rollup_1m").fetchone()[0]
+        if rolled is not None:
+            cutoff = min(cutoff, rolled + 60)
+            self._delete_chunked(
+                "DELETE FROM metrics_history WHERE id IN "
+                "(SELECT id FROM metrics_history WHERE ts < ? LIMIT ?)",
+                int(cutoff)
+            )
+
+        for (tier, width, _), parent in zip(TIERS, TIERS[1:] + (None,)):
+            cutoff = now - self.rollup_retention_days.get(tier, 0) * 86400
+            if parent is not None:
+                parent_tier, parent_width, _ = parent
+                parent_rolled = reader.execute(f"SELECT MAX(bucket_start) FROM {rollup_table(parent_tier)}").fetchone()[0]
+                if parent_rolled is None:
+                    continue
+                cutoff = min(cutoff, parent_rolled + parent_width)
+            with self.db.pool.writer() as conn:
+                conn.execute(f"DELETE FROM {rollup_table(tier)} WHERE bucket_start < ?", (int(cutoff),))
+
+    def _delete_chunked(self, sql: str, cutoff):
+        # Small transactions so dashboard reads and the write queue are not starved
+        while True:
+            with self.db.pool.writer() as conn:
+                deleted = conn.execute(sql, (cutoff, PRUNE_CHUNK)).rowcount
+            if deleted < PRUNE_CHUNK:
+                return
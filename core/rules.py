@@ -0,0 +1,463 @@
+import json
+import os
+import string
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from .error_handling import logger
+from .timeseries import AGGREGATES
+
+# Built-in checks; same events as the original hardcoded analyzer
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {
+        'name': 'cpu_high', 'event_type': 'cpu_high',
+        'metric': 'cpu_percent', 'op': '>', 'threshold': 80.0, 'threshold_setting': 'cpu_threshold',
+        'severity': 'warning', 'bands': [[95, 'critical']],
+        'description': "CPU usage is at {value}% (Top: {top_process})",
+    },
+    {
+        'name': 'memory_high', 'event_type': 'memory_high',
+        'metric': 'memory_percent', 'op': '>', 'threshold': 85.0, 'threshold_setting': 'memory_threshold',
+        'severity': 'warning',
+        'description': "Memory usage is at {value}%",
+    },
+    {
+        'name': 'disk_low', 'event_type': 'disk_low',
+        'metric': 'disk_percent', 'op': '>', 'threshold': 90.0, 'threshold_setting': 'disk_threshold',
+        'severity': 'critical',
+        'description': "Disk usage is at {value}%",
+    },
+    {
+        # Every other mounted volume (the system volume is disk_low above)
+        'name': 'volume_low', 'event_type': 'volume_low',
+        'foreach': 'volumes', 'where': {'system': False},
+        'metric': 'percent', 'op': '>', 'threshold': 90.0, 'threshold_setting': 'disk_threshold',
+        'severity': 'critical',
+        'description': "Disk usage on {name} is at {value}%",
+    },
+    {
+        # Service down + StartType=Automatic -> service_crashed
+        'name': 'service_crashed', 'event_type': 'service_crashed',
+        'foreach': 'services', 'where': {'start_type': 'Auto'},
+        'metric': 'status', 'op': '!=', 'threshold': 'running',
+        'severity': 'critical', 'event_value': 0, 'event_threshold': 1,
+        'description': "Service {name} is stopped but set to Auto start.",
+    },
+    {
+        'name': 'updates_pending', 'event_type': 'updates_pending',
+        'metric': 'updates_pending', 'default': 0, 'op': '>', 'threshold': 5, 'threshold_setting': 'updates_pending_threshold',
+        'severity': 'warning',
+        'description': "{value} Windows updates are pending.",
+    },
+]
+
+NUMERIC_OPS = ('>', '>=', '<', '<=')
+_NOT_COMPILED = object()
+EQUALITY_OPS = ('==', '!=')
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    One declarative check.
+
+    - metric: dotted path into the metrics snapshot (or into each item of
+      `foreach`, e.g. every entry of metrics['services'])
+    - op/threshold: comparison; `threshold_setting` takes the live value
+      from the settings table instead
+    - bands: [[level, severity], ...] - severity once the value reaches `level`
+    - for_samples: consecutive matching samples before the rule fires
+    - hysteresis: once firing, keeps firing until the value is this far back
+      on the other side of the threshold
+    - window_seconds/aggregate: compare an aggregate of the metric's recent
+      history (time-series store) instead of the latest value, e.g.
+      aggregate 'min' over 300s > 80 = "above 80 for five minutes"; 'rate'
+      is the trend in units per hour
+    """
+    name: str
+    event_type: str
+    metric: str
+    op: str = '>'
+    threshold: Any = None
+    threshold_setting: Optional[str] = None
+    severity: str = 'warning'
+    bands: Tuple[Tuple[float, str], ...] = ()
+    for_samples: int = 1
+    hysteresis: float = 0.0
+    foreach: Optional[str] = None
+    where: Mapping[str, Any] = field(default_factory=dict)
+    default: Any = None
+    description: str = ''
+    event_value: Optional[float] = None
+    event_threshold: Optional[float] = None
+    window_seconds: float = 0.0
+    aggregate: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, spec: Mapping[str, Any]) -> 'Rule':
+        spec = dict(spec)
+        spec.setdefault('event_type', spec.get('name'))
+        if not spec.get('name') or not spec.get('metric'):
+            raise ValueError(f"Rule needs 'name' and 'metric': {spec}")
+        if spec.get('op', '>') not in NUMERIC_OPS + EQUALITY_OPS:
+            raise ValueError(f"Rule {spec['name']}: unknown op {spec.get('op')!r}")
+        spec['bands'] = tuple((float(level), severity) for level, severity in spec.get('bands') or ())
+        spec['for_samples'] = max(1, int(spec.get('for_samples', 1)))
+        spec['hysteresis'] = float(spec.get('hysteresis', 0.0))
+        spec['window_seconds'] = float(spec.get('window_seconds', 0.0))
+        if spec.get('aggregate') is not None or spec['window_seconds']:
+            if spec.get('aggregate') not in AGGREGATES or spec['window_seconds'] <= 0:
+                raise ValueError(f"Rule {spec['name']}: 'aggregate' must be one of {AGGREGATES} with a positive 'window_seconds'")
+            if spec.get('foreach') or spec.get('op', '>') not in NUMERIC_OPS:
+                raise ValueError(f"Rule {spec['name']}: aggregates need a top-level metric and a numeric op")
+        known = cls.__dataclass_fields__
+        unknown = set(spec) - set(known)
+        if unknown:
+            raise ValueError(f"Rule {spec['name']}: unknown fields {sorted(unknown)}")
+        return cls(**spec)
+
+
+class Firing:
+    """
+    A rule (instance) that is currently firing. Severity and description are
+    only computed when read, so firings that end up deduplicated or ignored
+    cost no string formatting.
+    """
+
+    __slots__ = ('_compiled', 'order', '_value', 'item_name', '_metrics')
+
+    def __init__(self, compiled: '_Compiled', order: Tuple[int, int], value: Any, item_name, metrics: Mapping[str, Any]):
+        self._compiled = compiled
+        self.order = order
+        self._value = value
+        self.item_name = item_name
+        self._metrics = metrics
+
+    @property
+    def rule(self) -> Rule:
+        return self._compiled.rule
+
+    @property
+    def value(self) -> Any:
+        rule = self._compiled.rule
+        return rule.event_value if rule.event_value is not None else self._value
+
+    @property
+    def threshold(self) -> Any:
+        rule = self._compiled.rule
+        return rule.event_threshold if rule.event_threshold is not None else self._compiled.threshold
+
+    @property
+    def severity(self) -> str:
+        return self._compiled.severity(self._value)
+
+    @property
+    def description(self) -> str:
+        c = self._compiled
+        if not c.fields:
+            return c.template
+        context = {'value': self._value, 'threshold': c.threshold, 'name': self.item_name,
+                   'severity': self.severity, 'metric': c.rule.metric}
+        if 'top_process' in c.fields:
+            top = self._metrics.get('top_processes') or []
+            context['top_process'] = top[0].get('name', 'unknown') if top else 'unknown'
+        try:
+            return c.template.format_map(context)
+        except (KeyError, ValueError, IndexError):
+            return c.template
+
+
+def load_rules(config=None, rules_file: Optional[str] = None) -> List[Rule]:
+    """
+    Rules from `rules_file` (a JSON list) if given, else DEFAULT_RULES; then
+    the 'analyzer_rules' setting (JSON list) is applied on top, replacing
+    rules with the same name.
+    """
+    specs = DEFAULT_RULES
+    if rules_file and os.path.exists(rules_file):
+        with open(rules_file) as f:
+            specs = json.load(f)
+    by_name: Dict[str, Dict[str, Any]] = {spec['name']: spec for spec in specs}
+
+    overrides = config.raw.get('analyzer_rules') if config is not None else None
+    if overrides:
+        try:
+            for spec in json.loads(overrides):
+                by_name[spec['name']] = spec
+        except (ValueError, TypeError, KeyError) as e:
+            logger.error(f"Ignoring invalid analyzer_rules setting: {e}")
+
+    rules = []
+    for spec in by_name.values():
+        try:
+            rules.append(Rule.from_dict(spec))
+        except (ValueError, TypeError) as e:
+            logger.error(f"Ignoring invalid rule: {e}")
+    return rules
+
+
+def _path(dotted: str) -> Tuple[str, ...]:
+    return tuple(dotted.split('.'))
+
+
+def _lookup(data, path: Tuple[str, ...], default=None):
+    for key in path:
+        if not isinstance(data, Mapping) or key not in data:
+            return default
+        data = data[key]
+    return data
+
+
+class _Compiled:
+    """Per-rule data resolved at compile time."""
+
+    __slots__ = ('rule', 'name', 'for_samples', 'hysteresis', 'index', 'threshold', 'sign', 'level', 'clear', 'band_levels', 'band_severities',
+                 'template', 'fields')
+
+    def __init__(self, rule: Rule, index: int, threshold: Any):
+        self.rule = rule
+        self.name = rule.name
+        self.for_samples = rule.for_samples
+        self.hysteresis = rule.hysteresis
+        self.index = index
+        self.threshold = threshold
+        # '<' rules are evaluated as '>' on negated values, so every numeric
+        # group can share one ascending threshold array
+        self.sign = -1.0 if rule.op in ('<', '<=') else 1.0
+        self.level = self.clear = None
+        if rule.op in NUMERIC_OPS:
+            self.level = self.sign * float(threshold)
+            self.clear = self.level - rule.hysteresis
+        bands = sorted((self.sign * level, severity) for level, severity in rule.bands)
+        self.band_levels = [level for level, _ in bands]
+        self.band_severities = [severity for _, severity in bands]
+        self.template = rule.description
+        self.fields = {name for _, name, _, _ in string.Formatter().parse(rule.description) if name}
+
+    def severity(self, value: float) -> str:
+        if not self.band_levels:
+            return self.rule.severity
+        i = bisect_right(self.band_levels, self.sign * value)
+        return self.band_severities[i - 1] if i else self.rule.severity
+
+
+class _NumericGroup:
+    """
+    All numeric rules reading the same metric with the same strictness.
+    Thresholds are kept sorted in an array, so the rules a value crosses are
+    a prefix found with one bisect instead of one comparison per rule.
+    """
+
+    def __init__(self, strict: bool, sign: float, rules: List[_Compiled]):
+        self.strict = strict
+        self.sign = sign
+        self.rules = sorted(rules, key=lambda c: c.level)
+        self.levels = array('d', (c.level for c in self.rules))
+
+    def crossed(self, value: float) -> List[_Compiled]:
+        v = self.sign * value
+        n = bisect_left(self.levels, v) if self.strict else bisect_right(self.levels, v)
+        return self.rules[:n]
+
+
+class _EqualityGroup:
+    """'==' / '!=' rules on the same metric, indexed by threshold value."""
+
+    def __init__(self, negate: bool, rules: List[_Compiled]):
+        self.negate = negate
+        self.rules = rules
+        self.by_value: Dict[Any, List[_Compiled]] = {}
+        for c in rules:
+            self.by_value.setdefault(c.threshold, []).append(c)
+
+    def crossed(self, value: Any) -> List[_Compiled]:
+        equal = self.by_value.get(value, [])
+        if not self.negate:
+            return equal
+        if not equal:
+            return self.rules
+        excluded = {id(c) for c in equal}
+        return [c for c in self.rules if id(c) not in excluded]
+
+
+class RuleEngine:
+    """
+    Evaluates a rule set against metrics snapshots and keeps per-rule state
+    (consecutive-sample counters, hysteresis) between calls.
+
+    Rules are compiled once per settings version: grouped by metric and
+    comparison, with thresholds resolved from settings and description
+    templates parsed up front. Evaluating a snapshot reads each metric once
+    and finds crossed thresholds by bisection; only crossed, pending or
+    firing rules are touched individually.
+
+    Rules with an `aggregate` read the TimeSeriesStore passed as `store`
+    (skipped without one).
+    """
+
+    def __init__(self, rules: Optional[Iterable[Rule]] = None, rules_file: Optional[str] = None, store=None):
+        self._static_rules = list(rules) if rules is not None else None
+        self.rules_file = rules_file
+        self.store = store
+        self._compiled_for = _NOT_COMPILED
+        self._compiled: List[_Compiled] = []
+        self._scopes: List[Tuple[Optional[str], Dict[str, Any], List]] = []
+        # State, keyed by (rule name, item name) so it survives recompiles
+        self._counts: Dict[Tuple[str, Optional[str]], int] = {}
+        self._firing: Set[Tuple[str, Optional[str]]] = set()
+        # Firing rules with hysteresis per (numeric group, item)
+        self._held: Dict[Tuple[int, Optional[str]], List[_Compiled]] = {}
+
+    @property
+    def rules(self) -> List[Rule]:
+        return [c.rule for c in self._compiled]
+
+    def headroom(self, metrics: Mapping[str, Any], config=None) -> float:
+        """
+        Smallest relative distance between a metric and the next threshold it
+        has not crossed yet (0.0 if any numeric rule is crossed, inf without
+        numeric rules). Lets the scheduler sample faster near a threshold.
+        """
+        if getattr(config, 'version', None) != self._compiled_for:
+            self.compile(config)
+        nearest = float('inf')
+        for foreach, where, groups in self._scopes:
+            items = [metrics] if foreach is None else [
+                item for item in (_lookup(metrics, _path(foreach), []) or [])
+                if isinstance(item, Mapping) and all(item.get(k) == v for k, v in where.items())]
+            for item in items:
+                for path, default, window, group in groups:
+                    if not isinstance(group, _NumericGroup):
+                        continue
+                    value = self._value(item, path, default, window)
+                    if isinstance(value, bool) or not isinstance(value, (int, float)):
+                        continue
+                    n = len(group.crossed(value))
+                    if n:
+                        return 0.0
+                    level = group.levels[0]
+                    nearest = min(nearest, (level - group.sign * value) / max(abs(level), 1e-9))
+        return nearest
+
+    def _value(self, item, path, default, window):
+        if window is None:
+            return _lookup(item, path, default)
+        # (metric, aggregate, seconds) over the store's most recent samples
+        metric, how, seconds = window
+        store = self.store
+        last = store.last_ts if store is not None else None
+        if last is None:
+            return None
+        try:
+            return store.aggregate(metric, how, since=last - seconds)
+        except KeyError:
+            return None
+
+    def compile(self, config=None):
+        rules = self._static_rules if self._static_rules is not None else load_rules(config, self.rules_file)
+        compiled = []
+        for index, rule in enumerate(rules):
+            threshold = rule.threshold
+            if rule.threshold_setting and config is not None:
+                threshold = config.get(rule.threshold_setting, threshold)
+            if rule.op in NUMERIC_OPS:
+                try:
+                    if isinstance(threshold, bool) or not isinstance(threshold, (int, float)):
+                        threshold = float(threshold)
+                except (TypeError, ValueError):
+                    logger.error(f"Rule {rule.name}: non-numeric threshold {threshold!r}; skipped")
+                    continue
+            compiled.append(_Compiled(rule, index, threshold))
+
+        # (foreach, where) -> (metric path, op family) -> group
+        buckets: Dict[Tuple, Dict[Tuple, List[_Compiled]]] = {}
+        for c in compiled:
+            rule = c.rule
+            scope = (rule.foreach, tuple(sorted(rule.where.items())))
+            if rule.op in NUMERIC_OPS:
+                kind = ('num', rule.op in ('>', '<'), c.sign)
+            else:
+                kind = ('eq', rule.op == '!=')
+            window = (rule.metric, rule.aggregate, rule.window_seconds) if rule.aggregate else None
+            buckets.setdefault(scope, {}).setdefault((_path(rule.metric), rule.default, window, kind), []).append(c)
+
+        scopes = []
+        for (foreach, where), groups in buckets.items():
+            built = []
+            for (path, default, window, kind), members in groups.items():
+                group = _NumericGroup(kind[1], kind[2], members) if kind[0] == 'num' else _EqualityGroup(kind[1], members)
+                built.append((path, default, window, group))
+            scopes.append((foreach, dict(where), built))
+
+        self._compiled = compiled
+        self._scopes = scopes
+        self._compiled_for = getattr(config, 'version', None)
+        names = {c.rule.name for c in compiled}
+        self._counts = {k: v for k, v in self._counts.items() if k[0] in names}
+        self._firing = {k for k in self._firing if k[0] in names}
+        # Re-attach firing rules to the rebuilt groups so hysteresis carries over
+        numeric = {c.rule.name: (group, c) for _, _, built in scopes for _, _, _, group in built
+                   if isinstance(group, _NumericGroup) for c in group.rules if c.hysteresis}
+        self._held = {}
+        for name, item_name in self._firing:
+            if name in numeric:
+                group, c = numeric[name]
+                self._held.setdefault((id(group), item_name), []).append(c)
+
+    def evaluate(self, metrics: Mapping[str, Any], config=None) -> List[Firing]:
+        if getattr(config, 'version', None) != self._compiled_for:
+            self.compile(config)
+
+        firings: List[Firing] = []
+        counts: Dict[Tuple[str, Optional[str]], int] = {}
+        firing: Set[Tuple[str, Optional[str]]] = set()
+        held_next: Dict[Tuple[int, Optional[str]], List[_Compiled]] = {}
+        prev_counts = self._counts
+        prev_held = self._held
+
+        for foreach, where, groups in self._scopes:
+            if foreach is None:
+                items = [(None, 0, metrics)]
+            else:
+                items = [(item.get('name', i), i, item) for i, item in enumerate(_lookup(metrics, _path(foreach), []) or [])
+                         if isinstance(item, Mapping) and all(item.get(k) == v for k, v in where.items())]
+            for item_name, item_index, item in items:
+                for path, default, window, group in groups:
+                    value = self._value(item, path, default, window)
+                    if value is None:
+                        continue
+                    numeric = isinstance(group, _NumericGroup)
+                    if numeric and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                        continue
+                    candidates = group.crossed(value)
+                    group_key = (id(group), item_name)
+                    if numeric and group_key in prev_held:
+                        # Hysteresis: rules that fired last time but are no longer crossed
+                        # stay on until the value passes their clear level
+                        v = group.sign * value
+                        held = [c for c in prev_held[group_key]
+                                if (c.level >= v if group.strict else c.level > v) and v > c.clear]
+                        if held:
+                            candidates = candidates + held
+                    hysteresis = []
+                    for c in candidates:
+                        key = (c.name, item_name)
+                        count = prev_counts.get(key, 0) + 1
+                        counts[key] = count
+                        if count < c.for_samples:
+                            continue
+                        firing.add(key)
+                        if c.hysteresis:
+                            hysteresis.append(c)
+                        firings.append(Firing(c, (c.index, item_index), value, item_name, metrics))
+                    if hysteresis:
+                        held_next[group_key] = hysteresis
+
+        # Anything not matched this sample resets (non-consecutive)
+        self._counts = counts
+        self._firing = firing
+        self._held = held_next
+        firings.sort(key=lambda f: f.order)
+        return firings
@@ -0,0 +1,113 @@
+import copy
+import datetime
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from .error_handling import logger
+
+
+@dataclass(frozen=True)
+class MetricsSnapshot:
+    """
+    Immutable result of one collection cycle.
+    `metrics` is a read-only view; nested lists/dicts must not be mutated by readers.
+    """
+    metrics: Mapping[str, Any]
+    timestamp: str
+    collected_at: float = field(default_factory=time.monotonic)
+    duration_ms: int = 0
+    sequence: int = 0
+
+    @property
+    def age(self) -> float:
+        """Seconds since this snapshot was collected."""
+        return time.monotonic() - self.collected_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow copy suitable for jsonify()."""
+        data = dict(self.metrics)
+        data['timestamp'] = self.timestamp
+        data['age_seconds'] = round(self.age, 3)
+        data['sequence'] = self.sequence
+        return data
+
+
+class MetricsSampler:
+    """
+    Owns metric collection. A single background thread calls
+    `monitor.get_system_metrics()` every `interval` seconds and publishes the
+    result as the latest MetricsSnapshot. Readers never trigger collection.
+    """
+
+    def __init__(self, monitor, interval: float = 5.0):
+        self.monitor = monitor
+        self.interval = interval
+        self._latest: Optional[MetricsSnapshot] = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[MetricsSnapshot], None]] = []
+        self._sequence = 0
+
+    def add_listener(self, callback: Callable[[MetricsSnapshot], None]):
+        """Register a callback invoked (on the sampler thread) for every new snapshot."""
+        self._listeners.append(callback)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='metrics-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def latest(self, timeout: Optional[float] = None) -> Optional[MetricsSnapshot]:
+        """
+        Return the most recent snapshot. If none has been published yet, wait
+        up to `timeout` seconds (None = don't wait) for the first one.
+        """
+        snapshot = self._latest
+        if snapshot is None and timeout:
+            self._ready.wait(timeout)
+            snapshot = self._latest
+        return snapshot
+
+    def sample_now(self) -> Optional[MetricsSnapshot]:
+        """Collect synchronously and publish. Used by the sampler thread and at startup."""
+        started = time.monotonic()
+        metrics = self.monitor.get_system_metrics()
+        if not metrics:
+            # safe_execute returned {} - keep serving the previous snapshot
+            return None
+        self._sequence += 1
+        snapshot = MetricsSnapshot(
+            metrics=MappingProxyType(copy.deepcopy(metrics)),
+            timestamp=datetime.datetime.now().isoformat(),
+            duration_ms=int((time.monotonic() - started) * 1000),
+            sequence=self._sequence,
+        )
+        self._latest = snapshot  # atomic reference swap
+        self._ready.set()
+        for callback in self._listeners:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logger.error(f"Sampler listener {callback!r} failed: {e}")
+        return snapshot
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.sample_now()
+            except Exception as e:
+                logger.error(f"Error in metrics sampler: {e}")
+            elapsed = time.monotonic() - started
+            self._stop.wait(max(0.0, self.interval - elapsed))
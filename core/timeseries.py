@@ -0,0 +1,318 @@
+import math
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from .downsample import lttb_indices
+
+try:
+    import numpy as np
+except ImportError:  # optional: the same aggregates run in pure Python over the arrays
+    np = None
+
+SERIES = ('cpu_percent', 'memory_percent', 'disk_percent')
+PROCESS_SERIES = ('cpu_percent', 'rss_mb')
+# 'rate' is the least-squares slope in units per hour
+AGGREGATES = ('mean', 'min', 'max', 'last', 'count', 'p50', 'p95', 'p99', 'rate')
+
+NAN = float('nan')
+
+
+def _percentile_rank(pct: float, n: int) -> int:
+    # Nearest rank, same definition as the retention rollups
+    return max(0, math.ceil(pct / 100.0 * n) - 1)
+
+
+def aggregate(ts: array, values: array, how: str) -> Optional[float]:
+    """One aggregate over parallel arrays; NaN (not collected) samples are ignored."""
+    if how not in AGGREGATES:
+        raise ValueError(f"Unknown aggregate: {how}")
+    if np is not None:
+        v = np.frombuffer(values, dtype=np.float64)
+        keep = ~np.isnan(v)
+        v = v[keep]
+        n = len(v)
+        if how == 'count':
+            return float(n)
+        if not n:
+            return None
+        if how == 'mean':
+            return float(v.mean())
+        if how == 'min':
+            return float(v.min())
+        if how == 'max':
+            return float(v.max())
+        if how == 'last':
+            return float(v[-1])
+        if how == 'rate':
+            if n < 2:
+                return None
+            t = np.frombuffer(ts, dtype=np.float64)[keep]
+            t = t - t.mean()
+            denom = float((t * t).sum())
+            return float((t * (v - v.mean())).sum()) / denom * 3600 if denom else None
+        rank = _percentile_rank(float(how[1:]), n)
+        return float(np.partition(v, rank)[rank])
+
+    v = [x for x in values if x == x]
+    n = len(v)
+    if how == 'count':
+        return float(n)
+    if not n:
+        return None
+    if how == 'mean':
+        return math.fsum(v) / n
+    if how == 'min':
+        return min(v)
+    if how == 'max':
+        return max(v)
+    if how == 'last':
+        return v[-1]
+    if how == 'rate':
+        if n < 2:
+            return None
+        t = [x for x, y in zip(ts, values) if y == y]
+        t_mean, v_mean = math.fsum(t) / n, math.fsum(v) / n
+        denom = math.fsum((x - t_mean) ** 2 for x in t)
+        if not denom:
+            return None
+        return math.fsum((x - t_mean) * (y - v_mean) for x, y in zip(t, v)) / denom * 3600
+    return sorted(v)[_percentile_rank(float(how[1:]), n)]
+
+
+class _Columns:
+    """
+    Parallel array('d') columns in time order. Appends go to the end; the
+    oldest entries beyond `capacity` are cut off in chunks, so appends stay
+    amortized O(1).
+    """
+
+    def __init__(self, names: Sequence[str], capacity: int, with_ids: bool = False):
+        self.capacity = capacity
+        self.ts = array('d')
+        self.columns = {name: array('d') for name in names}
+        self.ids = array('q') if with_ids else None
+        self.start = 0  # entries before this index are expired
+
+    def __len__(self) -> int:
+        return len(self.ts) - self.start
+
+    def append(self, ts: float, values: Mapping[str, Any], row_id: Optional[int] = None):
+        if len(self.ts) > self.start and ts < self.ts[-1]:
+            ts = self.ts[-1]  # keep the time column sorted if the clock steps back
+        self.ts.append(ts)
+        for name, column in self.columns.items():
+            value = values.get(name)
+            column.append(NAN if value is None else float(value))
+        if self.ids is not None:
+            self.ids.append(row_id or 0)
+        if len(self) > self.capacity:
+            self.start += 1
+            if self.start >= self.capacity:
+                self._compact()
+
+    def _compact(self):
+        for column in [self.ts, self.ids, *self.columns.values()]:
+            if column is not None:
+                del column[:self.start]
+        self.start = 0
+
+    def bounds(self, since: Optional[float], until: Optional[float]):
+        lo = self.start if since is None else bisect_left(self.ts, since, self.start)
+        hi = len(self.ts) if until is None else bisect_left(self.ts, until, lo)
+        return lo, hi
+
+    def last_ts(self) -> Optional[float]:
+        return self.ts[-1] if len(self) else None
+
+
+class TimeSeriesStore:
+    """
+    In-process columnar store for recent metrics: one array('d') per series
+    (timestamp, cpu, memory, disk) plus sparse per-process series for the
+    processes that appear in the top lists.
+
+    - append: amortized O(1)
+    - time-range and id lookups: O(log n) bisection on the sorted columns
+    - aggregates (mean, min/max, percentiles, rate of change) run on array
+      slices, vectorized with NumPy when it is installed
+    - chart reads downsample on the columns (LTTB) and only build dicts for
+      the points returned
+
+    Ids are the metrics_history ids (metrics ring sequence numbers), so rows
+    served from here match the ones in SQLite.
+    """
+
+    def __init__(self, capacity: int = 17280, series: Sequence[str] = SERIES, process_capacity: int = 720,
+                 max_processes: int = 200):
+        self.series = tuple(series)
+        self.process_capacity = process_capacity
+        self.max_processes = max_processes
+        self._main = _Columns(self.series, capacity, with_ids=True)
+        self._processes: Dict[str, _Columns] = {}
+        self._lock = threading.Lock()
+
+    # --- Writes ---
+
+    def append(self, ts: float, values: Mapping[str, Any], row_id: Optional[int] = None,
+               processes: Optional[Iterable[Mapping[str, Any]]] = None):
+        with self._lock:
+            self._main.append(ts, values, row_id)
+            if processes:
+                self._append_processes(ts, processes)
+
+    def add_snapshot(self, ts: float, metrics: Mapping[str, Any], row_id: Optional[int] = None):
+        """Append a sampler snapshot, including its top CPU / memory processes."""
+        processes = {}
+        for key in ('top_processes', 'top_memory'):
+            for proc in metrics.get(key) or []:
+                if proc.get('name'):
+                    processes.setdefault(proc['name'], proc)
+        self.append(ts, metrics, row_id, processes.values())
+
+    def load(self, records: Iterable[Sequence[float]]):
+        """Bulk load (seq, ts, cpu, mem, disk) records, e.g. the metrics ring at startup."""
+        with self._lock:
+            for seq, ts, *values in records:
+                self._main.append(ts, dict(zip(SERIES, (None if v != v else v for v in values))), seq)
+
+    def shift_ids(self, offset: int):
+        """The metrics ring renumbered its records (see MetricsRing.ensure_after)."""
+        with self._lock:
+            ids = self._main.ids
+            for i in range(self._main.start, len(ids)):
+                ids[i] += offset
+
+    def _append_processes(self, ts: float, processes: Iterable[Mapping[str, Any]]):
+        for proc in processes:
+            name = proc['name']
+            columns = self._processes.get(name)
+            if columns is None:
+                if len(self._processes) >= self.max_processes:
+                    self._evict_process()
+                columns = self._processes[name] = _Columns(PROCESS_SERIES, self.process_capacity)
+            columns.append(ts, proc)
+
+    def _evict_process(self):
+        # Drop the series that has been out of the top lists the longest
+        stale = min(self._processes, key=lambda name: self._processes[name].last_ts() or 0)
+        del self._processes[stale]
+
+    # --- Row reads (same shape as metrics_history rows) ---
+
+    def __len__(self) -> int:
+        return len(self._main)
+
+    @property
+    def oldest_id(self) -> Optional[int]:
+        with self._lock:
+            return self._main.ids[self._main.start] if len(self._main) else None
+
+    @property
+    def last_ts(self) -> Optional[float]:
+        return self._main.last_ts()
+
+    def oldest_ts(self) -> Optional[float]:
+        with self._lock:
+            return self._main.ts[self._main.start] if len(self._main) else None
+
+    def latest(self, count: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            main = self._main
+            return self._rows(range(max(main.start, len(main.ts) - count), len(main.ts)))
+
+    def after(self, row_id: int, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Rows with an id above `row_id`, oldest first."""
+        with self._lock:
+            main = self._main
+            lo = bisect_right(main.ids, row_id, main.start)
+            return self._rows(range(lo, min(len(main.ids), lo + limit)))
+
+    def range(self, since: Optional[float] = None, until: Optional[float] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._rows(range(*self._main.bounds(since, until)))
+
+    def downsample(self, since: Optional[float], until: Optional[float], max_points: int,
+                   series: Sequence[str] = SERIES) -> List[Dict[str, Any]]:
+        """LTTB over [since, until) on the columns; dicts are only built for the points kept."""
+        with self._lock:
+            main = self._main
+            lo, hi = main.bounds(since, until)
+            indices = lttb_indices(main.ts[lo:hi], [main.columns[s][lo:hi] for s in series], max_points)
+            return self._rows(lo + i for i in indices)
+
+    def _rows(self, indices: Iterable[int]) -> List[Dict[str, Any]]:
+        main = self._main
+        ts, ids = main.ts, main.ids
+        columns = [(name, main.columns[name]) for name in self.series]
+        rows = []
+        for i in indices:
+            row = {'id': ids[i], 'timestamp': datetime.fromtimestamp(ts[i]).isoformat(), 'ts': int(ts[i])}
+            for name, column in columns:
+                value = column[i]
+                row[name] = None if value != value else value
+            rows.append(row)
+        return rows
+
+    # --- Aggregates ---
+
+    def aggregate(self, series: str, how: str, since: Optional[float] = None,
+                  until: Optional[float] = None) -> Optional[float]:
+        """mean / min / max / last / count / p50 / p95 / p99 / rate (per hour) of a series over [since, until)."""
+        with self._lock:
+            main = self._main
+            if series not in main.columns:
+                raise KeyError(f"Unknown series: {series}")
+            lo, hi = main.bounds(since, until)
+            ts, values = main.ts[lo:hi], main.columns[series][lo:hi]
+        return aggregate(ts, values, how)
+
+    def summary(self, series: str, since: Optional[float] = None, until: Optional[float] = None,
+                hows: Sequence[str] = ('mean', 'p95', 'max', 'rate')) -> Dict[str, Optional[float]]:
+        with self._lock:
+            lo, hi = self._main.bounds(since, until)
+            ts, values = self._main.ts[lo:hi], self._main.columns[series][lo:hi]
+        return {how: aggregate(ts, values, how) for how in hows}
+
+    # --- Per-process series ---
+
+    def process_names(self) -> List[str]:
+        with self._lock:
+            return sorted(self._processes)
+
+    def process_range(self, name: str, since: Optional[float] = None,
+                      until: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            columns = self._processes.get(name)
+            if columns is None:
+                return None
+            lo, hi = columns.bounds(since, until)
+            series = [(s, columns.columns[s]) for s in PROCESS_SERIES]
+            rows = []
+            for i in range(lo, hi):
+                row = {'ts': int(columns.ts[i])}
+                for s, column in series:
+                    value = column[i]
+                    row[s] = None if value != value else value  # empty slot (NaN is not valid JSON)
+                rows.append(row)
+            return rows
+
+    def process_aggregate(self, name: str, series: str, how: str, since: Optional[float] = None,
+                          until: Optional[float] = None) -> Optional[float]:
+        with self._lock:
+            columns = self._processes.get(name)
+            if columns is None:
+                return None
+            lo, hi = columns.bounds(since, until)
+            ts, values = columns.ts[lo:hi], columns.columns[series][lo:hi]
+        return aggregate(ts, values, how)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'samples': len(self._main),
+            'capacity': self._main.capacity,
+            'processes': len(self._processes),
+            'numpy': np is not None,
+        }
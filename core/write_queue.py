@@ -0,0 +1,222 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import replace
+from typing import Any, Callable, List, Optional, Tuple
+
+from .error_handling import logger
+from .models import Action, AuditEntry, Event, Incident
+
+_FLUSH = object()
+_STOP = object()
+
+
+class WriteQueueFull(Exception):
+    """Raised when a producer cannot enqueue within its backpressure timeout."""
+    pass
+
+
+def _resolve(value, written: dict):
+    """
+    Swap a Future for its row id. Items are written strictly in order, so the
+    referenced row is either earlier in the current transaction (`written`)
+    or was committed by a previous batch (future already done).
+    """
+    if not isinstance(value, Future):
+        return value
+    if value in written:
+        return written[value]
+    return value.result(timeout=0)
+
+
+class WriteBehindQueue:
+    """
+    Asynchronous write-behind pipeline in front of DatabaseManager.
+
+    Producers enqueue model objects and immediately get a Future for the row
+    id. One writer thread drains the bounded queue and inserts everything it
+    has collected (up to `batch_size` items or `max_delay` seconds) in a single
+    transaction. Futures can be used as foreign keys of later items
+    (e.g. Action.event_id = submit_event(...)); they are resolved on the
+    writer thread, so producers never block on ids.
+    """
+
+    def __init__(self, db_manager, maxsize: int = 10000, batch_size: int = 500,
+                 max_delay: float = 0.5, put_timeout: float = 5.0):
+        self.db = db_manager
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.put_timeout = put_timeout
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.batches_written = 0
+        self.items_written = 0
+
+    # --- Lifecycle ---
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='db-write-behind', daemon=True)
+        self._thread.start()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything enqueued so far is committed."""
+        if not self._thread or not self._thread.is_alive():
+            self._drain_inline()
+            return True
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """Flush pending writes and stop the writer thread (registered with atexit)."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread and self._thread.is_alive():
+            self._queue.put((_STOP, None))
+            self._thread.join(timeout)
+        self._drain_inline()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    # --- Producers ---
+
+    def submit_event(self, event: Event) -> Future:
+        return self._put(self.db._insert_event, event)
+
+    def submit_action(self, action: Action, extra: dict = None) -> Future:
+        return self._put(lambda conn, a: self.db._insert_action(conn, a, extra), action)
+
+    def submit_audit(self, entry: AuditEntry) -> Future:
+        return self._put(self.db._insert_audit, entry)
+
+    def submit_metrics(self, cpu, mem, disk, timestamp: str = None) -> Future:
+        return self._put(lambda conn, values: self.db._insert_metrics(conn, *values), (cpu, mem, disk, timestamp))
+
+    def submit_recommendation(self, event_id, category: str, recommendation_text: str,
+                              action_type: str = None, priority: str = 'medium') -> Future:
+        return self._put(
+            lambda conn, eid: self.db._insert_recommendation(conn, eid, category, recommendation_text, action_type, priority),
+            event_id
+        )
+
+    def submit_incident(self, incident: Incident) -> Future:
+        """
+        Insert a new incident (id is None) or update a known one. A copy is
+        queued, so the caller may keep mutating its instance.
+        """
+        write = self.db._insert_incident if incident.id is None else self.db._update_incident
+        return self._put(write, replace(incident))
+
+    def submit_fleet_batch(self, batch: dict) -> Future:
+        """One decoded agent batch (collector side); resolves to the host id."""
+        return self._put(self.db._insert_fleet_batch, batch)
+
+    def _put(self, insert: Callable, payload: Any) -> Future:
+        if self._closed:
+            raise RuntimeError("WriteBehindQueue is closed")
+        future: Future = Future()
+        try:
+            # Backpressure: block the producer while the writer catches up
+            self._queue.put((insert, (payload, future)), timeout=self.put_timeout)
+        except queue.Full:
+            raise WriteQueueFull(f"Write queue full ({self._queue.maxsize} items)")
+        return future
+
+    # --- Writer ---
+
+    def _run(self):
+        while True:
+            batch, markers, stop = self._collect()
+            if batch:
+                self._write(batch)
+            for done in markers:
+                done.set()
+            if stop:
+                return
+
+    def _collect(self) -> Tuple[List, List[threading.Event], bool]:
+        batch, markers = [], []
+        item = self._queue.get()
+        deadline = time.monotonic() + self.max_delay
+        while True:
+            kind, data = item
+            if kind is _STOP:
+                return batch, markers, True
+            if kind is _FLUSH:
+                markers.append(data)
+                return batch, markers, False
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch, markers, False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return batch, markers, False
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, markers, False
+
+    def _write(self, batch: List):
+        written = {}
+        try:
+            with self.db.pool.writer() as conn:
+                for insert, (payload, future) in batch:
+                    written[future] = insert(conn, self._prepare(payload, written))
+        except Exception as e:
+            # One bad row must not drop the whole batch: retry item by item
+            logger.error(f"Write-behind batch of {len(batch)} failed, retrying individually: {e}")
+            for item in batch:
+                self._write_one(item)
+            return
+        for future, row_id in written.items():
+            future.set_result(row_id)
+        self.batches_written += 1
+        self.items_written += len(batch)
+
+    def _write_one(self, item):
+        insert, (payload, future) = item
+        try:
+            with self.db.pool.writer() as conn:
+                row_id = insert(conn, self._prepare(payload, {}))
+        except Exception as e:
+            logger.error(f"Write-behind insert failed: {e}")
+            future.set_exception(e)
+        else:
+            future.set_result(row_id)
+            self.items_written += 1
+
+    @staticmethod
+    def _prepare(payload, written: dict):
+        # Resolve pending foreign keys now that earlier items are written
+        if isinstance(payload, Future):
+            return _resolve(payload, written)
+        if isinstance(payload, Action) and isinstance(payload.event_id, Future):
+            return replace(payload, event_id=_resolve(payload.event_id, written))
+        if isinstance(payload, AuditEntry) and isinstance(payload.action_id, Future):
+            return replace(payload, action_id=_resolve(payload.action_id, written))
+        if isinstance(payload, Incident) and (isinstance(payload.id, Future) or isinstance(payload.event_id, Future)):
+            return replace(payload, id=_resolve(payload.id, written), event_id=_resolve(payload.event_id, written))
+        return payload
+
+    def _drain_inline(self):
+        """Write whatever is still queued on the calling thread (shutdown path)."""
+        batch = []
+        while True:
+            try:
+                kind, data = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind is _FLUSH:
+                data.set()
+            elif kind is not _STOP:
+                batch.append((kind, data))
+        if batch:
+            self._write(batch)
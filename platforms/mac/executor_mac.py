@@ -1,36 +1,48 @@
 from core.executor_base import ExecutorBase
+from core.process_control import ProcessController
 from typing import Tuple, Dict, Any
 import re
+import time
 
 SAFE_TO_KILL = ["chrome", "chromium", "firefox", "Code", "VS Code", "node", "python"]
 
 class MacExecutor(ExecutorBase):
+    def __init__(self, dry_run: bool = True, simulated_duration: Dict[str, float] = None, reclaim=None):
+        # Shared psutil remediation engine; dry-run reports instead of acting
+        self.processes = ProcessController(dry_run=dry_run)
+        # core.disks.ReclaimIndex: what disk cleanup can delete, and how much it frees
+        self.reclaim = reclaim
+        # Seconds each action type pretends to take, to exercise scheduling and deadlines
+        self.simulated_duration = simulated_duration or {}
+
     def execute_action(self, action_type: str, issue_dict: dict) -> Tuple[bool, str, Dict[str, Any]]:
         """
         Mock executor for macOS development.
-        Logs what it would do without making system changes.
+        Logs what it would do without making system changes (unless dry_run=False).
         """
         success = True
         output = ""
         extra = {}
 
+        delay = self.simulated_duration.get(action_type, 0)
+        if delay:
+            timeout = float(issue_dict.get('timeout', 30))
+            time.sleep(min(delay, timeout))
+            if delay > timeout:
+                return False, f"Execution timed out after {timeout:g}s.", {}
+
         if action_type == 'action_kill_high_cpu_process':
-            # Extract process name from description if available (e.g., "... (Top: chrome)")
-            description = issue_dict.get('description', '')
-            match = re.search(r"Top: ([^)]+)", description)
-            target = match.group(1) if match else "unknown"
-            
-            extra['target_process'] = target
-            
-            if target in SAFE_TO_KILL:
-                output = f"Would kill top CPU process: {target} (Allowed)."
-            else:
-                output = f"Would SKIP killing process: {target} (Not in Whitelist)."
-                success = False # technically failed to act
+            # Same decision as production: whitelisted -> throttle, otherwise kill,
+            # acting on the PID captured in metrics['top_processes']
+            whitelist = issue_dict.get('whitelist') or SAFE_TO_KILL
+            success, output, extra = self.processes.remediate_high_cpu(issue_dict.get('top_processes'), whitelist)
 
         elif action_type == 'action_free_disk_space':
-            output = "Would clean temporary files, caches, and Trash."
-            extra['files_deleted'] = "temp, cache, trash"
+            if self.reclaim is not None:
+                success, output, extra = self.reclaim.free_space(issue_dict.get('target'), dry_run=self.processes.dry_run)
+            else:
+                output = "Would clean temporary files, caches, and Trash."
+                extra['files_deleted'] = "temp, cache, trash"
         
         elif action_type == 'action_clear_memory_hog':
             output = "Would identify and terminate high memory consuming applications."
@@ -55,3 +67,13 @@ class MacExecutor(ExecutorBase):
             output = f"Unknown action type: {action_type}"
 
         return success, output, extra
+
+    def perform_rollback(self, action_type: str, details: dict) -> bool:
+        """Undo a throttle (restore normal priority) through the shared engine."""
+        if action_type in ('action_throttle_high_cpu_process', 'action_kill_high_cpu_process'):
+            target = details.get('target_process')
+            if not target:
+                return False
+            success, _ = self.processes.restore_priority(target, pid=details.get('target_pid'))
+            return success
+        return False
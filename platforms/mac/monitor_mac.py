@@ -1,16 +1,30 @@
 import psutil
+from core.disks import VolumeWatcher
 from core.monitor_base import MonitorBase
 from core.error_handling import safe_execute
+from core.process_tracker import ProcessTracker
 
 class MacMonitor(MonitorBase):
     # Simulation Flags
     SIMULATE_BITS_CRASH = True
     SIMULATE_UPDATES_PENDING = False
 
+    def __init__(self, volumes: VolumeWatcher = None):
+        # Persistent process table: correct CPU deltas between cycles
+        self.processes = ProcessTracker()
+        # Prime the system-wide counter; later calls measure since the previous cycle
+        psutil.cpu_percent(interval=None)
+        # Usage of every mounted volume, polled in the background
+        self.volumes = volumes or VolumeWatcher()
+        self.volumes.start()
+
+    def close(self):
+        self.volumes.stop()
+
     @safe_execute(default_return={})
     def get_system_metrics(self):
         # CPU
-        cpu_percent = psutil.cpu_percent(interval=1)
+        cpu_percent = psutil.cpu_percent(interval=None)
         
         # Memory
         mem = psutil.virtual_memory()
@@ -21,14 +35,8 @@ class MacMonitor(MonitorBase):
         disk_percent = disk.percent
         
         # Top Processes
-        top_processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'cpu_percent']):
-            try:
-                top_processes.append(proc.info)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
-        top_processes.sort(key=lambda x: (x.get('cpu_percent') or 0.0), reverse=True)
-        top_processes = top_processes[:3]
+        self.processes.sample()
+        top_processes = self.processes.top(3, by='cpu')
 
         # Services Simulation
         services = [
@@ -47,7 +55,10 @@ class MacMonitor(MonitorBase):
             'cpu_percent': cpu_percent,
             'memory_percent': mem_percent,
             'disk_percent': disk_percent,
+            'volumes': self.volumes.volumes(),
             'top_processes': top_processes,
+            'top_memory': self.processes.top(3, by='rss'),
+            'top_io': self.processes.top(3, by='io'),
             'services': services,
             'updates_pending': updates_pending
         }
@@ -3,26 +3,51 @@ from core.executor_base import ExecutorBase
 from typing import Tuple, Dict, Any
 import re
 
+from core.process_control import ProcessController, SYSTEM_PROCESSES, in_list
+from .ps_host import PowerShellHost, HostUnavailable
+
 SAFE_TO_KILL = ["chrome", "chrome.exe", "chromium", "firefox", "firefox.exe", "Code", "code.exe", "node", "node.exe", "python", "python.exe"]
 
 class WindowsExecutor(ExecutorBase):
-    def _run_powershell(self, script: str) -> Tuple[bool, str]:
+    def __init__(self, host: PowerShellHost = None, reclaim=None):
+        # Long-lived PowerShell process shared by every action and rollback
+        self.host = host or PowerShellHost()
+        # Priority changes and kills are done in-process through psutil
+        self.processes = ProcessController()
+        # core.disks.ReclaimIndex: temp files to delete, without walking the folders
+        self.reclaim = reclaim
+
+    def close(self):
+        self.host.close()
+
+    def _run_powershell(self, script: str, timeout: float = 30) -> Tuple[bool, str]:
         """
         Helper to run a PowerShell script safely.
+        Scripts run in the persistent host; a fresh powershell.exe is only
+        spawned if the host cannot be started at all.
+        Scripts report failure with `$global:LASTEXITCODE = 1; return`.
         """
-        cmd = ["powershell", "-NoProfile", "-NonInteractive", "-Command", script]
+        try:
+            return self.host.run(script, timeout=timeout)
+        except HostUnavailable:
+            return self._run_powershell_once(script, timeout)
+
+    def _run_powershell_once(self, script: str, timeout: float = 30) -> Tuple[bool, str]:
+        """Legacy path: one powershell.exe per script."""
+        wrapped = f"& {{\n{script}\n}}; exit $global:LASTEXITCODE"
+        cmd = ["powershell", "-NoProfile", "-NonInteractive", "-Command", wrapped]
         try:
             result = subprocess.run(
                 cmd,
                 capture_output=True,
                 text=True,
-                timeout=30
+                timeout=timeout
             )
             success = (result.returncode == 0)
             output = result.stdout + "\n" + result.stderr
             return success, output.strip()
         except subprocess.TimeoutExpired:
-            return False, "Execution timed out after 30s."
+            return False, f"Execution timed out after {timeout}s."
         except Exception as e:
             return False, f"Execution failed: {str(e)}"
 
@@ -30,106 +55,65 @@ class WindowsExecutor(ExecutorBase):
         success = False
         output = ""
         extra = {}
+        # Remaining deadline from the remediation dispatcher
+        timeout = float(issue_dict.get('timeout', 30))
 
         if action_type == 'action_throttle_high_cpu_process':
-            # Extract target process from description
+            # Target: the PID captured by the monitor, falling back to the name in the description
             description = issue_dict.get('description', '')
             match = re.search(r"Top: (.+?)\)", description)
-            target_name = match.group(1) if match else None
+            target = self.processes.pick_target(issue_dict.get('top_processes'), match.group(1) if match else None)
 
-            if not target_name:
+            if not target:
                 return False, "Could not identify target process from issue description.", {}
 
-            # Construct PowerShell array string from Python list
-            safe_list_str = ",".join([f"'{s}'" for s in SAFE_TO_KILL])
-            
-            script = f"""
-            $safe = @({safe_list_str})
-            $ignored = @("MsMpEng", "System", "Registry", "svchost", "csrss", "lsass", "wininit", "services", "Antigravity")
-            $target = "{target_name}"
-            
-            if ($ignored -contains $target) {{
-                Write-Output "CPU high due to system process ($target); cannot throttle"
-                exit 0
-            }}
-
-            if ($safe -contains $target) {{
-                $p = Get-Process -Name $target -ErrorAction SilentlyContinue | Select-Object -First 1
-                if ($p) {{
-                    $oldPriority = $p.PriorityClass
-                    $p.PriorityClass = 'BelowNormal'
-                    Write-Output "Throttled ($target) from $oldPriority to BelowNormal priority"
-                }} else {{
-                    Write-Output "Process ($target) not found"
-                }}
-            }} else {{
-                Write-Output "Skipped ($target) - Not in whitelist"
-                exit 1
-            }}
-            """
-            success, output = self._run_powershell(script)
+            target_name = target['name']
+            if in_list(target_name, SYSTEM_PROCESSES):
+                success, output = True, f"CPU high due to system process ({target_name}); cannot throttle"
+            elif in_list(target_name, SAFE_TO_KILL):
+                success, output = self.processes.throttle(target)
+            else:
+                success, output = False, f"Skipped ({target_name}) - Not in whitelist"
             extra['target_process'] = target_name
+            extra['target_pid'] = target.get('pid')
 
         elif action_type == 'action_free_disk_space':
-            # Clears Temp, Windows Temp, and Recycle Bin
-            script = """
-            $beforeSize = (Get-ChildItem -Path "$env:TEMP" -Recurse -ErrorAction SilentlyContinue | Measure-Object -Property Length -Sum).Sum
-            $targets = @("$env:TEMP\\*", "$env:SystemRoot\\Temp\\*")
-            foreach ($t in $targets) {
-                Remove-Item -Path $t -Recurse -Force -ErrorAction SilentlyContinue
-            }
-            Clear-RecycleBin -Force -ErrorAction SilentlyContinue
-            $afterSize = (Get-ChildItem -Path "$env:TEMP" -Recurse -ErrorAction SilentlyContinue | Measure-Object -Property Length -Sum).Sum
-            $reclaimedMB = [math]::Round(($beforeSize - $afterSize) / 1MB, 2)
-            Write-Output "Disk cleanup completed. Reclaimed approximately ${{reclaimedMB}}MB (Temp folders + Recycle Bin)"
-            """
-            success, output = self._run_powershell(script)
-            extra['files_deleted'] = "temp, system_temp, recycle_bin"
+            if self.reclaim is not None:
+                # Files and sizes come from the index: no recursive walk before and after
+                drive = issue_dict.get('target')
+                success, output, extra = self.reclaim.free_space(drive)
+                letter = f" -DriveLetter {drive[0]}" if drive else ""
+                bin_ok, _ = self._run_powershell(f"Clear-RecycleBin{letter} -Force -ErrorAction SilentlyContinue", timeout)
+                if bin_ok:
+                    extra['files_deleted'] = ", ".join(filter(None, [extra.get('files_deleted'), "recycle_bin"]))
+                    output += " + Recycle Bin emptied"
+            else:
+                # Clears Temp, Windows Temp, and Recycle Bin
+                script = """
+                $beforeSize = (Get-ChildItem -Path "$env:TEMP" -Recurse -ErrorAction SilentlyContinue | Measure-Object -Property Length -Sum).Sum
+                $targets = @("$env:TEMP\\*", "$env:SystemRoot\\Temp\\*")
+                foreach ($t in $targets) {
+                    Remove-Item -Path $t -Recurse -Force -ErrorAction SilentlyContinue
+                }
+                Clear-RecycleBin -Force -ErrorAction SilentlyContinue
+                $afterSize = (Get-ChildItem -Path "$env:TEMP" -Recurse -ErrorAction SilentlyContinue | Measure-Object -Property Length -Sum).Sum
+                $reclaimedMB = [math]::Round(($beforeSize - $afterSize) / 1MB, 2)
+                Write-Output "Disk cleanup completed. Reclaimed approximately ${{reclaimedMB}}MB (Temp folders + Recycle Bin)"
+                """
+                success, output = self._run_powershell(script, timeout)
+                extra['files_deleted'] = "temp, system_temp, recycle_bin"
+
 
         elif action_type == 'action_kill_high_cpu_process':
             # Get whitelist from extra args (passed from API)
             whitelist = issue_dict.get('whitelist', [])
             # Also include default hardcoded safety net
             default_safe = ["chrome", "chromium", "firefox", "Code", "VS Code", "node", "python", "Antigravity", "Antigravity Helper (Renderer)"]
-            combined_safe = list(set(whitelist + default_safe))
-            safe_list_str = ",".join([f"'{s}'" for s in combined_safe])
-            
-            # Smart Throttling Script
-            # 1. Identify top process
-            # 2. Check if in whitelist
-            # 3. If in whitelist -> THROTTLE (Lower Priority)
-            # 4. If NOT in whitelist -> KILL
-            
-            script = f"""
-            $safe = @({safe_list_str})
-            $p = Get-Process | Sort-Object CPU -Descending | Select-Object -First 1 | Where-Object {{ $_.ProcessName -ne 'System Idle Process' }}
-            
-            if ($p) {{
-                $name = $p.ProcessName
-                if ($safe -contains $name) {{
-                    # THROTTLE
-                    $p.PriorityClass = 'BelowNormal'
-                    Write-Output "Throttled (Lowered Priority): $name"
-                }} else {{
-                    # KILL (Non-Critical, Non-Whitelisted)
-                    Stop-Process -Id $p.Id -Force -ErrorAction SilentlyContinue
-                    Write-Output "Killed: $name"
-                }}
-            }} else {{
-                Write-Output "No action needed."
-            }}
-            """
-            success, output = self._run_powershell(script)
-            
-            # Metadata extraction
-            if "Throttled" in output:
-                extra['action_detail'] = "throttled"
-                match = re.search(r"Throttled.*: (.+)", output)
-                if match: extra['target_process'] = match.group(1)
-            elif "Killed" in output:
-                extra['action_detail'] = "killed"
-                match = re.search(r"Killed: (.+)", output)
-                if match: extra['target_process'] = match.group(1)
+            combined_safe = set(whitelist) | set(default_safe)
+
+            # Smart Throttling: whitelisted top process -> lower priority,
+            # anything else -> kill. Acts on the PID from the monitor snapshot.
+            success, output, extra = self.processes.remediate_high_cpu(issue_dict.get('top_processes'), combined_safe)
 
             extra['recommendation'] = 'close_app'
 
@@ -144,14 +128,14 @@ class WindowsExecutor(ExecutorBase):
                  $memoryMB = [math]::Round($p.WorkingSet / 1MB, 2)
                  if ($ignored -contains $p.ProcessName) {{
                     Write-Output "Memory high due to system process ($($p.ProcessName)) using ${{memoryMB}}MB"
-                    exit 0
+                    return
                  }} else {{
                     Write-Output "Memory hog: ($($p.ProcessName)) using ${{memoryMB}}MB - Recommend closing manually"
-                    exit 0
+                    return
                  }}
             }}
             """
-            success, output = self._run_powershell(script)
+            success, output = self._run_powershell(script, timeout)
             # Extract process name from output
             match = re.search(r"\((.+?)\)", output)
             if match:
@@ -170,7 +154,7 @@ class WindowsExecutor(ExecutorBase):
                 Write-Output "No crashed automatic services found."
             }
             """
-            success, output = self._run_powershell(script)
+            success, output = self._run_powershell(script, timeout)
             # Extract service names from output
             stopped = re.findall(r"Service stopped: (.+?) -", output)
             if stopped:
@@ -182,7 +166,7 @@ class WindowsExecutor(ExecutorBase):
             script = """
             Write-Output "Windows updates pending - Recommend installing updates manually"
             """
-            success, output = self._run_powershell(script)
+            success, output = self._run_powershell(script, timeout)
             if success:
                 extra['recommendation'] = 'install_updates'
 
@@ -224,17 +208,8 @@ class WindowsExecutor(ExecutorBase):
             
             target = details.get('target_process')
             if not target: return False
-            
-            script = f"""
-            $p = Get-Process -Name "{target}" -ErrorAction SilentlyContinue | Select-Object -First 1
-            if ($p) {{
-                $p.PriorityClass = 'Normal'
-                Write-Output "Restored Normal priority for $p"
-            }} else {{
-                exit 1
-            }}
-            """
-            success, _ = self._run_powershell(script)
+
+            success, _ = self.processes.restore_priority(target, pid=details.get('target_pid'))
             return success
             
         return False
@@ -1,98 +1,59 @@
 import psutil
-try:
-    import wmi
-    import pythoncom
-except ImportError:
-    wmi = None
-    pythoncom = None
 
+from core.disks import VolumeWatcher
 from core.monitor_base import MonitorBase
-from core.error_handling import safe_execute
+from core.error_handling import logger, safe_execute
+from core.process_tracker import ProcessTracker
+from platforms.windows.wmi_collector import RealWmiBackend, WmiCollector, wmi
 
 class WindowsMonitor(MonitorBase):
-    def __init__(self):
-        if wmi:
-            pythoncom.CoInitialize()
-            self.wmi_client = wmi.WMI()
-            
+    def __init__(self, wmi_backend=None, updates_ttl: float = 6 * 3600, volumes: VolumeWatcher = None):
+        # Persistent process table: correct CPU deltas between cycles
+        self.processes = ProcessTracker(exclude=("System Idle Process",))
+        # Prime the system-wide counter; later calls measure since the previous cycle
+        psutil.cpu_percent(interval=None)
+        # Usage of every drive, polled in the background (a dead network drive cannot stall a cycle)
+        self.volumes = volumes or VolumeWatcher()
+        self.volumes.start()
+        # Services and pending updates are collected in the background;
+        # pass a FakeWmiBackend to exercise this path off Windows
+        self.collector = None
+        if wmi_backend is None and wmi:
+            try:
+                wmi_backend = RealWmiBackend()
+            except Exception as e:
+                logger.error(f"WMI unavailable: {e}")
+        if wmi_backend is not None:
+            self.collector = WmiCollector(wmi_backend, services=('wuauserv', 'BITS'), updates_ttl=updates_ttl)
+            self.collector.start()
+
+    def close(self):
+        self.volumes.stop()
+        if self.collector:
+            self.collector.stop()
+
     @safe_execute(default_return={})
     def get_system_metrics(self):
         metrics = {}
         
         # Psutil for performance checks
-        metrics['cpu_percent'] = psutil.cpu_percent(interval=1)
+        metrics['cpu_percent'] = psutil.cpu_percent(interval=None)
         metrics['memory_percent'] = psutil.virtual_memory().percent
         metrics['disk_percent'] = psutil.disk_usage('C:\\').percent # Default to C drive
+        metrics['volumes'] = self.volumes.volumes()
         
         # Top Processes
-        top_processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'cpu_percent']):
-            try:
-                top_processes.append(proc.info)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
-        top_processes = [p for p in top_processes if p['name'] != "System Idle Process"]
-        top_processes.sort(key=lambda x: x['cpu_percent'], reverse=True)
-        metrics['top_processes'] = top_processes[:3]
+        self.processes.sample()
+        metrics['top_processes'] = self.processes.top(3, by='cpu')
+        metrics['top_memory'] = self.processes.top(3, by='rss')
+        metrics['top_io'] = self.processes.top(3, by='io')
         
-        # Windows Services and Updates
-        if wmi:
-            # Re-initialize for thread safety in some contexts
-            pythoncom.CoInitialize()
-            c = wmi.WMI()
-            
-            # Check specific services
-            # Requirement: wuauserv, BITS
-            target_services = ['wuauserv', 'BITS']
-            services_status = []
-            
-            # Query WMI for these services
-            for s_name in target_services:
-                try:
-                    s = c.Win32_Service(Name=s_name)
-                    if s:
-                        svc = s[0]
-                        services_status.append({
-                            'name': svc.Name,
-                            'status': svc.State.lower(), # 'running', 'stopped'
-                            'start_type': svc.StartMode # 'Auto', 'Manual'
-                        })
-                except Exception:
-                    pass
-            metrics['services'] = services_status
-            
-            # Check Pending Updates (Mock via COM or check strict registry)
-            # Checking actual WU is slow, we might check a reg key or use a faster WMI query
-            # For this MVP, we will try to use the IUpdateSearcher if possible, but that's complex via raw Python WMI.
-            # We'll rely on a simpler WMI query or COM object if straightforward.
-            # Actually, standard WMI 'Win32_QuickFixEngineering' lists installed updates. 
-            # Finding *pending* updates usually requires 'Microsoft.Update.Session' COM object.
-            
-            try:
-                # Basic COM interaction for updates
-                import win32com.client
-                update_session = win32com.client.Dispatch("Microsoft.Update.Session")
-                update_searcher = update_session.CreateUpdateSearcher()
-                # Search for uninstalled updates (IsInstalled=0)
-                # This can be slow (seconds), might block the 30s loop slightly.
-                # Just limiting logic for MVP speed.
-                
-                # NOTE: In a real prod loop running every 30s, this is too heavy.
-                # We'll simulate or do a lightweight check (e.g. reboot pending file exist)
-                # For MVP requirements "Pending Windows updates count", let's try a safe COM call.
-                
-                # To avoid blocking, we might skip this or cache it. 
-                # For now, let's implement the call but knowing it might be slow.
-                # user_updates = update_searcher.Search("IsInstalled=0")
-                # metrics['updates_pending'] = user_updates.Updates.Count
-                
-                # Fallback/Safe mode for MVP speed:
-                metrics['updates_pending'] = 0 # Placeholder if too slow
-            except Exception:
-                metrics['updates_pending'] = 0
-
+        # Windows Services and Updates: cached by the WMI collector threads
+        if self.collector:
+            metrics['services'] = self.collector.services()
+            metrics['updates_pending'] = self.collector.updates_pending()
         else:
-            # Fallback if WMI fetch failed or on non-win dev
+            # Fallback if WMI is unavailable or on non-win dev
             metrics['services'] = []
             metrics['updates_pending'] = 0
             
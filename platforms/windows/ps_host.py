@@ -0,0 +1,210 @@
+import json
+import queue
+import subprocess
+import threading
+from collections import deque
+from typing import List, Optional, Tuple
+
+from core.error_handling import logger
+
+# PowerShell side of the protocol. Reads one JSON request per line
+# ({"id": n, "script": "..."}) from stdin, runs the script in this long-lived
+# process and writes one JSON response per line
+# ({"id": n, "ok": bool, "exit_code": int, "output": "..."}) to stdout.
+# Scripts signal failure with `$global:LASTEXITCODE = 1; return` - calling
+# `exit` would terminate the host itself.
+HOST_SCRIPT = r"""
+$ErrorActionPreference = 'Continue'
+$ProgressPreference = 'SilentlyContinue'
+try { [Console]::OutputEncoding = [Text.Encoding]::UTF8 } catch {}
+$stdin = [Console]::In
+$stdout = [Console]::Out
+$stdout.WriteLine('{"ready":true}')
+$stdout.Flush()
+while ($true) {
+    $line = $stdin.ReadLine()
+    if ($line -eq $null) { break }
+    if ($line.Trim() -eq '') { continue }
+    $req = $line | ConvertFrom-Json
+    $global:LASTEXITCODE = 0
+    $ok = $true
+    try {
+        $sb = [ScriptBlock]::Create($req.script)
+        $out = & $sb *>&1 | Out-String
+    } catch {
+        $ok = $false
+        $out = ($_ | Out-String)
+    }
+    $code = 0
+    if ($global:LASTEXITCODE) { $code = [int]$global:LASTEXITCODE }
+    if ($code -ne 0) { $ok = $false }
+    $resp = @{ id = $req.id; ok = $ok; exit_code = $code; output = [string]$out } | ConvertTo-Json -Compress
+    $stdout.WriteLine($resp)
+    $stdout.Flush()
+}
+"""
+
+POWERSHELL_COMMAND = ["powershell", "-NoProfile", "-NonInteractive", "-ExecutionPolicy", "Bypass", "-Command", HOST_SCRIPT]
+
+
+class HostUnavailable(Exception):
+    """The host process could not be started."""
+    pass
+
+
+class PowerShellHost:
+    """
+    One long-lived PowerShell process that runs scripts sent over stdin and
+    answers with framed JSON on stdout, so remediation does not pay the
+    PowerShell startup cost for every action.
+
+    - One request at a time (calls are serialized by a lock).
+    - A request that exceeds its timeout kills the host; the next call
+      starts a fresh one.
+    - If the host died between calls, it is restarted transparently.
+
+    `command` can point at any process speaking the same protocol, e.g.
+    platforms/windows/shell_host_stub.py on Linux.
+    """
+
+    def __init__(self, command: Optional[List[str]] = None, start_timeout: float = 20.0):
+        self.command = command or POWERSHELL_COMMAND
+        self.start_timeout = start_timeout
+        self._proc: Optional[subprocess.Popen] = None
+        self._responses: "queue.Queue" = queue.Queue()
+        self._stderr: deque = deque(maxlen=50)
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._starts = 0
+
+    @property
+    def restarts(self) -> int:
+        return max(0, self._starts - 1)
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def run(self, script: str, timeout: float = 30.0) -> Tuple[bool, str]:
+        """
+        Run `script` in the host. Returns (success, output) like subprocess-based
+        execution; raises HostUnavailable if no host process can be started.
+        """
+        with self._lock:
+            self._ensure_started()
+
+            self._next_id += 1
+            request_id = self._next_id
+            line = json.dumps({'id': request_id, 'script': script}) + "\n"
+            try:
+                self._proc.stdin.write(line)
+                self._proc.stdin.flush()
+            except (BrokenPipeError, OSError):
+                # Host died since the last call; nothing was delivered, so retry once on a fresh host
+                self._kill()
+                self._ensure_started()
+                try:
+                    self._proc.stdin.write(line)
+                    self._proc.stdin.flush()
+                except (BrokenPipeError, OSError) as e:
+                    self._kill()
+                    return False, f"Execution failed: {e}"
+
+            return self._await(request_id, timeout)
+
+    def _await(self, request_id: int, timeout: float) -> Tuple[bool, str]:
+        responses = self._responses
+        while True:
+            try:
+                response = responses.get(timeout=timeout)
+            except queue.Empty:
+                logger.error(f"PowerShell host request {request_id} timed out after {timeout}s; restarting host")
+                self._kill()
+                return False, f"Execution timed out after {timeout:g}s."
+            if response is None:
+                self._kill()
+                detail = "; ".join(self._stderr) or "no output"
+                return False, f"Execution failed: host exited unexpectedly ({detail})"
+            if response.get('id') != request_id:
+                continue  # late answer to a request that already timed out
+            return bool(response.get('ok')), str(response.get('output', '')).strip()
+
+    def _ensure_started(self):
+        if self.alive:
+            return
+        self._kill()
+        try:
+            proc = subprocess.Popen(
+                self.command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                bufsize=1,
+            )
+        except OSError as e:
+            raise HostUnavailable(str(e)) from e
+
+        self._proc = proc
+        self._starts += 1
+        # Each host gets its own queue so stale responses from a killed host are never read
+        self._responses = queue.Queue()
+        threading.Thread(target=self._read_stdout, args=(proc, self._responses), name='ps-host-stdout', daemon=True).start()
+        threading.Thread(target=self._read_stderr, args=(proc,), name='ps-host-stderr', daemon=True).start()
+
+        try:
+            ready = self._responses.get(timeout=self.start_timeout)
+        except queue.Empty:
+            ready = None
+        if not ready or not ready.get('ready'):
+            self._kill()
+            raise HostUnavailable("host did not become ready")
+
+    def _read_stdout(self, proc: subprocess.Popen, responses: "queue.Queue"):
+        try:
+            for line in proc.stdout:
+                line = line.strip()
+                if not line.startswith('{'):
+                    continue  # banner or stray console output
+                try:
+                    responses.put(json.loads(line))
+                except ValueError:
+                    continue
+        except (ValueError, OSError):
+            pass  # pipe closed by _kill()
+        responses.put(None)
+
+    def _read_stderr(self, proc: subprocess.Popen):
+        try:
+            for line in proc.stderr:
+                if line.strip():
+                    self._stderr.append(line.strip())
+        except (ValueError, OSError):
+            pass
+
+    def _kill(self):
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            proc.kill()
+            proc.wait(timeout=5)
+        except Exception:
+            pass
+        for stream in (proc.stdin, proc.stdout, proc.stderr):
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def close(self):
+        with self._lock:
+            if self.alive:
+                try:
+                    self._proc.stdin.close()  # host loop exits on EOF
+                    self._proc.wait(timeout=5)
+                except Exception:
+                    pass
+            self._kill()
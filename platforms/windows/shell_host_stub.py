@@ -0,0 +1,41 @@
+"""
+Stand-in for the PowerShell host, speaking the same line-framed JSON protocol
+so PowerShellHost can be exercised on Linux/macOS:
+
+    host = PowerShellHost(command=[sys.executable, STUB_PATH])
+    host.run("echo hello; exit 3")
+
+Each request's script is run with `sh -c`; its exit status becomes
+`exit_code` and stdout+stderr become `output`. The special script
+`__crash__` terminates the stub without answering, to simulate a host crash.
+"""
+import json
+import os
+import subprocess
+import sys
+
+STUB_PATH = os.path.abspath(__file__)
+
+
+def main():
+    out = sys.stdout
+    out.write('{"ready":true}\n')
+    out.flush()
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        if request['script'].strip() == '__crash__':
+            os._exit(1)
+        result = subprocess.run(['sh', '-c', request['script']], capture_output=True, text=True)
+        out.write(json.dumps({
+            'id': request['id'],
+            'ok': result.returncode == 0,
+            'exit_code': result.returncode,
+            'output': result.stdout + result.stderr,
+        }) + "\n")
+        out.flush()
+
+
+if __name__ == '__main__':
+    main()
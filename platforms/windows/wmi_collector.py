@@ -0,0 +1,213 @@
+import queue
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from core.error_handling import logger
+
+try:
+    import wmi
+    import pythoncom
+except ImportError:
+    wmi = None
+    pythoncom = None
+
+
+class RealWmiBackend:
+    """
+    WMI access with one COM-initialized connection per thread
+    (COM objects must not cross apartments).
+    """
+
+    def __init__(self):
+        if wmi is None:
+            raise RuntimeError("wmi/pywin32 are not installed")
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            pythoncom.CoInitialize()
+            conn = wmi.WMI()
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _where(names: Iterable[str], prefix: str = '') -> str:
+        return " OR ".join(f"{prefix}Name='{name}'" for name in names)
+
+    def query_services(self, names: Iterable[str]) -> List[Dict[str, str]]:
+        """All watched services in a single WQL query."""
+        names = list(names)
+        rows = self._conn().query(f"SELECT Name, State, StartMode FROM Win32_Service WHERE {self._where(names)}")
+        return [{'name': s.Name, 'status': s.State.lower(), 'start_type': s.StartMode} for s in rows]
+
+    def watch_services(self, names: Iterable[str], poll_secs: int = 2):
+        """
+        Subscribe to state changes of the watched services. Returns a callable
+        `next_change(timeout_s)` yielding a service dict or None on timeout.
+        """
+        wql = (
+            f"SELECT * FROM __InstanceModificationEvent WITHIN {poll_secs} "
+            f"WHERE TargetInstance ISA 'Win32_Service' AND ({self._where(names, 'TargetInstance.')})"
+        )
+        watcher = self._conn().watch_for(raw_wql=wql)
+
+        def next_change(timeout_s: float) -> Optional[Dict[str, str]]:
+            try:
+                s = watcher(timeout_ms=int(timeout_s * 1000))
+            except wmi.x_wmi_timed_out:
+                return None
+            return {'name': s.Name, 'status': s.State.lower(), 'start_type': s.StartMode}
+
+        return next_change
+
+    def count_pending_updates(self) -> int:
+        """IUpdateSearcher search - slow (seconds to minutes); never call from the health loop."""
+        self._conn()  # ensures COM is initialized on this thread
+        import win32com.client
+        session = win32com.client.Dispatch("Microsoft.Update.Session")
+        searcher = session.CreateUpdateSearcher()
+        result = searcher.Search("IsInstalled=0 and Type='Software' and IsHidden=0")
+        return int(result.Updates.Count)
+
+
+class FakeWmiBackend:
+    """
+    In-memory stand-in for RealWmiBackend (Linux/macOS tests and demos).
+    Drive it with set_service_state() and `pending_updates`.
+    """
+
+    def __init__(self, services: Optional[Dict[str, Dict[str, str]]] = None,
+                 pending_updates: int = 0, search_delay: float = 0.0):
+        self.services = services or {
+            'wuauserv': {'status': 'running', 'start_type': 'Auto'},
+            'BITS': {'status': 'running', 'start_type': 'Auto'},
+        }
+        self.pending_updates = pending_updates
+        self.search_delay = search_delay
+        self.queries = 0
+        self.searches = 0
+        self._changes: "queue.Queue" = queue.Queue()
+
+    def set_service_state(self, name: str, status: str, start_type: str = 'Auto'):
+        self.services[name] = {'status': status, 'start_type': start_type}
+        self._changes.put({'name': name, 'status': status, 'start_type': start_type})
+
+    def query_services(self, names: Iterable[str]) -> List[Dict[str, str]]:
+        self.queries += 1
+        return [dict(self.services[n], name=n) for n in names if n in self.services]
+
+    def watch_services(self, names: Iterable[str], poll_secs: int = 2):
+        watched = set(names)
+
+        def next_change(timeout_s: float) -> Optional[Dict[str, str]]:
+            deadline = time.monotonic() + timeout_s
+            while True:
+                try:
+                    change = self._changes.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    return None
+                if change['name'] in watched:
+                    return change
+
+        return next_change
+
+    def count_pending_updates(self) -> int:
+        self.searches += 1
+        if self.search_delay:
+            time.sleep(self.search_delay)
+        return self.pending_updates
+
+
+class WmiCollector:
+    """
+    Windows service and update state, kept current in the background so the
+    health loop only reads a cache.
+
+    - Services: one batched query at start, then WMI modification events
+      (no polling). If the subscription cannot be created, the batched query
+      is repeated every `fallback_poll_secs` instead.
+    - Pending updates: IUpdateSearcher runs on its own thread every
+      `updates_ttl` seconds; readers get the last result (0 until the first
+      search finishes).
+    """
+
+    def __init__(self, backend, services: Iterable[str] = ('wuauserv', 'BITS'),
+                 updates_ttl: float = 6 * 3600, fallback_poll_secs: float = 60):
+        self.backend = backend
+        self.service_names = list(services)
+        self.updates_ttl = updates_ttl
+        self.fallback_poll_secs = fallback_poll_secs
+        self._services: Dict[str, Dict[str, str]] = {}
+        self._updates_pending = 0
+        self.updates_checked_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        for target, name in ((self._watch_loop, 'wmi-services'), (self._updates_loop, 'wmi-updates')):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    # --- Readers (health loop) ---
+
+    def services(self) -> List[Dict[str, str]]:
+        snapshot = self._services
+        return [dict(snapshot[name], name=name) for name in self.service_names if name in snapshot]
+
+    def updates_pending(self) -> int:
+        return self._updates_pending
+
+    # --- Background ---
+
+    def refresh_services(self):
+        rows = self.backend.query_services(self.service_names)
+        # Replace the whole dict so readers never see a half-updated cache
+        self._services = {row['name']: {'status': row['status'], 'start_type': row['start_type']} for row in rows}
+
+    def _apply_change(self, change: Dict[str, str]):
+        services = dict(self._services)
+        services[change['name']] = {'status': change['status'], 'start_type': change['start_type']}
+        self._services = services
+
+    def _watch_loop(self):
+        try:
+            self.refresh_services()
+            next_change = self.backend.watch_services(self.service_names)
+        except Exception as e:
+            logger.error(f"WMI service subscription unavailable, polling instead: {e}")
+            next_change = None
+
+        while not self._stop.is_set():
+            if next_change is None:
+                self._stop.wait(self.fallback_poll_secs)
+                try:
+                    self.refresh_services()
+                except Exception as e:
+                    logger.error(f"WMI service query failed: {e}")
+                continue
+            try:
+                change = next_change(1.0)
+            except Exception as e:
+                logger.error(f"WMI service watcher failed, polling instead: {e}")
+                next_change = None
+                continue
+            if change:
+                self._apply_change(change)
+
+    def _updates_loop(self):
+        while not self._stop.is_set():
+            try:
+                self._updates_pending = self.backend.count_pending_updates()
+                self.updates_checked_at = time.time()
+            except Exception as e:
+                logger.error(f"Windows Update search failed: {e}")
+            self._stop.wait(self.updates_ttl)
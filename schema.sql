@@ -49,6 +49,58 @@ CREATE TABLE IF NOT EXISTS metrics_history (
     disk_percent REAL
 );
 
+-- Metrics rollups (maintained by core/retention.py)
+CREATE TABLE IF NOT EXISTS metrics_rollup_1m (
+    bucket_start INTEGER PRIMARY KEY,  -- epoch seconds, aligned to the bucket width
+    samples INTEGER NOT NULL,
+    cpu_min REAL,
+    cpu_max REAL,
+    cpu_avg REAL,
+    cpu_p95 REAL,
+    memory_min REAL,
+    memory_max REAL,
+    memory_avg REAL,
+    memory_p95 REAL,
+    disk_min REAL,
+    disk_max REAL,
+    disk_avg REAL,
+    disk_p95 REAL
+);
+
+CREATE TABLE IF NOT EXISTS metrics_rollup_1h (
+    bucket_start INTEGER PRIMARY KEY,  -- epoch seconds, aligned to the bucket width
+    samples INTEGER NOT NULL,
+    cpu_min REAL,
+    cpu_max REAL,
+    cpu_avg REAL,
+    cpu_p95 REAL,
+    memory_min REAL,
+    memory_max REAL,
+    memory_avg REAL,
+    memory_p95 REAL,
+    disk_min REAL,
+    disk_max REAL,
+    disk_avg REAL,
+    disk_p95 REAL
+);
+
+CREATE TABLE IF NOT EXISTS metrics_rollup_1d (
+    bucket_start INTEGER PRIMARY KEY,  -- epoch seconds, aligned to the bucket width
+    samples INTEGER NOT NULL,
+    cpu_min REAL,
+    cpu_max REAL,
+    cpu_avg REAL,
+    cpu_p95 REAL,
+    memory_min REAL,
+    memory_max REAL,
+    memory_avg REAL,
+    memory_p95 REAL,
+    disk_min REAL,
+    disk_max REAL,
+    disk_avg REAL,
+    disk_p95 REAL
+);
+
 -- Recommendations Table
 CREATE TABLE IF NOT EXISTS recommendations (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
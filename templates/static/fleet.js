@@ -0,0 +1,63 @@
+const API_BASE = '/api/fleet';
+const POLL_MS = 10000;
+let selectedHost = null;
+
+function escapeHtml(value) {
+    return String(value ?? '').replace(/[&<>"']/g, c => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    }[c]));
+}
+
+function pct(value) {
+    return value == null ? '--' : `${value.toFixed(1)}%`;
+}
+
+function formatTs(epoch) {
+    return epoch ? new Date(epoch * 1000).toLocaleString() : '--';
+}
+
+async function loadHosts() {
+    try {
+        const res = await fetch(`${API_BASE}/hosts`);
+        const hosts = await res.json();
+        const online = hosts.filter(h => h.status === 'online').length;
+        document.getElementById('fleet-summary').textContent = `${online} of ${hosts.length} hosts online.`;
+
+        document.querySelector('#hosts-table tbody').innerHTML = hosts.map(h => `
+            <tr onclick="selectHost('${encodeURIComponent(h.name)}')" style="cursor:pointer;">
+                <td>${escapeHtml(h.name)}</td>
+                <td><span class="badge ${h.status === 'online' ? 'badge-success' : 'badge-critical'}">${h.status}</span></td>
+                <td>${pct(h.cpu_percent)}</td>
+                <td>${pct(h.memory_percent)}</td>
+                <td>${pct(h.disk_percent)}</td>
+                <td>${formatTs(h.last_seen)}</td>
+                <td>${escapeHtml(h.agent_version)}</td>
+            </tr>
+        `).join('');
+    } catch (e) { console.error(e); }
+}
+
+async function selectHost(encodedName) {
+    selectedHost = encodedName;
+    await loadHostEvents();
+}
+
+async function loadHostEvents() {
+    if (!selectedHost) return;
+    try {
+        const res = await fetch(`${API_BASE}/hosts/${selectedHost}/events?limit=50`);
+        const events = await res.json();
+        document.getElementById('host-events-title').textContent = `Events on ${decodeURIComponent(selectedHost)}`;
+        document.querySelector('#host-events-table tbody').innerHTML = events.map(e => `
+            <tr>
+                <td>${formatTs(e.ts)}</td>
+                <td>${escapeHtml(e.type)}</td>
+                <td><span class="badge badge-${e.severity === 'critical' ? 'critical' : 'warning'}">${escapeHtml(e.severity)}</span></td>
+                <td>${escapeHtml(e.description)}</td>
+            </tr>
+        `).join('');
+    } catch (e) { console.error(e); }
+}
+
+loadHosts();
+setInterval(() => { loadHosts(); loadHostEvents(); }, POLL_MS);
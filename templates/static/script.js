@@ -24,18 +24,20 @@ function switchTab(tabName) {
 
 // --- Core Data Logic ---
 
+function renderMetrics(data) {
+    updateCard('cpu', data.cpu_percent, data.top_processes);
+    updateCard('mem', data.memory_percent);
+    updateCard('disk', data.disk_percent);
+
+    document.getElementById('connection-status').textContent = `Live: ${new Date().toLocaleTimeString()}`;
+    document.getElementById('connection-status').style.color = 'var(--success)';
+}
+
 async function updateMetrics() {
     try {
         const res = await fetch(`${API_BASE}/health`);
         const data = await res.json();
-
-        // Update DOM
-        updateCard('cpu', data.cpu_percent, data.top_processes);
-        updateCard('mem', data.memory_percent);
-        updateCard('disk', data.disk_percent);
-
-        document.getElementById('connection-status').textContent = `Live: ${new Date().toLocaleTimeString()}`;
-        document.getElementById('connection-status').style.color = 'var(--success)';
+        renderMetrics(data);
 
         // After metrics, load quick insights
         loadRecommendations();
@@ -257,13 +259,74 @@ document.addEventListener('DOMContentLoaded', () => {
     updateEvents();
     updateActions();
 
-    // Poll intervals
-    setInterval(updateMetrics, 2000);
-    setInterval(updateEvents, 10000);
-    setInterval(updateActions, 30000);
-    setInterval(updateChartData, 2000); // Poll chart history
+    loadRecommendations();
+
+    // Live updates are pushed over /api/stream; polling is only the fallback
+    connectStream();
 });
 
+// --- Push channel (Server-Sent Events) with polling fallback ---
+
+let pollTimers = [];
+let eventSource = null;
+
+function startPolling() {
+    if (pollTimers.length) return;
+    pollTimers = [
+        setInterval(updateMetrics, 2000),
+        setInterval(updateEvents, 10000),
+        setInterval(updateActions, 30000),
+        setInterval(updateChartData, 2000), // Poll chart history
+    ];
+}
+
+function stopPolling() {
+    pollTimers.forEach(clearInterval);
+    pollTimers = [];
+}
+
+function connectStream() {
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+    // EventSource reconnects on its own and sends Last-Event-ID to resume
+    eventSource = new EventSource(`${API_BASE}/stream`);
+
+    eventSource.onopen = () => {
+        stopPolling();
+    };
+    eventSource.onerror = () => {
+        document.getElementById('connection-status').textContent = 'Reconnecting...';
+        document.getElementById('connection-status').style.color = 'var(--warning)';
+        startPolling();
+    };
+
+    eventSource.addEventListener('metrics', (msg) => {
+        renderMetrics(JSON.parse(msg.data));
+    });
+    eventSource.addEventListener('history', (msg) => {
+        const point = JSON.parse(msg.data);
+        if (historyChart && historyRange === 'live' && historyLastId !== null && point.id > historyLastId) {
+            historyLastId = point.id;
+            setChartPoints([point], true);
+        }
+    });
+    eventSource.addEventListener('event', () => {
+        updateEvents();
+        loadRecommendations();
+    });
+    eventSource.addEventListener('action', () => updateActions());
+    eventSource.addEventListener('recommendation', () => loadRecommendations());
+    eventSource.addEventListener('reset', () => {
+        // Missed more than the server backlog: reload everything once
+        updateMetrics();
+        updateEvents();
+        updateActions();
+        setHistoryRange(historyRange);
+    });
+}
+
 // --- NEW FEATURES LOGIC ---
 
 async function loadProcessList() {
@@ -321,20 +384,72 @@ async function initChart() {
     updateChartData();
 }
 
-async function updateChartData() {
-    if (!historyChart) return;
-    try {
-        const res = await fetch(`${API_BASE}/history`);
-        const data = await res.json();
+// Chart range state: 'live' appends only new rows (since_id); fixed ranges
+// are downsampled server-side and refreshed at most once a minute.
+const LIVE_POINTS = 60;
+const RANGE_MAX_POINTS = 300;
+let historyRange = 'live';
+let historyLastId = null;
+let historyLoadedAt = 0;
+
+function setHistoryRange(value) {
+    historyRange = value;
+    historyLastId = null;
+    historyLoadedAt = 0;
+    updateChartData();
+}
 
-        // Data format: [{timestamp, cpu_percent, memory_percent}, ...]
-        const labels = data.map(d => new Date(d.timestamp).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' }));
-        const cpuData = data.map(d => d.cpu_percent);
-        const memData = data.map(d => d.memory_percent);
+function formatChartLabel(timestamp) {
+    const d = new Date(timestamp);
+    if (historyRange === 'live' || Number(historyRange) <= 86400) {
+        return d.toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
+    }
+    return d.toLocaleDateString([], { month: 'short', day: 'numeric' }) + ' ' +
+        d.toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
+}
 
+function setChartPoints(points, append) {
+    const labels = points.map(d => formatChartLabel(d.timestamp));
+    const cpuData = points.map(d => d.cpu_percent);
+    const memData = points.map(d => d.memory_percent);
+
+    if (append) {
+        historyChart.data.labels.push(...labels);
+        historyChart.data.datasets[0].data.push(...cpuData);
+        historyChart.data.datasets[1].data.push(...memData);
+        const excess = historyChart.data.labels.length - LIVE_POINTS;
+        if (excess > 0) {
+            historyChart.data.labels.splice(0, excess);
+            historyChart.data.datasets.forEach(ds => ds.data.splice(0, excess));
+        }
+    } else {
         historyChart.data.labels = labels;
         historyChart.data.datasets[0].data = cpuData;
         historyChart.data.datasets[1].data = memData;
-        historyChart.update('none'); // Animate quietly
+    }
+    historyChart.update('none'); // Animate quietly
+}
+
+async function updateChartData() {
+    if (!historyChart) return;
+    try {
+        if (historyRange === 'live') {
+            const incremental = historyLastId !== null;
+            const url = incremental
+                ? `${API_BASE}/history?since_id=${historyLastId}`
+                : `${API_BASE}/history?max_points=${LIVE_POINTS}`;
+            const res = await fetch(url);
+            const data = await res.json();
+            if (data.last_id !== null && data.last_id !== undefined) historyLastId = data.last_id;
+            if (!incremental || data.points.length) setChartPoints(data.points, incremental);
+        } else {
+            if (Date.now() - historyLoadedAt < 60000) return;
+            const to = Math.floor(Date.now() / 1000);
+            const from = to - Number(historyRange);
+            const res = await fetch(`${API_BASE}/history?from=${from}&to=${to}&max_points=${RANGE_MAX_POINTS}`);
+            const data = await res.json();
+            historyLoadedAt = Date.now();
+            setChartPoints(data.points, false);
+        }
     } catch (e) { console.error("Chart error", e); }
 }